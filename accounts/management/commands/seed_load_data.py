@@ -0,0 +1,50 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from utils.synthetic_data import SCALE_PRESETS, SyntheticDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, reproducible synthetic dataset for load testing and benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALE_PRESETS), default='small',
+                            help='Preset sizes (large = 500 hospitals, 1M donors, 5M donations)')
+        parser.add_argument('--hospitals', type=int, help='Override the number of hospitals')
+        parser.add_argument('--donors', type=int, help='Override the number of donors')
+        parser.add_argument('--donations', type=int, help='Override the approximate number of donation histories')
+        parser.add_argument('--emergencies', type=int, help='Override the number of emergency requests')
+        parser.add_argument('--notifications', type=int, help='Override the number of user notifications')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--workers', type=int, default=1, help='Processes generating donor rows in parallel')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--prefix', default='load', help='Username prefix for generated accounts')
+        parser.add_argument('--skip-rollup', action='store_true', help='Do not rebuild the donation rollup afterwards')
+
+    def handle(self, *args, **options):
+        sizes = dict(SCALE_PRESETS[options['scale']])
+        for key in sizes:
+            if options[key] is not None:
+                sizes[key] = options[key]
+
+        generator = SyntheticDataGenerator(
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            workers=max(1, options['workers']),
+            prefix=options['prefix'],
+            log=self.stdout.write,
+        )
+        if generator.existing_data():
+            raise CommandError(
+                f"Accounts prefixed '{options['prefix']}_' already exist. Use a fresh database or another --prefix."
+            )
+
+        self.stdout.write(self.style.WARNING(f'Generating synthetic data: {sizes}'))
+        started = time.perf_counter()
+        counts = generator.run(rebuild_rollup=not options['skip_rollup'], **sizes)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['hospitals']} hospitals, {counts['donors']} donors, {counts['donations']} donations, "
+            f"{counts['emergencies']} emergencies and {counts['notifications']} notifications in {elapsed:.1f}s"
+        ))
+        self.stdout.write('All generated accounts use the password LoadTest@123')
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import AdminProfile, SystemNotification
+from .models import AdminProfile, SystemNotification, ExportJob
 
 # Enhance the default User admin
 class UserAdmin(BaseUserAdmin):
@@ -84,3 +84,12 @@ class SystemNotificationAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         })
     )
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'export_type', 'status', 'rows_written', 'rows_total', 'file_size', 'requested_by', 'created_at', 'expires_at']
+    list_filter = ['export_type', 'status', 'created_at']
+    readonly_fields = ['parameters_hash', 'created_at', 'started_at', 'completed_at']
+    list_per_page = 25
+    date_hierarchy = 'created_at'
+    ordering = ['-created_at']
@@ -0,0 +1,326 @@
+"""
+Export builders shared by the download views and background export jobs
+"""
+import io
+from datetime import date, datetime, timedelta
+from django.db.models import Count, Q, Case, When, BooleanField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from donor.models import Donor, DonationHistory
+from utils.constants import EXPORT_CHUNK_SIZE, MINIMUM_DONATION_INTERVAL_DAYS
+
+
+DONOR_EXPORT_HEADER = [
+    'ID', 'Name', 'Email', 'Phone', 'Blood Group', 'City', 'State',
+    'Date of Birth', 'Weight (kg)', 'Registration Date', 'Last Donation',
+    'Total Donations', 'Emergency Contact', 'Eligibility Status'
+]
+
+DONOR_LIST_EXPORT_HEADER = [
+    'ID', 'Name', 'Email', 'Phone', 'Blood Group',
+    'City', 'State', 'Date of Birth', 'Weight (kg)',
+    'Last Donation', 'Total Donations', 'Emergency Contact'
+]
+
+DONATION_EXPORT_HEADER = [
+    'ID', 'Donor Name', 'Donor Email', 'Blood Group', 'Donation Date',
+    'Center Name', 'Units Donated', 'Notes'
+]
+
+
+def filtered_export_donors(params):
+    """Donor queryset for exports, honouring the donor_tracking filters in params (GET or dict)"""
+    donors = Donor.objects.all()
+
+    search_query = params.get('search', '')
+    if search_query:
+        donors = donors.filter(
+            Q(user__first_name__icontains=search_query) |
+            Q(user__last_name__icontains=search_query) |
+            Q(user__username__icontains=search_query) |
+            Q(user__email__icontains=search_query) |
+            Q(blood_group__icontains=search_query) |
+            Q(city__icontains=search_query) |
+            Q(phone_number__icontains=search_query)
+        )
+
+    blood_group_filter = params.get('blood_group', '')
+    if blood_group_filter:
+        donors = donors.filter(blood_group=blood_group_filter)
+
+    city_filter = params.get('city', '')
+    if city_filter:
+        donors = donors.filter(city__icontains=city_filter)
+
+    return donors
+
+
+def annotate_export_donors(donors):
+    """Add donation count and eligibility computed in SQL instead of per-row Python"""
+    donation_count = DonationHistory.objects.filter(donor=OuterRef('pk')).order_by().values('donor').annotate(
+        count=Count('id')
+    ).values('count')
+    eligibility_cutoff = date.today() - timedelta(days=MINIMUM_DONATION_INTERVAL_DAYS)
+
+    return donors.annotate(
+        donation_count=Coalesce(Subquery(donation_count, output_field=IntegerField()), Value(0)),
+        can_donate_now=Case(
+            When(Q(last_donation_date__isnull=True) | Q(last_donation_date__lte=eligibility_cutoff), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+
+
+def donor_display_name(first_name, last_name, username):
+    """Same fallback as Donor.name without loading the User instance"""
+    return f"{first_name} {last_name}".strip() or username
+
+
+def eligibility_label(can_donate_now, last_donation_date):
+    """Human readable eligibility, matching Donor.can_donate() wording"""
+    if can_donate_now:
+        return 'Eligible'
+    next_eligible_date = last_donation_date + timedelta(days=MINIMUM_DONATION_INTERVAL_DAYS)
+    days_remaining = (next_eligible_date - date.today()).days
+    return f"Not Eligible - Must wait {days_remaining} more days. Next eligible date: {next_eligible_date.strftime('%B %d, %Y')}"
+
+
+def donor_export_queryset(params):
+    return annotate_export_donors(filtered_export_donors(params)).order_by('id').values_list(
+        'id', 'user__first_name', 'user__last_name', 'user__username', 'user__email',
+        'phone_number', 'blood_group', 'city', 'state', 'date_of_birth', 'weight',
+        'created_at', 'last_donation_date', 'donation_count', 'allow_emergency_contact',
+        'can_donate_now',
+    )
+
+
+def donor_export_rows(queryset):
+    """Yield CSV rows for the full donor export"""
+    for (donor_id, first_name, last_name, username, email, phone, blood_group, city, state,
+         date_of_birth, weight, created_at, last_donation_date, donation_count,
+         allow_emergency_contact, can_donate_now) in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            donor_id,
+            donor_display_name(first_name, last_name, username),
+            email,
+            phone or 'N/A',
+            blood_group,
+            city or 'N/A',
+            state or 'N/A',
+            date_of_birth.strftime('%Y-%m-%d') if date_of_birth else 'N/A',
+            weight if weight else 'N/A',
+            created_at.strftime('%Y-%m-%d') if created_at else 'N/A',
+            last_donation_date.strftime('%Y-%m-%d') if last_donation_date else 'Never',
+            donation_count,
+            'Yes' if allow_emergency_contact else 'No',
+            eligibility_label(can_donate_now, last_donation_date),
+        ]
+
+
+def donor_list_export_queryset(params):
+    return annotate_export_donors(filtered_export_donors(params)).order_by('id').values_list(
+        'id', 'user__first_name', 'user__last_name', 'user__username', 'user__email',
+        'phone_number', 'blood_group', 'city', 'state', 'date_of_birth', 'weight',
+        'last_donation_date', 'donation_count', 'allow_emergency_contact',
+    )
+
+
+def donor_list_export_rows(queryset):
+    """Yield CSV rows for the shorter donor list export"""
+    for (donor_id, first_name, last_name, username, email, phone, blood_group, city, state,
+         date_of_birth, weight, last_donation_date, donation_count,
+         allow_emergency_contact) in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            donor_id,
+            donor_display_name(first_name, last_name, username),
+            email,
+            phone or 'N/A',
+            blood_group,
+            city or 'N/A',
+            state or 'N/A',
+            date_of_birth.strftime('%Y-%m-%d') if date_of_birth else 'N/A',
+            weight if weight else 'N/A',
+            last_donation_date.strftime('%Y-%m-%d') if last_donation_date else 'Never',
+            donation_count,
+            'Yes' if allow_emergency_contact else 'No'
+        ]
+
+
+def donation_export_queryset(params):
+    return DonationHistory.objects.annotate(
+        center_name=Coalesce('hospital__name', 'donation_center_name')
+    ).order_by('-donation_date', '-id').values_list(
+        'id', 'donor__user__first_name', 'donor__user__last_name', 'donor__user__username',
+        'donor__user__email', 'donor__blood_group', 'donation_date', 'center_name',
+        'units_donated', 'notes',
+    )
+
+
+def donation_export_rows(queryset):
+    """Yield CSV rows for the donation history export"""
+    for (donation_id, first_name, last_name, username, email, blood_group, donation_date,
+         center_name, units_donated, notes) in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [
+            donation_id,
+            donor_display_name(first_name, last_name, username),
+            email,
+            blood_group,
+            donation_date.strftime('%Y-%m-%d'),
+            center_name,
+            units_donated,
+            notes
+        ]
+
+
+# Export kind -> (header, queryset builder, row generator)
+CSV_EXPORTS = {
+    'donors': (DONOR_EXPORT_HEADER, donor_export_queryset, donor_export_rows),
+    'donor_list': (DONOR_LIST_EXPORT_HEADER, donor_list_export_queryset, donor_list_export_rows),
+    'donations': (DONATION_EXPORT_HEADER, donation_export_queryset, donation_export_rows),
+}
+
+
+def report_statistics(as_of=None):
+    """
+    Statistics snapshot used by the comprehensive report
+
+    All donor figures come from one conditional aggregate instead of a count per blood group.
+    """
+    as_of = as_of or timezone.now().date()
+    blood_group_counts = {
+        f'bg_{index}': Count('id', filter=Q(blood_group=blood_group))
+        for index, (blood_group, _) in enumerate(Donor.BLOOD_GROUPS)
+    }
+    donor_stats = Donor.objects.aggregate(
+        total_donors=Count('id'),
+        active_donors=Count('id', filter=Q(last_donation_date__gte=as_of - timedelta(days=90))),
+        **blood_group_counts
+    )
+    return {
+        'as_of': as_of.isoformat(),
+        'total_donors': donor_stats['total_donors'],
+        'total_donations': DonationHistory.objects.count(),
+        'active_donors': donor_stats['active_donors'],
+        'blood_groups': [
+            (blood_group, donor_stats[f'bg_{index}'])
+            for index, (blood_group, _) in enumerate(Donor.BLOOD_GROUPS)
+        ],
+    }
+
+
+def build_report(stats=None):
+    """
+    Build the comprehensive system report
+
+    Args:
+        stats: Snapshot from report_statistics(); computed when omitted
+
+    Returns:
+        tuple: (content_bytes, content_type, file_extension) - a PDF when reportlab
+        is installed, plain text otherwise
+    """
+    stats = stats or report_statistics()
+    total_donors = stats['total_donors']
+    total_donations = stats['total_donations']
+    active_donors = stats['active_donors']
+
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+        from reportlab.lib import colors
+    except ImportError:
+        # Fallback to simple text report if reportlab is not available
+        report_content = f"""
+BLOOD DONATION SYSTEM - COMPREHENSIVE REPORT
+Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}
+
+SYSTEM STATISTICS:
+- Total Donors: {total_donors}
+- Total Donations: {total_donations}
+- Active Donors (Last 90 days): {active_donors}
+
+BLOOD GROUP DISTRIBUTION:
+"""
+        for blood_group, count in stats['blood_groups']:
+            report_content += f"- {blood_group}: {count} donors\n"
+        return report_content.encode('utf-8'), 'text/plain', 'txt'
+
+    # Create the PDF object
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+
+    # Container for the 'Flowable' objects
+    elements = []
+
+    # Get styles
+    styles = getSampleStyleSheet()
+    title_style = styles['Title']
+    heading_style = styles['Heading2']
+    normal_style = styles['Normal']
+
+    # Title
+    title = Paragraph("Blood Donation System - Comprehensive Report", title_style)
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+
+    # Generate date
+    date_para = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style)
+    elements.append(date_para)
+    elements.append(Spacer(1, 12))
+
+    # Statistics
+    stats_heading = Paragraph("System Statistics", heading_style)
+    elements.append(stats_heading)
+
+    stats_data = [
+        ['Metric', 'Value'],
+        ['Total Donors', str(total_donors)],
+        ['Total Donations', str(total_donations)],
+        ['Active Donors (Last 90 days)', str(active_donors)],
+    ]
+
+    stats_table = Table(stats_data)
+    stats_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 14),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    elements.append(stats_table)
+    elements.append(Spacer(1, 12))
+
+    # Blood Group Distribution
+    bg_heading = Paragraph("Blood Group Distribution", heading_style)
+    elements.append(bg_heading)
+
+    bg_data = [['Blood Group', 'Number of Donors']]
+    for blood_group, count in stats['blood_groups']:
+        bg_data.append([blood_group, str(count)])
+
+    bg_table = Table(bg_data)
+    bg_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    elements.append(bg_table)
+
+    # Build PDF
+    doc.build(elements)
+    pdf = buffer.getvalue()
+    buffer.close()
+    return pdf, 'application/pdf', 'pdf'
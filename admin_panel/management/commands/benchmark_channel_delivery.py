@@ -0,0 +1,104 @@
+import logging
+import tempfile
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from utils.gateway_stub import GatewayStub
+from utils.test_runner import IsolatedTestRunner
+
+WEBHOOK_SECRET = 'benchmark-secret'
+
+
+class Command(BaseCommand):
+    help = 'Send one emergency alert to N synthetic donors through the SMS and webhook channels and a local gateway stub'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000, help='Number of SMS recipients')
+        parser.add_argument('--batch-size', type=int, default=100, help='SMS messages per gateway request')
+        parser.add_argument('--fail-requests', type=int, default=0,
+                            help='The stub answers the first N requests with 503 (retried by the adapter)')
+        parser.add_argument('--fail-status', type=int, default=503, help='Status for failed requests')
+        parser.add_argument('--timeout', type=int, default=300, help='Give up after this many seconds')
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.db.backends').setLevel(logging.WARNING)
+        stub = GatewayStub(
+            fail_requests=options['fail_requests'], fail_status=options['fail_status'], secret=WEBHOOK_SECRET
+        ).start()
+
+        # Throwaway database and cache; a file because worker threads cannot share the in-memory test database
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        previous_name = test_settings.get('NAME')
+        test_settings['NAME'] = tempfile.mktemp(prefix='channel-benchmark-', suffix='.sqlite3')
+        runner = IsolatedTestRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            self._run(stub, options)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+            test_settings['NAME'] = previous_name
+            stub.stop()
+
+    def _run(self, stub, options):
+        from donor.models import Donor, EmergencyRequest
+        from utils.notification_channels import OutboundAlert, SmsGatewayChannel, WebhookChannel
+
+        channels = [
+            SmsGatewayChannel('sms', {
+                'URL': stub.url + 'sms', 'BATCH_SIZE': options['batch_size'], 'CONCURRENCY': 4, 'TIMEOUT': 10,
+            }),
+            WebhookChannel('webhook', {'URLS': [stub.url + 'webhook'], 'SECRET': WEBHOOK_SECRET, 'TIMEOUT': 10}),
+        ]
+
+        self.stdout.write(f"Creating {options['recipients']} recipients...")
+        User.objects.bulk_create([User(username=f'recipient{i}') for i in range(options['recipients'])], batch_size=2000)
+        # Channels only read the phone number and user id, so the donors are not saved
+        donors = [
+            Donor(user_id=user_id, phone_number=f'+977{user_id:010d}')
+            for user_id in User.objects.filter(username__startswith='recipient').values_list('id', flat=True)
+        ]
+        emergency = EmergencyRequest.objects.create(
+            blood_group_needed='O-', units_needed=4, hospital_name='Benchmark Hospital',
+            contact_person='Benchmark', contact_phone='0000000000', location='Benchmark',
+            urgency_level='critical', required_by=timezone.now() + timedelta(hours=6),
+        )
+        alert = OutboundAlert.for_emergency(emergency)
+
+        started = time.perf_counter()
+        for channel in channels:
+            channel.deliver(alert, donors)
+        self._wait(started, options['timeout'])
+        self._report('First pass', started, stub)
+
+        # Recipients whose batch still failed after the adapter's retries are sent again
+        started = time.perf_counter()
+        resent = sum(channel.retry_failed(alert) for channel in channels)
+        if resent:
+            self._wait(started, options['timeout'])
+            self._report(f'Retry of {resent}', started, stub)
+
+    def _wait(self, started, timeout):
+        from admin_panel.models import ChannelDelivery
+
+        while ChannelDelivery.objects.filter(status='queued').exists():
+            if time.perf_counter() - started > timeout:
+                raise CommandError(f'Deliveries still queued after {timeout}s')
+            time.sleep(0.2)
+
+    def _report(self, label, started, stub):
+        from django.db.models import Count
+        from admin_panel.models import ChannelDelivery
+
+        statuses = {
+            f"{row['channel']}:{row['status']}": row['count']
+            for row in ChannelDelivery.objects.values('channel', 'status').annotate(count=Count('id')).order_by()
+        }
+        self.stdout.write(
+            f'{label}: {time.perf_counter() - started:.1f}s, {statuses}; stub accepted {stub.messages} message(s) '
+            f'in {stub.requests} request(s), {stub.bad_signatures} bad signature(s)'
+        )
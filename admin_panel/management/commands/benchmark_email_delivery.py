@@ -0,0 +1,81 @@
+import logging
+import tempfile
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from utils.smtp_sink import SmtpSink
+from utils.test_runner import IsolatedTestRunner
+
+
+class Command(BaseCommand):
+    help = 'Email one emergency alert to N synthetic recipients through a local SMTP sink and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=10000, help='Number of recipients')
+        parser.add_argument('--rejected', type=int, default=0, help='How many of them the sink refuses at RCPT TO')
+        parser.add_argument('--drop-after', type=int, help='Drop the connection carrying this message number')
+        parser.add_argument('--timeout', type=int, default=300, help='Give up after this many seconds')
+
+    def handle(self, *args, **options):
+        logging.getLogger('django.db.backends').setLevel(logging.WARNING)
+        rejected = {f'recipient{i}@example.com' for i in range(options['rejected'])}
+        sink = SmtpSink(reject=rejected, drop_after=options['drop_after']).start()
+
+        # Throwaway database and cache; the test environment's locmem backend is swapped for SMTP to the sink.
+        # The database is a file: worker threads cannot write to the shared in-memory test database concurrently.
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        previous_name = test_settings.get('NAME')
+        test_settings['NAME'] = tempfile.mktemp(prefix='email-benchmark-', suffix='.sqlite3')
+        runner = IsolatedTestRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        smtp = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=sink.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        )
+        smtp.enable()
+        try:
+            results = self._run(options)
+        finally:
+            smtp.disable()
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+            test_settings['NAME'] = previous_name
+            sink.stop()
+
+        elapsed, statuses = results
+        self.stdout.write(
+            f"{options['recipients']} recipient(s) in {elapsed:.1f}s: {statuses}; "
+            f"sink received {sink.messages} message(s) over {sink.connections} connection(s)"
+        )
+
+    def _run(self, options):
+        from admin_panel.models import EmailDelivery
+        from donor.models import EmergencyRequest
+        from utils.email_delivery import EmailDeliveryService
+
+        self.stdout.write(f"Creating {options['recipients']} recipients...")
+        User.objects.bulk_create([
+            User(username=f'recipient{i}', email=f'recipient{i}@example.com')
+            for i in range(options['recipients'])
+        ], batch_size=2000)
+        users = list(User.objects.filter(username__startswith='recipient'))
+        emergency = EmergencyRequest.objects.create(
+            blood_group_needed='O-', units_needed=4, hospital_name='Benchmark Hospital',
+            contact_person='Benchmark', contact_phone='0000000000', location='Benchmark',
+            urgency_level='critical', required_by=timezone.now() + timedelta(hours=6),
+        )
+
+        started = time.perf_counter()
+        EmailDeliveryService.send_emergency_alert(emergency, users)
+        while EmailDelivery.objects.filter(status__in=['queued', 'sending']).exists():
+            if time.perf_counter() - started > options['timeout']:
+                raise CommandError(f"Deliveries still pending after {options['timeout']}s")
+            time.sleep(0.2)
+        elapsed = time.perf_counter() - started
+        return elapsed, EmailDeliveryService.status(EmailDelivery.objects.values_list('broadcast_id', flat=True).first())
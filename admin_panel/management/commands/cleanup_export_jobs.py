@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from utils.export_jobs import ExportJobService
+
+
+class Command(BaseCommand):
+    help = 'Delete expired export files and fail export jobs that never finished'
+
+    def handle(self, *args, **options):
+        expired_count, stale_count = ExportJobService.cleanup_expired_jobs()
+        self.stdout.write(self.style.SUCCESS(
+            f'Expired {expired_count} export file(s), marked {stale_count} stale job(s) as failed'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from utils.constants import NOTIFICATION_CLEANUP_DAYS, NOTIFICATION_RETENTION_BATCH_SIZE, NOTIFICATION_RETENTION_PAUSE
+from utils.notification_retention import NotificationRetention
+
+
+class Command(BaseCommand):
+    help = 'Delete old notifications in small batches, optionally archiving them as compressed NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=NOTIFICATION_CLEANUP_DAYS,
+                            help='Remove notifications older than this many days')
+        parser.add_argument('--batch-size', type=int, default=NOTIFICATION_RETENTION_BATCH_SIZE,
+                            help='Rows removed per transaction')
+        parser.add_argument('--pause', type=float, default=NOTIFICATION_RETENTION_PAUSE,
+                            help='Seconds to sleep between batches')
+        parser.add_argument('--archive-dir', help='Write removed rows to <table>_<timestamp>.ndjson.gz files here first')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be removed')
+
+    def handle(self, *args, **options):
+        retention = NotificationRetention(
+            days=options['days'],
+            batch_size=options['batch_size'],
+            archive_dir=options['archive_dir'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+            log=self.stdout.write,
+        )
+        results = retention.run()
+        for path in retention.archive_files:
+            self.stdout.write(f'Archived to {path}')
+        verb = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {sum(results.values())} row(s) in total'))
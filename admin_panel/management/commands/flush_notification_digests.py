@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from utils.notification_digest import NotificationDigest
+
+
+class Command(BaseCommand):
+    help = 'Merge buffered notifications whose digest window has elapsed into one notification per user and type'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Flush every buffer now, even if its window is still open')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running and flush every INTERVAL seconds (0 = flush once and exit)')
+
+    def handle(self, *args, **options):
+        while True:
+            flushed, created = NotificationDigest.flush_due(force=options['all'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Flushed {flushed} buffered notification(s) into {created} notification(s)'
+            ))
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
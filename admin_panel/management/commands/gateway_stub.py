@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand
+from utils.gateway_stub import GatewayStub
+
+
+class Command(BaseCommand):
+    help = 'Run a local HTTP server that accepts and counts SMS gateway and webhook POSTs without forwarding them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8025, help='Port to listen on (127.0.0.1)')
+        parser.add_argument('--fail-requests', type=int, default=0, help='Answer the first N requests with --fail-status')
+        parser.add_argument('--fail-status', type=int, default=503, help='Status for failed requests')
+        parser.add_argument('--secret', default='', help='Check webhook X-Signature headers against this secret')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between progress lines')
+
+    def handle(self, *args, **options):
+        stub = GatewayStub(
+            options['port'], options['fail_requests'], options['fail_status'], options['secret']
+        ).start()
+        self.stdout.write(
+            f'Gateway stub listening on {stub.url}; point DJANGO_SMS_GATEWAY_URL or DJANGO_ALERT_WEBHOOK_URLS at it'
+        )
+        try:
+            while True:
+                time.sleep(options['interval'])
+                self.stdout.write(
+                    f'{stub.messages} message(s) in {stub.requests} request(s), {stub.bad_signatures} bad signature(s)'
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stub.stop()
@@ -0,0 +1,82 @@
+import logging
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from utils.index_advisor import IndexAdvisor, capture_workload, load_workload, save_workload
+from utils.test_runner import IsolatedTestRunner
+
+
+class Command(BaseCommand):
+    help = 'Replay a captured query workload through EXPLAIN and report missing and unused indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workload', help='NDJSON workload to replay (default: the slow query log)')
+        parser.add_argument('--benchmark', action='store_true',
+                            help='Capture the workload by running the benchmark views on a throwaway seeded database')
+        parser.add_argument('--save-workload', help='Write the captured workload to this NDJSON file')
+        parser.add_argument('--min-queries', type=int, default=1,
+                            help='Only suggest indexes that would serve at least this many captured queries')
+        parser.add_argument('--show-unused', action='store_true', help='Also list indexes no query in the workload used')
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self._run_on_benchmark_database(options)
+            return
+
+        path = options['workload'] or str(getattr(settings, 'SLOW_QUERY_LOG', {}).get('LOG_FILE', ''))
+        try:
+            workload = load_workload(path)
+        except OSError as e:
+            raise CommandError(f'Could not read workload {path}: {e}')
+        if not workload:
+            raise CommandError(f'No replayable queries in {path}')
+        self._report(IndexAdvisor(connection).analyze(workload), workload, options)
+
+    def _run_on_benchmark_database(self, options):
+        from utils.benchmarks import benchmark_users, seed_benchmark_dataset
+
+        logging.getLogger('django.db.backends').setLevel(logging.WARNING)
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        # Throwaway database, cache file and media directory, so nothing reaches the live server's copies
+        runner = IsolatedTestRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            self.stdout.write('Seeding benchmark dataset...')
+            seed_benchmark_dataset()
+            workload = capture_workload(benchmark_users())
+            if options['save_workload']:
+                save_workload(workload, options['save_workload'])
+            # Let the planner see real row counts before explaining
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            advisor = IndexAdvisor(connection).analyze(workload)
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+        self._report(advisor, workload, options)
+
+    def _report(self, advisor, workload, options):
+        self.stdout.write(
+            f'Replayed {len(workload)} queries: {advisor.explained} distinct shapes explained, {advisor.failed} skipped\n'
+        )
+
+        missing = [item for item in advisor.missing_indexes() if item['queries'] >= options['min_queries']]
+        if not missing:
+            self.stdout.write(self.style.SUCCESS('No missing indexes found for this workload'))
+        for item in missing:
+            self.stdout.write(self.style.WARNING(
+                f"{item['model']}: index on ({', '.join(item['fields'])}) - "
+                f"{item['queries']} queries in {len(item['shapes'])} shape(s) read {item['table']} without an index"
+            ))
+            if item['sources']:
+                self.stdout.write(f"    seen in: {', '.join(sorted(item['sources'])[:5])}")
+            self.stdout.write(f"    models.Index(fields={item['fields']!r}),")
+            self.stdout.write(f"    e.g. {item['sample'][:300]}")
+
+        if options['show_unused']:
+            unused = advisor.unused_indexes()
+            self.stdout.write(f'\n{len(unused)} index(es) not used by this workload:')
+            for item in unused:
+                self.stdout.write(f"    {item['table']}.{item['index']} ({', '.join(item['columns'])})")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from utils.constants import REPORT_CACHE_RETENTION_DAYS
+from utils.report_cache import ReportCache
+
+
+class Command(BaseCommand):
+    help = 'Pre-render the comprehensive report to disk (run nightly) and prune old copies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=REPORT_CACHE_RETENTION_DAYS,
+                            help='Delete rendered reports older than this many days')
+
+    def handle(self, *args, **options):
+        removed = ReportCache.prune(options['keep_days'])
+        path, _, _ = ReportCache.get_report()
+        self.stdout.write(self.style.SUCCESS(f'Report ready at {path}; pruned {removed} old report(s)'))
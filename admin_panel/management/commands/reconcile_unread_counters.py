@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from utils.unread_counters import UnreadCounter
+
+
+class Command(BaseCommand):
+    help = 'Recount cached unread-notification counters from the database (run periodically, e.g. hourly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='user_ids',
+                            help='Only reconcile this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        written = UnreadCounter.reconcile(options['user_ids'])
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {written} unread counter(s)'))
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from utils.notification_channels import retry_failed_deliveries
+
+
+class Command(BaseCommand):
+    help = 'Resend SMS and webhook deliveries that failed after the gateway retries and still have attempts left'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--channel', help='Only this channel (e.g. sms, webhook)')
+        parser.add_argument('--alert', help='Only this alert key (e.g. emergency:42)')
+        parser.add_argument('--timeout', type=int, default=120, help='Seconds to wait for the resends to finish')
+
+    def handle(self, *args, **options):
+        from admin_panel.models import ChannelDelivery
+
+        results = retry_failed_deliveries(options['channel'], options['alert'])
+        queued = ChannelDelivery.objects.filter(status='queued', channel__in=list(results))
+        if options['alert']:
+            queued = queued.filter(alert_key=options['alert'])
+        started = time.monotonic()
+        while queued.exists() and time.monotonic() - started < options['timeout']:
+            time.sleep(0.2)
+        self.stdout.write(self.style.SUCCESS(f'Resent {sum(results.values())} failed deliveries: {results}'))
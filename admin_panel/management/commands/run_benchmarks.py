@@ -0,0 +1,103 @@
+import json
+import logging
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from utils.benchmarks import (
+    BENCHMARK_DATASET,
+    BENCHMARK_SCENARIOS,
+    benchmark_users,
+    compare_with_baseline,
+    default_budgets,
+    run_scenario,
+    seed_benchmark_dataset,
+)
+from utils.test_runner import IsolatedTestRunner
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the hot views on a fixed synthetic dataset and compare against committed baselines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baselines.json'),
+                            help='Baseline/budget file to compare against')
+        parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARK_SCENARIOS), help='Run only these scenarios')
+        parser.add_argument('--iterations', type=int, default=5, help='Timed requests per scenario')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed relative increase in time and memory over the baseline')
+        parser.add_argument('--warm-cache', action='store_true', help='Do not clear the cache between requests')
+        parser.add_argument('--no-timing', action='store_true',
+                            help='Only enforce query and memory limits (wall time varies between machines)')
+        parser.add_argument('--update-baseline', action='store_true', help='Record the results as the new baseline')
+        parser.add_argument('--reset-budgets', action='store_true',
+                            help='With --update-baseline, also reset every budget to a small margin over the results')
+
+    def handle(self, *args, **options):
+        baselines = {}
+        if os.path.exists(options['baseline']):
+            with open(options['baseline']) as handle:
+                baselines = json.load(handle)
+        if baselines.get('dataset') not in (None, BENCHMARK_DATASET) and not options['update_baseline']:
+            raise CommandError('Baseline was recorded against a different dataset; re-record it with --update-baseline')
+
+        # SQL logging at DEBUG would dominate the measurements
+        logging.getLogger('django.db.backends').setLevel(logging.WARNING)
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        # Throwaway database, cache file and media directory, so nothing reaches the live server's copies
+        runner = IsolatedTestRunner(verbosity=0, interactive=False)
+        runner.setup_test_environment()
+        old_config = runner.setup_databases()
+        try:
+            self.stdout.write('Seeding benchmark dataset...')
+            seed_benchmark_dataset()
+            users = benchmark_users()
+
+            results = {}
+            for name in options['only'] or BENCHMARK_SCENARIOS:
+                role = BENCHMARK_SCENARIOS[name][3]
+                results[name] = run_scenario(name, users[role], options['iterations'], options['warm_cache'])
+        finally:
+            runner.teardown_databases(old_config)
+            runner.teardown_test_environment()
+
+        self.stdout.write(f"{'scenario':<24}{'status':>7}{'median ms':>11}{'max ms':>9}{'queries':>9}{'peak KB':>10}{'resp KB':>9}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24}{result['status']:>7}{result['time_ms']:>11}{result['max_time_ms']:>9}"
+                f"{result['queries']:>9}{result['peak_kb']:>10}{result['response_kb']:>9}"
+            )
+
+        if options['update_baseline']:
+            self._write_baseline(options['baseline'], baselines, results, options['reset_budgets'])
+            return
+
+        failures = []
+        views = baselines.get('views', {})
+        for name, result in results.items():
+            if name not in views:
+                self.stdout.write(self.style.WARNING(f'{name}: no baseline recorded'))
+                continue
+            failures += compare_with_baseline(
+                name, result, views[name], options['tolerance'], check_timing=not options['no_timing']
+            )
+
+        if failures:
+            for failure in failures:
+                self.stderr.write(self.style.ERROR(failure))
+            raise CommandError(f'{len(failures)} performance regression(s)')
+        self.stdout.write(self.style.SUCCESS('All scenarios within baseline and budgets'))
+
+    def _write_baseline(self, path, baselines, results, reset_budgets=False):
+        views = baselines.get('views', {})
+        for name, result in results.items():
+            entry = views.setdefault(name, {})
+            entry['baseline'] = {key: result[key] for key in ('time_ms', 'queries', 'peak_kb')}
+            if reset_budgets or 'budgets' not in entry:
+                entry['budgets'] = default_budgets(result)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as handle:
+            json.dump({'dataset': BENCHMARK_DATASET, 'views': views}, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        self.stdout.write(self.style.SUCCESS(f'Baseline written to {path}'))
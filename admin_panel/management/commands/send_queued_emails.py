@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from utils.email_delivery import EmailDeliveryService
+
+
+class Command(BaseCommand):
+    help = 'Send queued broadcast emails (e.g. left over after a restart or stuck with a crashed worker) and retry failed ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--broadcast', type=int, help='Only this broadcast id')
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Also resend failed deliveries that have attempts left')
+
+    def handle(self, *args, **options):
+        batches = EmailDeliveryService.dispatch(
+            options['broadcast'], include_failed=options['retry_failed'], wait=True
+        )
+        self.stdout.write(self.style.SUCCESS(f'Sent {batches} batch(es) of queued email'))
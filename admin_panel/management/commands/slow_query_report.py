@@ -0,0 +1,56 @@
+import glob
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from utils.slow_queries import summarize_log
+
+
+class Command(BaseCommand):
+    help = 'Summarize the slow query log: top query shapes by total time, with call sites and query plans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log-file', help='Log to read (default: SLOW_QUERY_LOG["LOG_FILE"] plus rotated files)')
+        parser.add_argument('--top', type=int, default=10, help='Number of query shapes to show')
+        parser.add_argument('--hours', type=float, help='Only include queries logged in the last N hours')
+        parser.add_argument('--no-plan', action='store_true', help='Do not print query plans')
+
+    def handle(self, *args, **options):
+        log_file = options['log_file'] or str(getattr(settings, 'SLOW_QUERY_LOG', {}).get('LOG_FILE', ''))
+        paths = sorted(glob.glob(f'{log_file}*')) if not options['log_file'] else [log_file]
+        if not paths:
+            raise CommandError(f'No slow query log found at {log_file}')
+
+        since = None
+        if options['hours']:
+            since = (timezone.now() - timedelta(hours=options['hours'])).isoformat()
+
+        def iter_lines():
+            for path in paths:
+                with open(path, encoding='utf-8', errors='replace') as log:
+                    yield from log
+
+        summary = summarize_log(iter_lines(), since=since)
+        if not summary:
+            self.stdout.write('No slow queries recorded')
+            return
+
+        total = sum(group['count'] for group in summary)
+        self.stdout.write(f'{total} slow queries in {len(summary)} distinct shapes (showing top {options["top"]})\n')
+        for rank, group in enumerate(summary[:options['top']], start=1):
+            self.stdout.write(self.style.WARNING(
+                f"#{rank} [{group['fingerprint']}] total {group['total_ms']:.0f} ms, "
+                f"{group['count']}x, avg {group['avg_ms']:.1f} ms, max {group['max_ms']:.1f} ms"
+            ))
+            self.stdout.write(f"    {group['normalized'][:500]}")
+            for site, count in sorted(group['call_sites'].items(), key=lambda item: -item[1])[:3]:
+                self.stdout.write(f'    from {site} ({count}x)')
+
+            slowest = group['slowest']
+            if slowest.get('params'):
+                self.stdout.write(f"    slowest params: {', '.join(slowest['params'])[:300]}")
+            if not options['no_plan'] and slowest.get('plan'):
+                self.stdout.write('    plan:')
+                for line in slowest['plan']:
+                    self.stdout.write(f'      {line}')
+            self.stdout.write('')
@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from utils.smtp_sink import SmtpSink
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP server that accepts and counts messages without delivering them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=1025, help='Port to listen on (127.0.0.1)')
+        parser.add_argument('--reject', nargs='+', default=[], help='Addresses refused at RCPT TO')
+        parser.add_argument('--interval', type=int, default=5, help='Seconds between progress lines')
+
+    def handle(self, *args, **options):
+        sink = SmtpSink(options['port'], options['reject']).start()
+        self.stdout.write(f'SMTP sink listening on 127.0.0.1:{sink.port}; point DJANGO_EMAIL_HOST/PORT at it')
+        try:
+            while True:
+                time.sleep(options['interval'])
+                self.stdout.write(f'{sink.messages} message(s) over {sink.connections} connection(s)')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sink.stop()
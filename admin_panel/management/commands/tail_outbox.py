@@ -0,0 +1,60 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from utils.constants import OUTBOX_PAGE_SIZE, OUTBOX_POLL_INTERVAL
+from utils.outbox import Outbox
+
+
+class Command(BaseCommand):
+    help = 'Print outbox events after a cursor as NDJSON, optionally following new events as they are committed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cursor', default='', help='Id of the last event already processed')
+        parser.add_argument('--cursor-file', help='Read the cursor from this file and store the next cursor back into it')
+        parser.add_argument('--output', help='Append NDJSON to this file instead of stdout')
+        parser.add_argument('--limit', type=int, default=OUTBOX_PAGE_SIZE, help='Events per read')
+        parser.add_argument('--model', action='append', dest='models',
+                            help='Only events for this model (e.g. emergencyrequest); repeatable')
+        parser.add_argument('--follow', action='store_true', help='Keep running and wait for new events')
+        parser.add_argument('--interval', type=float, default=OUTBOX_POLL_INTERVAL,
+                            help='Seconds to wait between polls once caught up (with --follow)')
+        parser.add_argument('--prune', type=int, metavar='DAYS', help='Also delete events older than DAYS')
+
+    def handle(self, *args, **options):
+        cursor = options['cursor']
+        cursor_file = options['cursor_file']
+        if cursor_file and not cursor and os.path.exists(cursor_file):
+            with open(cursor_file) as handle:
+                cursor = handle.read().strip()
+        try:
+            after = Outbox.parse_cursor(cursor)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['prune'] is not None:
+            Outbox.prune(options['prune'])
+
+        output = open(options['output'], 'a', encoding='utf-8') if options['output'] else self.stdout
+        total = 0
+        try:
+            while True:
+                records, after, has_more = Outbox.read(after, options['limit'], options['models'])
+                for line in Outbox.iter_ndjson(records):
+                    output.write(line)
+                output.flush()
+                total += len(records)
+                if records and cursor_file:
+                    with open(cursor_file, 'w') as handle:
+                        handle.write(str(after))
+                if has_more:
+                    continue
+                if not options['follow']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+        self.stderr.write(f'Read {total} event(s); next cursor: {after}')
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:35
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('export_type', models.CharField(choices=[('donors', 'Donors CSV'), ('donor_list', 'Donor List CSV'), ('donations', 'Donations CSV'), ('report', 'System Report')], max_length=20)),
+                ('parameters', models.JSONField(blank=True, default=dict)),
+                ('parameters_hash', models.CharField(help_text='Hash of export type and parameters, used for deduplication', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('expired', 'Expired')], default='pending', max_length=10)),
+                ('rows_total', models.PositiveIntegerField(default=0)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('file', models.FileField(blank=True, upload_to='exports/')),
+                ('file_size', models.PositiveBigIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['parameters_hash', 'status', '-created_at'], name='admin_panel_paramet_5894ef_idx'), models.Index(fields=['status', 'expires_at'], name='admin_panel_status_b00c3b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0002_exportjob'),
+        ('donor', '0007_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='systemnotification',
+            index=models.Index(fields=['is_active', 'target_audience', '-created_at'], name='admin_panel_is_acti_03ce78_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='admin_panel_user_id_5a36c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usernotification',
+            index=models.Index(fields=['user', 'title', 'notification_type', 'created_at'], name='admin_panel_user_id_6e130f_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usernotification',
+            name='admin_panel_user_id_6e130f_idx',
+        ),
+        migrations.AddField(
+            model_name='usernotification',
+            name='dedup_key',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True, unique=True),
+        ),
+    ]
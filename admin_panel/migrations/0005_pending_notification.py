@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0004_notification_dedup_key'),
+        ('donor', '0007_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('notification_type', models.CharField(choices=[('donation_scheduled', 'Donation Scheduled'), ('donation_reminder', 'Donation Reminder'), ('donation_completed', 'Donation Completed'), ('emergency_request', 'Emergency Blood Request'), ('eligibility_restored', 'Eligibility Restored'), ('profile_updated', 'Profile Updated'), ('location_updated', 'Location Updated'), ('health_metrics_added', 'Health Metrics Added'), ('request_approved', 'Request Approved'), ('request_rejected', 'Request Rejected')], max_length=30)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('action_url', models.URLField(blank=True)),
+                ('dedup_key', models.CharField(blank=True, editable=False, max_length=40, null=True, unique=True)),
+                ('related_donation_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='donor.donationrequest')),
+                ('related_emergency', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='donor.emergencyrequest')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['created_at'], name='admin_panel_created_4d94b4_idx'), models.Index(fields=['user', 'notification_type'], name='admin_panel_user_id_e6d93f_idx')],
+            },
+        ),
+    ]
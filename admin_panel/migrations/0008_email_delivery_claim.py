@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0007_channel_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emaildelivery',
+            name='claim_token',
+            field=models.CharField(blank=True, help_text='Identifies the dispatch that is sending this row', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='emaildelivery',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='emaildelivery',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='queued', max_length=10),
+        ),
+    ]
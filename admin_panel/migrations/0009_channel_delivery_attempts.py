@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0008_email_delivery_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channeldelivery',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fail_duplicate_in_flight_jobs(apps, schema_editor):
+    """Keep the newest pending/running job per export so the constraint can be added"""
+    ExportJob = apps.get_model('admin_panel', 'ExportJob')
+    seen = set()
+    duplicates = []
+    for job_id, parameters_hash in ExportJob.objects.filter(
+        status__in=['pending', 'running']
+    ).order_by('parameters_hash', '-created_at').values_list('id', 'parameters_hash'):
+        if parameters_hash in seen:
+            duplicates.append(job_id)
+        seen.add(parameters_hash)
+    ExportJob.objects.filter(id__in=duplicates).update(status='failed', error_message='Duplicate of a newer export job')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0009_channel_delivery_attempts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(fail_duplicate_in_flight_jobs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='exportjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'running'])), fields=('parameters_hash',), name='exportjob_one_in_flight'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -94,6 +95,9 @@ class SystemNotification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_active', 'target_audience', '-created_at']),
+        ]
 
 
 class UserNotification(models.Model):
@@ -123,11 +127,43 @@ class UserNotification(models.Model):
     related_donation_request = models.ForeignKey('donor.DonationRequest', on_delete=models.CASCADE, null=True, blank=True)
     related_emergency = models.ForeignKey('donor.EmergencyRequest', on_delete=models.CASCADE, null=True, blank=True)
 
+    # Hash of user, type, related object and time bucket; the unique index drops duplicate inserts
+    dedup_key = models.CharField(max_length=40, unique=True, null=True, blank=True, editable=False)
+
     def __str__(self):
         return f"{self.user.username}: {self.title}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Unread counts and per-user listings
+            models.Index(fields=['user', 'is_read', '-created_at']),
+        ]
+
+
+class PendingNotification(models.Model):
+    """User notification buffered for a digest, turned into a UserNotification when flushed"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='pending_notifications')
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=30, choices=UserNotification.NOTIFICATION_TYPES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    action_url = models.URLField(blank=True)
+    related_donation_request = models.ForeignKey('donor.DonationRequest', on_delete=models.CASCADE, null=True, blank=True)
+    related_emergency = models.ForeignKey('donor.EmergencyRequest', on_delete=models.CASCADE, null=True, blank=True)
+    # Same key the UserNotification would get, so duplicates are dropped before the digest too
+    dedup_key = models.CharField(max_length=40, unique=True, null=True, blank=True, editable=False)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.title} (pending)"
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Finding digests whose window has elapsed
+            models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'notification_type']),
+        ]
 
 
 class SystemNotificationRead(models.Model):
@@ -142,3 +178,140 @@ class SystemNotificationRead(models.Model):
 
     def __str__(self):
         return f"{self.user.username} read {self.system_notification.title}"
+
+
+class EmailBroadcast(models.Model):
+    """One email rendered once and sent to many recipients (e.g. an emergency alert)"""
+    key = models.CharField(max_length=100, unique=True, help_text="Identifies the event, e.g. emergency:42")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.key
+
+
+class EmailDelivery(models.Model):
+    """Delivery status of a broadcast for one recipient"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    broadcast = models.ForeignKey(EmailBroadcast, on_delete=models.CASCADE, related_name='deliveries')
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='email_deliveries')
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claim_token = models.CharField(max_length=32, blank=True, help_text="Identifies the dispatch that is sending this row")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.broadcast.key} -> {self.email}: {self.status}"
+
+    class Meta:
+        unique_together = ('broadcast', 'email')
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+
+class ChannelDelivery(models.Model):
+    """Delivery log for alerts sent through outbound gateways (SMS, webhooks)"""
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    channel = models.CharField(max_length=20)
+    alert_key = models.CharField(max_length=100, help_text="Identifies the alert, e.g. emergency:42")
+    recipient = models.CharField(max_length=255, help_text="Phone number or webhook URL")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='channel_deliveries')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.channel} {self.alert_key} -> {self.recipient}: {self.status}"
+
+    class Meta:
+        unique_together = ('channel', 'alert_key', 'recipient')
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+
+class ExportJob(models.Model):
+    """Background export request and its generated artifact"""
+    EXPORT_TYPES = [
+        ('donors', 'Donors CSV'),
+        ('donor_list', 'Donor List CSV'),
+        ('donations', 'Donations CSV'),
+        ('report', 'System Report'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+        ('expired', 'Expired'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    export_type = models.CharField(max_length=20, choices=EXPORT_TYPES)
+    parameters = models.JSONField(default=dict, blank=True)
+    parameters_hash = models.CharField(max_length=64, help_text="Hash of export type and parameters, used for deduplication")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to='exports/', blank=True)
+    file_size = models.PositiveBigIntegerField(default=0)
+    error_message = models.TextField(blank=True)
+    requested_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='export_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_export_type_display()} ({self.status})"
+
+    @property
+    def progress(self):
+        """Completion percentage"""
+        if self.status == 'completed':
+            return 100
+        if not self.rows_total:
+            return 0
+        return min(99, int(self.rows_written * 100 / self.rows_total))
+
+    @property
+    def is_expired(self):
+        if self.expires_at:
+            return timezone.now() > self.expires_at
+        return False
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['parameters_hash', 'status', '-created_at']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+        constraints = [
+            # At most one pending/running job per export, so simultaneous requests cannot start two workers
+            models.UniqueConstraint(
+                fields=['parameters_hash'], condition=models.Q(status__in=['pending', 'running']),
+                name='exportjob_one_in_flight',
+            ),
+        ]
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import SystemNotification
+from utils.cache_tags import TAG_SYSTEM_NOTIFICATIONS, TaggedCache
+
+
+@receiver([post_save, post_delete], sender=SystemNotification)
+def invalidate_system_notifications(sender, instance, **kwargs):
+    # Cached audience lists are rebuilt on the next dashboard load
+    TaggedCache.invalidate_tags(TAG_SYSTEM_NOTIFICATIONS)
@@ -27,6 +27,8 @@ urlpatterns = [
     path('emergencies/', views.manage_emergencies, name='manage_emergencies'),
     path('emergencies/create/', views.create_emergency_request, name='create_emergency_request'),
     path('emergencies/<int:emergency_id>/resolve/', views.resolve_emergency, name='resolve_emergency'),
+    path('emergencies/rebalancing/', views.inventory_rebalancing, name='inventory_rebalancing'),
+    path('api/rebalancing/', views.inventory_rebalancing_api, name='inventory_rebalancing_api'),
     path('inventory/update/', views.update_inventory, name='update_inventory'),
     path('my-hospital/', views.my_hospital, name='my_hospital'),
     path('donor-tracking/', views.donor_tracking, name='donor_tracking'),
@@ -41,6 +43,13 @@ urlpatterns = [
     path('export/donors/', views.export_donors, name='export_donors'),
     path('export/donations/', views.export_donations, name='export_donations'),
     path('export/reports/', views.export_reports, name='export_reports'),
+    path('export/jobs/<str:export_type>/', views.request_export_job, name='request_export_job'),
+    path('export/jobs/<uuid:job_id>/status/', views.export_job_status, name='export_job_status'),
+    path('export/jobs/<uuid:job_id>/download/', views.download_export_job, name='download_export_job'),
+    path('api/changes/', views.change_feed_api, name='change_feed_api'),
+    path('api/outbox/', views.outbox_api, name='outbox_api'),
+    path('api/slow-queries/', views.slow_queries_api, name='slow_queries_api'),
+    path('metrics/', views.metrics_endpoint, name='metrics'),
     path('notifications/', views.all_notifications, name='all_notifications'),
     path('notifications/mark-read/<int:notification_id>/', views.mark_notification_read, name='mark_notification_read'),
     path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
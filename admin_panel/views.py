@@ -8,11 +8,13 @@ from django.db.models import Sum, Count
 from datetime import timedelta, date, datetime
 import json
 import csv
+import os
 
 # Import my app models
 from donor.models import Donor, DonationRequest, DonationHistory, EmergencyRequest, Hospital
 from admin_panel.models import AdminProfile
 from utils.notification_service import NotificationService
+from utils.cache_tags import TAG_DONATION_REQUESTS, TAG_DONATIONS, TAG_DONORS, TAG_EMERGENCIES, TaggedCache
 
 @login_required
 def dashboard(request):
@@ -25,35 +27,31 @@ def dashboard(request):
     if request.user.is_superuser:
         return redirect('admin_panel:superadmin_dashboard')
     
-    # Count total donors in database
-    total_donors = Donor.objects.count()
-    
-    # Count total donations
-    total_donations = DonationHistory.objects.count()
-    
-    # Count pending donation requests
-    pending_requests = DonationRequest.objects.filter(status='pending').count()
-    
-    # Count active emergency requests
-    active_emergencies = EmergencyRequest.objects.filter(status='active').count()
-    
     # Get today's date
     today = date.today()
-    
-    # Filter donations made today
-    today_donations = DonationHistory.objects.filter(donation_date=today).count()
-    
-    # Filter requests created today
-    today_requests = DonationRequest.objects.filter(created_at__date=today).count()
-    
+
     # Calculate first day of current month
     month_start = today.replace(day=1)
-    
-    # Count donations this month
-    month_donations = DonationHistory.objects.filter(donation_date__gte=month_start).count()
-    
-    # Count new donors this month
-    month_new_donors = Donor.objects.filter(user__date_joined__date__gte=month_start).count()
+
+    # System-wide counters, cached until a donor, donation, request or emergency changes
+    def load_counts():
+        return {
+            'total_donors': Donor.objects.count(),
+            'total_donations': DonationHistory.objects.count(),
+            'pending_requests': DonationRequest.objects.filter(status='pending').count(),
+            'active_emergencies': EmergencyRequest.objects.filter(status='active').count(),
+            'today_donations': DonationHistory.objects.filter(donation_date=today).count(),
+            'today_requests': DonationRequest.objects.filter(created_at__date=today).count(),
+            'month_donations': DonationHistory.objects.filter(donation_date__gte=month_start).count(),
+            'month_new_donors': Donor.objects.filter(user__date_joined__date__gte=month_start).count(),
+            # Active donors donated in the last 90 days
+            'active_donors': Donor.objects.filter(last_donation_date__gte=today - timedelta(days=90)).count(),
+        }
+
+    counts = TaggedCache.get_or_set(
+        f'admin_dashboard_counts:{today.isoformat()}', load_counts,
+        [TAG_DONORS, TAG_DONATIONS, TAG_DONATION_REQUESTS, TAG_EMERGENCIES],
+    )
     
     # Create dictionary to store blood inventory
     from donor.models import BloodInventory, Hospital
@@ -68,73 +66,70 @@ def dashboard(request):
     except:
         admin_hospital = None
     
-    # Loop through each blood group and get inventory for admin's hospital
+    # Load inventory for all blood groups in one query instead of one per group
+    if admin_hospital:
+        units_by_group = dict(
+            BloodInventory.objects.filter(hospital=admin_hospital).values_list('blood_group', 'units_available')
+        )
+    else:
+        # Sum up inventory across all hospitals for system-wide view
+        units_by_group = dict(
+            BloodInventory.objects.values('blood_group').annotate(total=Sum('units_available')).values_list('blood_group', 'total')
+        )
+
     for blood_group in blood_groups_list:
-        if admin_hospital:
-            try:
-                # Get inventory for admin's specific hospital
-                inventory = BloodInventory.objects.get(
-                    blood_group=blood_group,
-                    hospital=admin_hospital
-                )
-                blood_inventory[blood_group] = int(inventory.units_available)
-            except BloodInventory.DoesNotExist:
-                # If not found, create new record for this hospital
-                BloodInventory.objects.create(
-                    blood_group=blood_group,
-                    hospital=admin_hospital,
-                    units_available=0,
-                    units_reserved=0,
-                    updated_by=request.user,
-                    notes='Created from dashboard'
-                )
-                blood_inventory[blood_group] = 0
-        else:
-            # Sum up inventory across all hospitals for system-wide view
-            total_units = BloodInventory.objects.filter(
-                blood_group=blood_group
-            ).aggregate(total=Sum('units_available'))['total'] or 0
-            blood_inventory[blood_group] = int(total_units)
+        if admin_hospital and blood_group not in units_by_group:
+            # If not found, create new record for this hospital
+            BloodInventory.objects.create(
+                blood_group=blood_group,
+                hospital=admin_hospital,
+                units_available=0,
+                units_reserved=0,
+                updated_by=request.user,
+                notes='Created from dashboard'
+            )
+        blood_inventory[blood_group] = int(units_by_group.get(blood_group) or 0)
     
     # Get recent donations (last 5)
-    recent_donations = DonationHistory.objects.all().order_by('-created_at')[:5]
+    recent_donations = DonationHistory.objects.select_related('donor__user', 'hospital').order_by('-created_at')[:5]
     
     # Get recent requests (last 5)
-    recent_requests = DonationRequest.objects.all().order_by('-created_at')[:5]
+    recent_requests = DonationRequest.objects.select_related('donor__user', 'hospital').order_by('-created_at')[:5]
     
     # Get pending approvals (maximum 10)
-    pending_approvals = DonationRequest.objects.filter(status='pending').order_by('requested_date')[:10]
+    pending_approvals = DonationRequest.objects.select_related('donor__user', 'hospital').filter(status='pending').order_by('requested_date')[:10]
     
     # Get urgent emergency requests
-    urgent_emergencies = EmergencyRequest.objects.filter(
+    urgent_emergencies = EmergencyRequest.objects.select_related('hospital').filter(
         status='active',
         urgency_level='high'
     ).order_by('required_by')[:5]
     
+    # Count donors and donations per blood group with one grouped query each
+    def load_group_counts():
+        donors_by_group = dict(Donor.objects.values('blood_group').annotate(total=Count('id')).values_list('blood_group', 'total'))
+        donations_by_group = dict(
+            DonationHistory.objects.values('donor__blood_group').annotate(total=Count('id')).values_list('donor__blood_group', 'total')
+        )
+        return donors_by_group, donations_by_group
+
+    donors_by_group, donations_by_group = TaggedCache.get_or_set(
+        'admin_dashboard_blood_groups', load_group_counts, [TAG_DONORS, TAG_DONATIONS]
+    )
+
     # Create list to store blood group statistics
     blood_group_stats = []
     for blood_group in blood_groups_list:
-        # Count donors for this blood group
-        donor_count = Donor.objects.filter(blood_group=blood_group).count()
-        
-        # Count donations for this blood group
-        donation_count = DonationHistory.objects.filter(donor__blood_group=blood_group).count()
-        
-        # Add to statistics list
         blood_group_stats.append({
             'blood_group': blood_group,
-            'donors': donor_count,
-            'donations': donation_count,
+            'donors': donors_by_group.get(blood_group, 0),
+            'donations': donations_by_group.get(blood_group, 0),
             'inventory': blood_inventory.get(blood_group, 0)
         })
     
     # Get admin notifications
     admin_notifications = NotificationService.get_system_notifications('admins', user=request.user)[:5]
 
-    # Calculate active donors (donated in last 90 days)
-    ninety_days_ago = today - timedelta(days=90)
-    active_donors = Donor.objects.filter(last_donation_date__gte=ninety_days_ago).count()
-
     # Add pending users count for superadmin
     pending_users_count = 0
     if request.user.is_superuser:
@@ -143,15 +138,7 @@ def dashboard(request):
 
     # Create context dictionary with all data for template
     context = {
-        'total_donors': total_donors,
-        'active_donors': active_donors,
-        'total_donations': total_donations,
-        'pending_requests': pending_requests,
-        'active_emergencies': active_emergencies,
-        'today_donations': today_donations,
-        'today_requests': today_requests,
-        'month_donations': month_donations,
-        'month_new_donors': month_new_donors,
+        **counts,
         'blood_inventory': blood_inventory,
         'recent_donations': recent_donations,
         'recent_requests': recent_requests,
@@ -324,7 +311,7 @@ def mark_donation_completed(request, request_id):
             donation_request = get_object_or_404(DonationRequest, id=request_id)
 
             units_collected = request.POST.get('units_collected', '1')
-            donation_center_name = request.POST.get('donation_center_name', 'Main Center')
+            donation_center_name = request.POST.get('donation_center_name', '').strip()
             notes = request.POST.get('notes', '')
 
             # Mark request as completed
@@ -332,11 +319,14 @@ def mark_donation_completed(request, request_id):
             donation_request.completed_at = timezone.now()
             donation_request.save()
 
-            # Create donation history record
+            # Create donation history record linked to the hospital that collected it
+            from utils.hospital_matcher import resolve_donation_hospital
+            hospital = resolve_donation_hospital(donation_request, request.user, donation_center_name)
             DonationHistory.objects.create(
                 donor=donation_request.donor,
                 donation_date=donation_request.requested_date,
-                donation_center_name=donation_center_name,
+                hospital=hospital,
+                donation_center_name=hospital.name if hospital else (donation_center_name or 'Main Center'),
                 units_donated=float(units_collected),
                 notes=notes
             )
@@ -406,7 +396,7 @@ def donor_tracking(request):
         return redirect('donor:donor_dashboard')
     
     # Get all donors from database
-    donors = Donor.objects.all().order_by('-user__date_joined')
+    donors = Donor.objects.select_related('user').order_by('-user__date_joined')
 
     # Check if there's a search query
     search_query = request.GET.get('search', '')
@@ -440,16 +430,16 @@ def donor_tracking(request):
         ninety_days_ago = date.today() - timedelta(days=90)
         donors = donors.filter(last_donation_date__gt=ninety_days_ago)
 
-    # Check eligibility for each donor
-    for donor in donors:
-        donor.is_eligible, _ = donor.can_donate()
-
     # Pagination - show 20 donors per page
     from django.core.paginator import Paginator
     paginator = Paginator(donors, 20)
     page_number = request.GET.get('page')
     donors = paginator.get_page(page_number)
 
+    # Check eligibility for the donors on this page only
+    for donor in donors:
+        donor.is_eligible, _ = donor.can_donate()
+
     # Calculate statistics for dashboard
     total_donors = Donor.objects.count()
     
@@ -735,7 +725,7 @@ def location_search_by_name(request):
 
 def manage_requests(request):
     """Manage donation requests"""
-    donation_requests = DonationRequest.objects.select_related('donor__user').order_by('-created_at')
+    donation_requests = DonationRequest.objects.select_related('donor__user', 'hospital').order_by('-created_at')
     
     # Filter by status
     status_filter = request.GET.get('status', '')
@@ -789,14 +779,17 @@ def complete_donation_request(request, request_id):
         donor.last_donation_date = donation_request.requested_date
         donor.save()
         
-        # Create donation history record
+        # Create donation history record linked to the hospital that collected it
         try:
+            from utils.hospital_matcher import resolve_donation_hospital
+            hospital = resolve_donation_hospital(donation_request, request.user)
             history = DonationHistory.objects.create(
                 donor=donor,
                 donation_date=donation_request.requested_date,
-                donation_center_name=f"Scheduled Appointment at {donation_request.preferred_time}",
+                hospital=hospital,
+                donation_center_name=hospital.name if hospital else '',
                 units_donated=1,
-                notes=f"Completed from request #{donation_request.id}. Appointment was scheduled and confirmed."
+                notes=f"Completed from request #{donation_request.id}. Appointment at {donation_request.preferred_time} was scheduled and confirmed."
             )
             print(f"✓ DonationHistory created successfully: {history.id}")
         except Exception as hist_error:
@@ -917,6 +910,47 @@ def manage_emergencies(request):
     return render(request, 'admin_panel/manage_emergencies.html', context)
 
 
+@login_required
+
+def inventory_rebalancing(request):
+    """Suggest blood transfers between hospitals to cover active emergencies"""
+    if not request.user.is_staff:
+        messages.error(request, 'Only admins can view inventory rebalancing.')
+        return redirect('donor:donor_dashboard')
+
+    from utils.inventory_rebalancer import inventory_rebalancer
+    result = inventory_rebalancer.suggest_transfers()
+
+    context = {
+        'transfers': result['transfers'],
+        'unmet': result['unmet'],
+        'total_units_moved': result['total_units_moved'],
+        'total_units_unmet': result['total_units_unmet'],
+        'safety_stock': inventory_rebalancer.safety_stock,
+        'max_distance_km': inventory_rebalancer.max_distance_km,
+    }
+    return render(request, 'admin_panel/inventory_rebalancing.html', context)
+
+
+@login_required
+
+def inventory_rebalancing_api(request):
+    """API endpoint returning transfer suggestions as JSON"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
+
+    from utils.inventory_rebalancer import inventory_rebalancer
+    result = inventory_rebalancer.suggest_transfers()
+
+    return JsonResponse({
+        'success': True,
+        'transfers': result['transfers'],
+        'unmet': result['unmet'],
+        'total_units_moved': result['total_units_moved'],
+        'total_units_unmet': result['total_units_unmet'],
+    })
+
+
 @login_required
 
 def edit_admin_profile(request):
@@ -1249,31 +1283,25 @@ def reports(request):
         start_date = start_date_obj.strftime('%Y-%m-%d')
         end_date = end_date_obj.strftime('%Y-%m-%d')
     
+    # All donation and registration figures are summed from the daily rollup
+    from utils.donation_rollup import DonationRollup
+
+    current_month = timezone.now().date().replace(day=1)
+    last_month = (current_month - timedelta(days=1)).replace(day=1)
+    current_year = timezone.now().date().replace(month=1, day=1)
+    totals = DonationRollup.donation_totals(start_date_obj, end_date_obj, current_month, last_month, current_year)
+
     # Basic statistics
-    total_donors = Donor.objects.count()
-    total_donations = DonationHistory.objects.filter(
-        donation_date__range=[start_date_obj, end_date_obj]
-    ).count()
+    total_donors = totals['total_donors']
+    total_donations = totals['range_donations']
     active_donors = Donor.objects.filter(
         last_donation_date__gte=timezone.now().date() - timedelta(days=90)
     ).count()
     
-    # Monthly statistics
-    current_month = timezone.now().date().replace(day=1)
-    monthly_donations = DonationHistory.objects.filter(
-        donation_date__gte=current_month
-    ).count()
-    
-    last_month = (current_month - timedelta(days=1)).replace(day=1)
-    last_month_donations = DonationHistory.objects.filter(
-        donation_date__range=[last_month, current_month - timedelta(days=1)]
-    ).count()
-    
-    # Yearly statistics
-    current_year = timezone.now().date().replace(month=1, day=1)
-    yearly_donations = DonationHistory.objects.filter(
-        donation_date__gte=current_year
-    ).count()
+    # Monthly and yearly statistics
+    monthly_donations = totals['monthly_donations']
+    last_month_donations = totals['last_month_donations']
+    yearly_donations = totals['yearly_donations']
     
     # Calculate monthly average
     months_in_year = timezone.now().month
@@ -1282,8 +1310,9 @@ def reports(request):
     # Blood group distribution
     blood_group_stats = {}
     max_count = 0
+    donors_by_group = DonationRollup.donors_by_blood_group()
     for blood_group, _ in Donor.BLOOD_GROUPS:
-        count = Donor.objects.filter(blood_group=blood_group).count()
+        count = donors_by_group.get(blood_group, 0)
         blood_group_stats[blood_group.replace('+', '_positive').replace('-', '_negative')] = count
         if count > max_count:
             max_count = count
@@ -1291,46 +1320,18 @@ def reports(request):
     # Location distribution
     location_stats = {}
     max_location_count = 0
-    city_counts = Donor.objects.exclude(city='').values('city').annotate(
-        count=Count('id')
-    ).order_by('-count')[:10]
-    
-    for item in city_counts:
+    for item in DonationRollup.donors_by_city(limit=10):
         location_stats[item['city']] = item['count']
         if item['count'] > max_location_count:
             max_location_count = item['count']
     
-    # Donation centers performance (mock data since we don't have actual center tracking)
+    # Donation centers performance
     center_stats = {}
     max_center_count = 0
-    
-    # Get donation centers from DonationHistory if available
-    try:
-        from donor.models import DonationCenter
-        centers = DonationCenter.objects.all()
-        for center in centers:
-            # Count donations for this center (using center name matching)
-            count = DonationHistory.objects.filter(
-                donation_center_name__icontains=center.name,
-                donation_date__range=[start_date_obj, end_date_obj]
-            ).count()
-            if count > 0:
-                center_stats[center.name] = count
-                if count > max_center_count:
-                    max_center_count = count
-    except:
-        # Fallback to generic center data
-        center_donations = DonationHistory.objects.filter(
-            donation_date__range=[start_date_obj, end_date_obj]
-        ).values('donation_center_name').annotate(
-            count=Count('id')
-        ).order_by('-count')[:5]
-        
-        for item in center_donations:
-            if item['donation_center_name']:
-                center_stats[item['donation_center_name']] = item['count']
-                if item['count'] > max_center_count:
-                    max_center_count = item['count']
+    for item in DonationRollup.donations_by_center(start_date_obj, end_date_obj, limit=5):
+        center_stats[item['label']] = item['count']
+        if item['count'] > max_center_count:
+            max_center_count = item['count']
     
     context = {
         'start_date': start_date,
@@ -1356,238 +1357,210 @@ def reports(request):
 @login_required
 
 def export_donors(request):
-    """Export donors data to CSV with filter support"""
-    import csv
-    from django.http import HttpResponse
-    from datetime import datetime
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="donors_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Name', 'Email', 'Phone', 'Blood Group', 'City', 'State',
-        'Date of Birth', 'Weight (kg)', 'Registration Date', 'Last Donation', 
-        'Total Donations', 'Emergency Contact', 'Eligibility Status'
-    ])
-    
-    donors = Donor.objects.select_related('user').annotate(
-        donation_count=Count('donationhistory')
-    )
-    
-    # Apply filters from query parameters
-    search_query = request.GET.get('search', '')
-    if search_query:
-        donors = donors.filter(
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(user__username__icontains=search_query) |
-            Q(user__email__icontains=search_query) |
-            Q(blood_group__icontains=search_query) |
-            Q(city__icontains=search_query) |
-            Q(phone_number__icontains=search_query)
-        )
-    
-    blood_group_filter = request.GET.get('blood_group', '')
-    if blood_group_filter:
-        donors = donors.filter(blood_group=blood_group_filter)
-    
-    city_filter = request.GET.get('city', '')
-    if city_filter:
-        donors = donors.filter(city__icontains=city_filter)
-    
-    donors = donors.order_by('id')
-    
-    for donor in donors:
-        eligible, message = donor.can_donate()
-        writer.writerow([
-            donor.id,
-            donor.name or donor.user.get_full_name() or donor.user.username,
-            donor.user.email,
-            donor.phone_number or 'N/A',
-            donor.blood_group,
-            donor.city or 'N/A',
-            donor.state or 'N/A',
-            donor.date_of_birth.strftime('%Y-%m-%d') if donor.date_of_birth else 'N/A',
-            donor.weight if donor.weight else 'N/A',
-            donor.created_at.strftime('%Y-%m-%d') if donor.created_at else 'N/A',
-            donor.last_donation_date.strftime('%Y-%m-%d') if donor.last_donation_date else 'Never',
-            donor.donation_count,
-            'Yes' if donor.allow_emergency_contact else 'No',
-            'Eligible' if eligible else f'Not Eligible - {message}'
-        ])
-    
-    return response
+    """Export donors data to CSV with filter support (streamed)"""
+    from utils.csv_export import stream_csv_response, wants_gzip
+    from admin_panel.exports import DONOR_EXPORT_HEADER, donor_export_queryset, donor_export_rows
+
+    rows = donor_export_rows(donor_export_queryset(request.GET))
+    filename = f'donors_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    return stream_csv_response(filename, DONOR_EXPORT_HEADER, rows, use_gzip=wants_gzip(request))
 
 
 
 @login_required
 
 def export_donations(request):
-    """Export donations data to CSV"""
-    import csv
-    from django.http import HttpResponse
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="donations_export.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([
-        'ID', 'Donor Name', 'Donor Email', 'Blood Group', 'Donation Date',
-        'Center Name', 'Units Donated', 'Notes'
-    ])
-    
-    donations = DonationHistory.objects.select_related(
-        'donor__user'
-    ).order_by('-donation_date')
-    
-    for donation in donations:
-        writer.writerow([
-            donation.id,
-            donation.donor.name,
-            donation.donor.user.email,
-            donation.donor.blood_group,
-            donation.donation_date.strftime('%Y-%m-%d'),
-            donation.donation_center_name,
-            donation.units_donated,
-            donation.notes
-        ])
-    
-    return response
+    """Export donations data to CSV (streamed)"""
+    from utils.csv_export import stream_csv_response, wants_gzip
+    from admin_panel.exports import DONATION_EXPORT_HEADER, donation_export_queryset, donation_export_rows
+
+    rows = donation_export_rows(donation_export_queryset(request.GET))
+    return stream_csv_response('donations_export', DONATION_EXPORT_HEADER, rows, use_gzip=wants_gzip(request))
 
 
 @login_required
 
 def export_reports(request):
-    """Export comprehensive report to PDF"""
-    from django.http import HttpResponse
-    from django.template.loader import render_to_string
-    import io
-    
+    """Export comprehensive report to PDF (plain text if reportlab is unavailable)"""
+    from django.http import FileResponse
+    from utils.report_cache import ReportCache
+
+    # Served from the pre-rendered copy unless donor or donation data changed since it was built
+    path, content_type, extension = ReportCache.get_report()
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=f'blood_donation_report.{extension}',
+        content_type=content_type,
+    )
+
+
+def _export_job_payload(job):
+    """JSON representation of an export job for polling clients"""
+    from django.urls import reverse
+
+    payload = {
+        'job_id': str(job.id),
+        'export_type': job.export_type,
+        'status': job.status,
+        'progress': job.progress,
+        'rows_total': job.rows_total,
+        'rows_written': job.rows_written,
+        'created_at': job.created_at.isoformat(),
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'error': job.error_message or None,
+    }
+    if job.status == 'completed':
+        payload['download_url'] = reverse('admin_panel:download_export_job', args=[job.id])
+        payload['file_size'] = job.file_size
+    return payload
+
+
+@login_required
+def request_export_job(request, export_type):
+    """Queue a background export and return its job id"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
+
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+
+    from admin_panel.models import ExportJob
+    from utils.export_jobs import ExportJobService
+
+    if export_type not in dict(ExportJob.EXPORT_TYPES):
+        return JsonResponse({'success': False, 'error': 'Unknown export type'}, status=400)
+
+    params = request.POST if request.POST else request.GET
+    job, created = ExportJobService.request_export(export_type, params, request.user)
+    return JsonResponse({'success': True, 'created': created, **_export_job_payload(job)}, status=202 if created else 200)
+
+
+@login_required
+def export_job_status(request, job_id):
+    """Poll the progress of a background export"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
+
+    from admin_panel.models import ExportJob
+
+    job = get_object_or_404(ExportJob, id=job_id)
+    return JsonResponse({'success': True, **_export_job_payload(job)})
+
+
+@login_required
+def download_export_job(request, job_id):
+    """Download the finished file of a background export"""
+    if not request.user.is_staff:
+        messages.error(request, 'You must be an admin to access this page.')
+        return redirect('donor:donor_dashboard')
+
+    from django.http import FileResponse, Http404
+    from admin_panel.models import ExportJob
+
+    job = get_object_or_404(ExportJob, id=job_id)
+    if job.status != 'completed' or job.is_expired or not job.file:
+        raise Http404('Export is not available for download')
+
     try:
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.lib.styles import getSampleStyleSheet
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib import colors
-        from reportlab.lib.units import inch
-        
-        # Create the HttpResponse object with PDF headers
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="blood_donation_report.pdf"'
-        
-        # Create the PDF object
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        
-        # Container for the 'Flowable' objects
-        elements = []
-        
-        # Get styles
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        heading_style = styles['Heading2']
-        normal_style = styles['Normal']
-        
-        # Title
-        title = Paragraph("Blood Donation System - Comprehensive Report", title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        # Generate date
-        from datetime import datetime
-        date_para = Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", normal_style)
-        elements.append(date_para)
-        elements.append(Spacer(1, 12))
-        
-        # Statistics
-        stats_heading = Paragraph("System Statistics", heading_style)
-        elements.append(stats_heading)
-        
-        total_donors = Donor.objects.count()
-        total_donations = DonationHistory.objects.count()
-        active_donors = Donor.objects.filter(
-            last_donation_date__gte=timezone.now().date() - timedelta(days=90)
-        ).count()
-        
-        stats_data = [
-            ['Metric', 'Value'],
-            ['Total Donors', str(total_donors)],
-            ['Total Donations', str(total_donations)],
-            ['Active Donors (Last 90 days)', str(active_donors)],
-        ]
-        
-        stats_table = Table(stats_data)
-        stats_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(stats_table)
-        elements.append(Spacer(1, 12))
-        
-        # Blood Group Distribution
-        bg_heading = Paragraph("Blood Group Distribution", heading_style)
-        elements.append(bg_heading)
-        
-        bg_data = [['Blood Group', 'Number of Donors']]
-        for blood_group, _ in Donor.BLOOD_GROUPS:
-            count = Donor.objects.filter(blood_group=blood_group).count()
-            bg_data.append([blood_group, str(count)])
-        
-        bg_table = Table(bg_data)
-        bg_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        elements.append(bg_table)
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Get the value of the BytesIO buffer and write it to the response
-        pdf = buffer.getvalue()
-        buffer.close()
-        response.write(pdf)
-        
-        return response
-        
-    except ImportError:
-        # Fallback to simple text response if reportlab is not available
-        response = HttpResponse(content_type='text/plain')
-        response['Content-Disposition'] = 'attachment; filename="blood_donation_report.txt"'
-        
-        report_content = f"""
-BLOOD DONATION SYSTEM - COMPREHENSIVE REPORT
-Generated on: {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}
+        handle = job.file.open('rb')
+    except FileNotFoundError:
+        raise Http404('Export file no longer exists')
 
-SYSTEM STATISTICS:
-- Total Donors: {Donor.objects.count()}
-- Total Donations: {DonationHistory.objects.count()}
-- Active Donors (Last 90 days): {Donor.objects.filter(last_donation_date__gte=timezone.now().date() - timedelta(days=90)).count()}
+    return FileResponse(handle, as_attachment=True, filename=os.path.basename(job.file.name))
 
-BLOOD GROUP DISTRIBUTION:
-"""
-        
-        for blood_group, _ in Donor.BLOOD_GROUPS:
-            count = Donor.objects.filter(blood_group=blood_group).count()
-            report_content += f"- {blood_group}: {count} donors\n"
-        
-        response.write(report_content)
-        return response
+
+@login_required
+def change_feed_api(request):
+    """NDJSON page of rows changed since the given cursor, for downstream sync"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
+
+    from utils.change_feed import ChangeFeed
+    from utils.constants import CHANGE_FEED_PAGE_SIZE, CHANGE_FEED_MAX_PAGE_SIZE
+
+    try:
+        limit = int(request.GET.get('limit', CHANGE_FEED_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit must be an integer'}, status=400)
+    limit = max(1, min(limit, CHANGE_FEED_MAX_PAGE_SIZE))
+
+    try:
+        records, next_cursor, has_more = ChangeFeed.get_page(request.GET.get('cursor'), limit)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    response = HttpResponse(''.join(ChangeFeed.iter_ndjson(records)), content_type='application/x-ndjson')
+    response['X-Next-Cursor'] = next_cursor
+    response['X-Has-More'] = 'true' if has_more else 'false'
+    response['X-Record-Count'] = str(len(records))
+    return response
+
+
+@login_required
+def outbox_api(request):
+    """NDJSON page of outbox events after the given cursor, for integrations following changes"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
+
+    from utils.constants import OUTBOX_MAX_PAGE_SIZE, OUTBOX_PAGE_SIZE
+    from utils.outbox import Outbox
+
+    try:
+        limit = int(request.GET.get('limit', OUTBOX_PAGE_SIZE))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit must be an integer'}, status=400)
+    limit = max(1, min(limit, OUTBOX_MAX_PAGE_SIZE))
+
+    try:
+        after = Outbox.parse_cursor(request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    records, next_cursor, has_more = Outbox.read(after, limit, request.GET.getlist('model'))
+    response = HttpResponse(''.join(Outbox.iter_ndjson(records)), content_type='application/x-ndjson')
+    response['X-Next-Cursor'] = str(next_cursor)
+    response['X-Has-More'] = 'true' if has_more else 'false'
+    response['X-Record-Count'] = str(len(records))
+    return response
+
+
+@login_required
+def slow_queries_api(request):
+    """Most recent slow queries recorded by this process (JSON)"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Admin access required'}, status=403)
+
+    from utils.slow_queries import get_recorder
+
+    recorder = get_recorder()
+    if recorder is None:
+        return JsonResponse({'success': False, 'error': 'Slow query log is disabled'}, status=404)
+
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 50)), 500))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'limit must be an integer'}, status=400)
+    return JsonResponse({'success': True, 'threshold_ms': recorder.threshold * 1000, 'queries': recorder.recent(limit)})
+
+
+def metrics_endpoint(request):
+    """Prometheus text scrape of the metrics registry (staff session or bearer token)"""
+    import hmac
+    from django.conf import settings
+    from utils.metrics import registry
+
+    config = getattr(settings, 'METRICS', {})
+    if not config.get('ENABLED'):
+        return HttpResponse('Metrics are disabled\n', status=404, content_type='text/plain')
+
+    token = config.get('TOKEN', '')
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    token_ok = bool(token) and hmac.compare_digest(auth_header, f'Bearer {token}')
+    if not token_ok and not (request.user.is_authenticated and request.user.is_staff):
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+
+    return HttpResponse(registry.render_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 
@@ -1772,7 +1745,7 @@ def mark_notification_read(request, notification_id):
     """Mark a specific notification as read"""
     if request.method == 'POST':
         try:
-            NotificationService.mark_notification_read(request.user, notification_id)
+            NotificationService.mark_notification_read(notification_id, request.user)
             return JsonResponse({'success': True})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -1795,66 +1768,11 @@ def mark_all_notifications_read(request):
 @login_required
 
 def export_donors_csv(request):
-    """Export donor list to CSV file"""
-    from django.http import HttpResponse
-    from django.db.models import Count, Q
-    from datetime import datetime
-    
-    # Get the same filtered donors as in donor_tracking view
-    donors = Donor.objects.select_related('user').annotate(
-        donation_count=Count('donationhistory')
-    )
-    
-    # Apply filters if present
-    search_query = request.GET.get('search', '')
-    if search_query:
-        donors = donors.filter(
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(user__username__icontains=search_query) |
-            Q(user__email__icontains=search_query) |
-            Q(blood_group__icontains=search_query) |
-            Q(city__icontains=search_query) |
-            Q(phone_number__icontains=search_query)
-        )
-    
-    blood_group_filter = request.GET.get('blood_group', '')
-    if blood_group_filter:
-        donors = donors.filter(blood_group=blood_group_filter)
-    
-    city_filter = request.GET.get('city', '')
-    if city_filter:
-        donors = donors.filter(city__icontains=city_filter)
-    
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="donors_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-    
-    writer = csv.writer(response)
-    # Write header
-    writer.writerow([
-        'ID', 'Name', 'Email', 'Phone', 'Blood Group', 
-        'City', 'State', 'Date of Birth', 'Weight (kg)', 
-        'Last Donation', 'Total Donations', 'Emergency Contact'
-    ])
-    
-    # Write data
-    for donor in donors:
-        eligible, _ = donor.can_donate()
-        writer.writerow([
-            donor.id,
-            donor.user.get_full_name() or donor.user.username,
-            donor.user.email,
-            donor.phone_number or 'N/A',
-            donor.blood_group,
-            donor.city or 'N/A',
-            donor.state or 'N/A',
-            donor.date_of_birth.strftime('%Y-%m-%d') if donor.date_of_birth else 'N/A',
-            donor.weight if donor.weight else 'N/A',
-            donor.last_donation_date.strftime('%Y-%m-%d') if donor.last_donation_date else 'Never',
-            donor.donation_count,
-            'Yes' if donor.allow_emergency_contact else 'No'
-        ])
-    
-    return response
+    """Export donor list to CSV file (streamed)"""
+    from utils.csv_export import stream_csv_response, wants_gzip
+    from admin_panel.exports import DONOR_LIST_EXPORT_HEADER, donor_list_export_queryset, donor_list_export_rows
 
+    # Get the same filtered donors as in donor_tracking view
+    rows = donor_list_export_rows(donor_list_export_queryset(request.GET))
+    filename = f'donors_export_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    return stream_csv_response(filename, DONOR_LIST_EXPORT_HEADER, rows, use_gzip=wants_gzip(request))
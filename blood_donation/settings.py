@@ -50,6 +50,9 @@ ADMIN_SITE_TITLE = 'Blood Donation Admin'
 ADMIN_INDEX_TITLE = 'Blood Donation Administration'
 
 MIDDLEWARE = [
+    'donor.middleware.RequestProfilingMiddleware',  # No-op unless REQUEST_PROFILING['ENABLED']
+    'donor.middleware.NPlusOneDetectionMiddleware',  # No-op unless N_PLUS_ONE_DETECTION['ENABLED']
+    'donor.middleware.MetricsMiddleware',  # No-op unless METRICS['ENABLED']
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,10 +63,88 @@ MIDDLEWARE = [
     'donor.middleware.DashboardCacheMiddleware',
 ]
 
+# Request profiling (Server-Timing headers, structured logs, sampled cProfile dumps)
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('DJANGO_REQUEST_PROFILING', 'False') == 'True',
+    'SERVER_TIMING': True,
+    'LOG': True,
+    'CPROFILE_SAMPLE_RATE': float(os.environ.get('DJANGO_PROFILING_SAMPLE_RATE', '0')),  # 0.0 - 1.0
+    'CPROFILE_THRESHOLD_MS': int(os.environ.get('DJANGO_PROFILING_THRESHOLD_MS', '500')),
+    'CPROFILE_DIR': BASE_DIR / 'profiles',
+}
+
+# N+1 query detection; the test runner (TEST_RUNNER) turns it on in strict mode so regressions fail the suite
+N_PLUS_ONE_DETECTION = {
+    'ENABLED': os.environ.get('DJANGO_N_PLUS_ONE_DETECTION', 'False') == 'True',
+    'STRICT': os.environ.get('DJANGO_N_PLUS_ONE_STRICT', 'False') == 'True',
+    'THRESHOLD': int(os.environ.get('DJANGO_N_PLUS_ONE_THRESHOLD', '5')),  # same query shape from one call site
+}
+
+# Metrics registry scraped at /admin-panel/metrics/ (staff session or "Authorization: Bearer <TOKEN>"), opt-in
+# because it wraps cache lookups and template rendering in every worker
+METRICS = {
+    'ENABLED': os.environ.get('DJANGO_METRICS', 'False') == 'True',
+    'TOKEN': os.environ.get('DJANGO_METRICS_TOKEN', ''),
+    # Shared directory for per-process snapshots; needed with several workers (e.g. gunicorn -w 4), otherwise
+    # each scrape reports only the worker that answered it
+    'MULTIPROCESS_DIR': os.environ.get('DJANGO_METRICS_DIR', ''),
+    'FLUSH_INTERVAL': 5,  # seconds between snapshot writes per process
+}
+
+# Slow query log (opt-in): queries above THRESHOLD_MS are kept in a ring buffer and written to slow_queries.log
+# with their call site and query plan (summarize with `manage.py slow_query_report`). Parameters hold donor
+# contact and medical data, so they are logged as type placeholders unless LOG_PARAMS is set.
+SLOW_QUERY_LOG = {
+    'ENABLED': os.environ.get('DJANGO_SLOW_QUERY_LOG', 'False') == 'True',
+    'THRESHOLD_MS': int(os.environ.get('DJANGO_SLOW_QUERY_MS', '200')),
+    'LOG_PARAMS': os.environ.get('DJANGO_SLOW_QUERY_LOG_PARAMS', 'False') == 'True',
+    'EXPLAIN': True,
+    'BUFFER_SIZE': 200,
+    'LOG_FILE': BASE_DIR / 'slow_queries.log',
+}
+
+# Notification digests: notifications of these types are buffered per user and merged into one
+# notification per type once the first has waited WINDOW_SECONDS (flush with `manage.py flush_notification_digests`)
+NOTIFICATION_DIGEST = {
+    'ENABLED': os.environ.get('DJANGO_NOTIFICATION_DIGEST', 'False') == 'True',
+    'WINDOW_SECONDS': int(os.environ.get('DJANGO_NOTIFICATION_DIGEST_WINDOW', '300')),
+    'TYPES': [
+        'emergency_request', 'request_approved', 'donation_scheduled', 'profile_updated',
+        'location_updated', 'health_metrics_added',
+    ],
+}
+
+# Outbound channels for emergency alerts; BACKEND may point at any NotificationChannel subclass
+NOTIFICATION_CHANNELS = {
+    'in_app': {'BACKEND': 'utils.notification_channels.InAppChannel'},
+    'email': {'BACKEND': 'utils.notification_channels.EmailChannel'},  # enabled by DJANGO_EMAIL_NOTIFICATIONS
+    'sms': {
+        'BACKEND': 'utils.notification_channels.SmsGatewayChannel',
+        'ENABLED': bool(os.environ.get('DJANGO_SMS_GATEWAY_URL')),
+        'URL': os.environ.get('DJANGO_SMS_GATEWAY_URL', ''),
+        'TOKEN': os.environ.get('DJANGO_SMS_GATEWAY_TOKEN', ''),
+        'BATCH_SIZE': int(os.environ.get('DJANGO_SMS_BATCH_SIZE', '100')),  # 1 for gateways without bulk sends
+        'CONCURRENCY': 4,
+        'TIMEOUT': 10,
+    },
+    'webhook': {
+        'BACKEND': 'utils.notification_channels.WebhookChannel',
+        'ENABLED': bool(os.environ.get('DJANGO_ALERT_WEBHOOK_URLS')),
+        'URLS': [url for url in os.environ.get('DJANGO_ALERT_WEBHOOK_URLS', '').split(',') if url],
+        'SECRET': os.environ.get('DJANGO_ALERT_WEBHOOK_SECRET', ''),  # signs the body (X-Signature: sha256=...)
+        'CONCURRENCY': 2,
+        'TIMEOUT': 10,
+    },
+}
+
 # Session settings
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # Using database-backed sessions
+SESSION_ENGINE = 'utils.sessions'  # Cache-first, database-backed sessions with coalesced writes
 SESSION_COOKIE_AGE = 86400  # 24 hours in seconds
-SESSION_SAVE_EVERY_REQUEST = True
+# Expiry still slides, but DashboardCacheMiddleware only refreshes it once SESSION_REFRESH_FRACTION
+# of the age has passed, and the database row is rewritten every SESSION_DB_SYNC_FRACTION or on real changes
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_FRACTION = 0.1
+SESSION_DB_SYNC_FRACTION = 0.5
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
 SESSION_COOKIE_SECURE = not DEBUG  # True in production with HTTPS
 SESSION_COOKIE_HTTPONLY = True
@@ -77,11 +158,19 @@ CSRF_COOKIE_SAMESITE = 'Lax'
 CSRF_TRUSTED_ORIGINS = ['http://127.0.0.1:8000', 'http://localhost:8000']
 
 # Cache settings for sessions
+# Two-tier cache: per-process LRU (L1) over a SQLite file shared by all workers on the host (L2),
+# so invalidations and geocoding results are seen by every worker, not just the one that made them
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'utils.tiered_cache.TieredCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_PATH', str(BASE_DIR / 'cache' / 'shared_cache.sqlite3')),
         'TIMEOUT': 86400,  # 24 hours
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TTL': 60,  # Upper bound on how stale a local copy can get
+            'SYNC_INTERVAL': 0.5,  # Seconds between polls of the shared invalidation log
+        },
     }
 }
 
@@ -163,13 +252,25 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Tests get their own cache file and media directory, and strict N+1 detection
+TEST_RUNNER = 'utils.test_runner.StrictTestRunner'
+
 # Authentication settings
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'donor:donor_dashboard'
 LOGOUT_REDIRECT_URL = 'accounts:login'
 
 # Email configuration
-EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+EMAIL_BACKEND = os.environ.get('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('DJANGO_EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('DJANGO_EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.environ.get('DJANGO_EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('DJANGO_EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('DJANGO_EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = 30
+SITE_URL = os.environ.get('DJANGO_SITE_URL', 'http://localhost:8000')  # Base for links in emails
+# Email emergency alerts to compatible donors (rendered once, sent in pooled batches by worker threads)
+EMAIL_NOTIFICATIONS = os.environ.get('DJANGO_EMAIL_NOTIFICATIONS', 'False') == 'True'
 DEFAULT_FROM_EMAIL = 'Blood Donation System <noreply@blooddonation.np>'
 EMAIL_SUBJECT_PREFIX = '[Blood Donation] '
 
@@ -186,6 +287,10 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'message_only': {
+            'format': '{message}',
+            'style': '{',
+        },
     },
     'handlers': {
         'console': {
@@ -197,6 +302,14 @@ LOGGING = {
             'filename': BASE_DIR / 'debug.log',
             'formatter': 'verbose',
         },
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG['LOG_FILE'],
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 3,
+            'delay': True,  # file is only created once something is slow
+            'formatter': 'message_only',
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -208,6 +321,21 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'donor.profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'donor.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'donor.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
         'django.db.backends': {
             'handlers': ['console'],
             'level': 'DEBUG' if DEBUG else 'INFO',
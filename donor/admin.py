@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.models import User
 from django.db.models import Q
 from django.utils.html import format_html
-from .models import Donor, DonationRequest, DonationHistory, EmergencyRequest, HealthMetrics, Hospital, BloodInventory
+from .models import Donor, DonationRequest, DonationHistory, EmergencyRequest, HealthMetrics, Hospital, BloodInventory, CenterNameReview
 
 # ============================================================
 # SECURITY: Hide sensitive donor data from Django admin
@@ -145,8 +145,8 @@ class DonationRequestAdmin(admin.ModelAdmin):
 
 @admin.register(DonationHistory)
 class DonationHistoryAdmin(admin.ModelAdmin):
-    list_display = ['donor_name', 'donor_blood_group', 'donation_date', 'donation_center_name', 'units_donated']
-    list_filter = ['donation_date', 'donation_center_name', 'donor__blood_group', 'created_at']
+    list_display = ['donor_name', 'donor_blood_group', 'donation_date', 'hospital', 'donation_center_name', 'units_donated']
+    list_filter = ['donation_date', 'hospital', 'donor__blood_group', 'created_at']
     search_fields = [
         'donor__user__first_name', 'donor__user__last_name', 'donor__user__username',
         'donor__phone_number', 'donor__blood_group', 'donation_center_name',
@@ -221,3 +221,40 @@ class HealthMetricsAdmin(admin.ModelAdmin):
         return obj.donor.blood_group
     donor_blood_group.short_description = 'Blood Group'
     donor_blood_group.admin_order_field = 'donor__blood_group'
+
+
+@admin.register(CenterNameReview)
+class CenterNameReviewAdmin(admin.ModelAdmin):
+    list_display = ['center_name', 'suggested_hospital', 'match_score', 'donation_count', 'status', 'resolved_at']
+    list_filter = ['status']
+    search_fields = ['center_name', 'suggested_hospital__name']
+    list_editable = ['suggested_hospital']
+    readonly_fields = ['match_score', 'donation_count', 'resolved_by', 'resolved_at', 'created_at']
+    list_per_page = 50
+    actions = ['approve_suggestions', 'reject_suggestions']
+
+    def approve_suggestions(self, request, queryset):
+        """Link the donations of each selected name to its suggested hospital"""
+        from django.utils import timezone
+        from utils.hospital_matcher import HospitalMatcher
+
+        linked = 0
+        approved = 0
+        for review in queryset.filter(status='pending', suggested_hospital__isnull=False):
+            linked += HospitalMatcher.apply_mapping(review.center_name, review.suggested_hospital_id)
+            review.status = 'approved'
+            review.resolved_by = request.user
+            review.resolved_at = timezone.now()
+            review.save()
+            approved += 1
+        self.message_user(request, f'Approved {approved} name(s), linked {linked} donation(s).')
+    approve_suggestions.short_description = 'Link donations to suggested hospital'
+
+    def reject_suggestions(self, request, queryset):
+        from django.utils import timezone
+
+        updated = queryset.filter(status='pending').update(
+            status='rejected', resolved_by=request.user, resolved_at=timezone.now()
+        )
+        self.message_user(request, f'Rejected {updated} name(s).')
+    reject_suggestions.short_description = 'Reject suggestion'
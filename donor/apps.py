@@ -6,3 +6,5 @@ class DonorConfig(AppConfig):
     
     def ready(self):
         import donor.signals
+        from utils.slow_queries import install_slow_query_log
+        install_slow_query_log()
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from utils.constants import HOSPITAL_MATCH_AUTO_THRESHOLD, HOSPITAL_MATCH_REVIEW_THRESHOLD
+from utils.donation_rollup import DonationRollup
+from utils.hospital_matcher import HospitalMatcher
+
+
+class Command(BaseCommand):
+    help = 'Link historical donations to Hospital rows by fuzzy-matching donation center names'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--auto-threshold', type=float, default=HOSPITAL_MATCH_AUTO_THRESHOLD,
+                            help='Minimum match score to link without review')
+        parser.add_argument('--review-threshold', type=float, default=HOSPITAL_MATCH_REVIEW_THRESHOLD,
+                            help='Minimum match score to suggest a hospital in the review queue')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be linked without writing')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        from_requests = 0 if dry_run else HospitalMatcher.link_from_requests()
+        result = HospitalMatcher().backfill(
+            auto_threshold=options['auto_threshold'],
+            review_threshold=options['review_threshold'],
+            dry_run=dry_run,
+        )
+
+        if not dry_run and (from_requests or result['donations_linked']):
+            DonationRollup.rebuild()
+
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Linked {from_requests} donation(s) via their request, "
+            f"{result['donations_linked']} donation(s) across {result['names_linked']} center name(s); "
+            f"{result['names_queued']} name(s) queued for review"
+        ))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from utils.donation_rollup import DonationRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily donation and donor count rollups used by the reports page from raw donation and donor rows'
+
+    def handle(self, *args, **options):
+        rows = DonationRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt donation rollup: {rows} rows'))
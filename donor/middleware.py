@@ -1,5 +1,4 @@
 import logging
-from django.core.cache import cache
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth import logout
 from django.conf import settings
@@ -24,38 +23,224 @@ class DashboardCacheMiddleware(MiddlewareMixin):
             # Don't log out, just log the issue
             return None
             
-        # Update session expiry on each request
-        session.set_expiry(settings.SESSION_COOKIE_AGE)
+        # Slide the session expiry, but only once per refresh window rather than on every request
+        from utils.sessions import refresh_session_expiry
+        refresh_session_expiry(session)
         
         return None
 
-    def process_response(self, request, response):
-        # Skip for non-authenticated users
-        if not hasattr(request, 'user') or not request.user.is_authenticated:
-            return response
-            
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in request profiler (REQUEST_PROFILING['ENABLED']).
+
+    Records SQL count/time, cache hits/misses, template render time, view time
+    and total time for every request, exposes them as Server-Timing headers and
+    one structured log line, and dumps a cProfile for sampled slow requests.
+    """
+
+    def __init__(self, get_response):
+        from django.core.exceptions import MiddlewareNotUsed
+        from utils.request_profiling import install_instrumentation
+
+        self.config = getattr(settings, 'REQUEST_PROFILING', {})
+        if not self.config.get('ENABLED'):
+            raise MiddlewareNotUsed('Request profiling is disabled')
+
+        self.get_response = get_response
+        self.profile_logger = logging.getLogger('donor.profiling')
+        install_instrumentation()
+
+    def __call__(self, request):
+        import cProfile
+        import random
+        import time
+        from contextlib import ExitStack
+        from django.db import connections
+        from utils.request_profiling import finish_request, sql_execute_wrapper, start_request
+
+        stats, token = start_request()
+        request._profiling_view_started = None
+        profiler = None
+        if random.random() < self.config.get('CPROFILE_SAMPLE_RATE', 0.0):
+            profiler = cProfile.Profile()
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sql_execute_wrapper))
+                if profiler:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler:
+                        profiler.disable()
+        finally:
+            finish_request(token)
+        total = time.perf_counter() - started
+
+        view_started = request._profiling_view_started
+        view_time = (time.perf_counter() - view_started) if view_started else 0.0
+        metrics = stats.as_dict()
+        metrics.update({
+            'total_ms': round(total * 1000, 2),
+            'view_ms': round(view_time * 1000, 2),
+        })
+
         try:
-            # Invalidate caches on POST, PUT, DELETE requests
-            if request.method in ['POST', 'PUT', 'DELETE']:
-                # Invalidate admin cache on any admin action
-                if hasattr(request.user, 'is_staff') and request.user.is_staff:
-                    cache.delete('admin_dashboard_data')
-                
-                # Invalidate donor cache for the current user
-                if hasattr(request.user, 'donor'):
-                    cache_key = f'donor_dashboard_{request.user.id}'
-                    cache.delete(cache_key)
-                    logger.debug(f'Invalidated cache for donor {request.user.id}')
-                    
-            # Ensure session is saved if user is authenticated
-            if request.user.is_authenticated and not request.session.modified:
-                request.session.modified = True
-                
+            if self.config.get('SERVER_TIMING', True):
+                self._add_server_timing(response, metrics)
+            if self.config.get('LOG', True):
+                self._log(request, response, metrics)
+            if profiler and metrics['total_ms'] >= self.config.get('CPROFILE_THRESHOLD_MS', 500):
+                self._dump_profile(request, profiler, metrics)
         except Exception as e:
-            logger.error(
-                f'Error in DashboardCacheMiddleware: {str(e)}', 
-                exc_info=True, 
-                extra={'user_id': getattr(request.user, 'id', None)}
-            )
-        
+            logger.error(f'Error in RequestProfilingMiddleware: {str(e)}', exc_info=True)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        import time
+
+        request._profiling_view_started = time.perf_counter()
+        request._profiling_view_name = f'{view_func.__module__}.{getattr(view_func, "__name__", view_func.__class__.__name__)}'
+        return None
+
+    def _add_server_timing(self, response, metrics):
+        entries = [
+            f'db;dur={metrics["db_ms"]};desc="{metrics["queries"]} queries"',
+            f'cache;desc="{metrics["cache_hits"]} hits, {metrics["cache_misses"]} misses"',
+            f'tpl;dur={metrics["template_ms"]}',
+            f'view;dur={metrics["view_ms"]}',
+            f'total;dur={metrics["total_ms"]}',
+        ]
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existing] if existing else []) + entries)
+
+    def _log(self, request, response, metrics):
+        import json
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': getattr(request, '_profiling_view_name', None),
+            'status': response.status_code,
+            'user_id': getattr(getattr(request, 'user', None), 'id', None),
+            **metrics,
+        }
+        self.profile_logger.info(json.dumps(record, sort_keys=True))
+
+    def _dump_profile(self, request, profiler, metrics):
+        import os
+        import re
+
+        dump_dir = self.config.get('CPROFILE_DIR') or os.path.join(settings.BASE_DIR, 'profiles')
+        os.makedirs(dump_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', request.path).strip('_') or 'root'
+        filename = f"{timezone.now().strftime('%Y%m%d_%H%M%S_%f')}_{slug}_{int(metrics['total_ms'])}ms.prof"
+        profiler.dump_stats(os.path.join(dump_dir, filename))
+        self.profile_logger.info(f'Saved cProfile for slow request {request.path} to {filename}')
+
+
+class NPlusOneDetectionMiddleware:
+    """
+    Opt-in N+1 query detector (N_PLUS_ONE_DETECTION['ENABLED']).
+
+    Fingerprints every SELECT issued while handling a request and logs query
+    shapes repeated from the same call site, with the originating view and
+    template line. In strict mode the offending query raises NPlusOneError.
+    """
+
+    def __init__(self, get_response):
+        from django.core.exceptions import MiddlewareNotUsed
+
+        self.config = getattr(settings, 'N_PLUS_ONE_DETECTION', {})
+        if not self.config.get('ENABLED'):
+            raise MiddlewareNotUsed('N+1 detection is disabled')
+
+        self.get_response = get_response
+        self.query_logger = logging.getLogger('donor.queries')
+
+    def __call__(self, request):
+        from contextlib import ExitStack
+        from django.db import connections
+        from utils.query_inspector import DEFAULT_THRESHOLD, QueryInspector
+
+        inspector = QueryInspector(
+            threshold=self.config.get('THRESHOLD', DEFAULT_THRESHOLD),
+            strict=self.config.get('STRICT', False),
+        )
+        request._query_inspector = inspector
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(inspector))
+            response = self.get_response(request)
+
+        for finding in inspector.findings:
+            self.query_logger.warning(f'{request.method} {request.path}: {inspector.describe(finding)}')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        inspector = getattr(request, '_query_inspector', None)
+        if inspector is not None:
+            inspector.view_name = f'{view_func.__module__}.{getattr(view_func, "__name__", view_func.__class__.__name__)}'
+        return None
+
+
+class MetricsMiddleware:
+    """
+    Records per-view latency, query counts and cache lookups into the metrics registry
+    (METRICS['ENABLED']). Reuses the profiling counters when RequestProfilingMiddleware
+    is active instead of wrapping the connections a second time.
+    """
+
+    def __init__(self, get_response):
+        from django.core.exceptions import MiddlewareNotUsed
+        from utils.request_profiling import install_instrumentation
+
+        config = getattr(settings, 'METRICS', {})
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed('Metrics are disabled')
+        if not config.get('MULTIPROCESS_DIR'):
+            logger.warning('Metrics are enabled without DJANGO_METRICS_DIR; each scrape reports only one worker')
+
+        self.get_response = get_response
+        install_instrumentation()
+
+    def __call__(self, request):
+        import time
+        from contextlib import ExitStack
+        from django.db import connections
+        from utils.metrics import CACHE_REQUESTS, REQUEST_LATENCY, REQUEST_QUERIES, registry
+        from utils.request_profiling import current_stats, finish_request, sql_execute_wrapper, start_request
+
+        stats, token = current_stats(), None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            if stats is None:
+                stats, token = start_request()
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sql_execute_wrapper))
+            try:
+                response = self.get_response(request)
+            finally:
+                if token is not None:
+                    finish_request(token)
+        elapsed = time.perf_counter() - started
+
+        try:
+            match = getattr(request, 'resolver_match', None)
+            view = match.view_name if match else 'unmatched'
+            REQUEST_LATENCY.observe(elapsed, view=view, method=request.method, status=response.status_code)
+            REQUEST_QUERIES.observe(stats.queries, view=view)
+            if stats.cache_hits:
+                CACHE_REQUESTS.inc(stats.cache_hits, result='hit')
+            if stats.cache_misses:
+                CACHE_REQUESTS.inc(stats.cache_misses, result='miss')
+            registry.flush()
+        except Exception as e:
+            logger.error(f'Error in MetricsMiddleware: {str(e)}', exc_info=True)
+
         return response
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:36
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donor', '0003_emergencyrequest_hospital_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_name', models.CharField(max_length=50)),
+                ('object_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['deleted_at', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='donationhistory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='bloodinventory',
+            index=models.Index(fields=['last_updated', 'id'], name='donor_blood_last_up_174f5a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationhistory',
+            index=models.Index(fields=['updated_at', 'id'], name='donor_donat_updated_e8d9e1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donationrequest',
+            index=models.Index(fields=['updated_at', 'id'], name='donor_donat_updated_31c017_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donor',
+            index=models.Index(fields=['updated_at', 'id'], name='donor_donor_updated_f2d5c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencyrequest',
+            index=models.Index(fields=['updated_at', 'id'], name='donor_emerg_updated_b92ab6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changetombstone',
+            index=models.Index(fields=['deleted_at', 'id'], name='donor_chang_deleted_459c5b_idx'),
+        ),
+    ]
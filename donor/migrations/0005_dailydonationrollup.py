@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_rollup(apps, schema_editor):
+    DailyDonationRollup = apps.get_model('donor', 'DailyDonationRollup')
+    DonationHistory = apps.get_model('donor', 'DonationHistory')
+    Donor = apps.get_model('donor', 'Donor')
+
+    rows = [
+        DailyDonationRollup(
+            day=group['donation_date'],
+            blood_group=group['donor__blood_group'],
+            city=group['donor__city'] or '',
+            hospital_id=group['hospital_id'],
+            center_name=group['donation_center_name'] or '',
+            donation_count=group['count'],
+            units_donated=group['units'] or 0,
+        )
+        for group in DonationHistory.objects.order_by().values(
+            'donation_date', 'donor__blood_group', 'donor__city', 'hospital_id', 'donation_center_name'
+        ).annotate(count=Count('id'), units=Sum('units_donated'))
+    ]
+    rows += [
+        DailyDonationRollup(day=group['day'], blood_group=group['blood_group'], city=group['city'] or '', new_donors=group['count'])
+        for group in Donor.objects.order_by().annotate(day=TruncDate('created_at')).values(
+            'day', 'blood_group', 'city'
+        ).annotate(count=Count('id'))
+    ]
+    DailyDonationRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donor', '0004_change_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDonationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('blood_group', models.CharField(choices=[('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'), ('O+', 'O+'), ('O-', 'O-'), ('AB+', 'AB+'), ('AB-', 'AB-')], max_length=3)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('center_name', models.CharField(blank=True, help_text='Donation center label for donations without a hospital', max_length=200)),
+                ('donation_count', models.IntegerField(default=0)),
+                ('units_donated', models.DecimalField(decimal_places=1, default=0, max_digits=10)),
+                ('new_donors', models.IntegerField(default=0)),
+                ('hospital', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_rollups', to='donor.hospital')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'blood_group'], name='donor_daily_day_6bd291_idx'), models.Index(fields=['hospital', 'day'], name='donor_daily_hospita_cc3387_idx')],
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
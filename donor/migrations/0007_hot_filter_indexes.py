@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-19 10:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donor', '0006_centernamereview'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='donationrequest',
+            index=models.Index(fields=['donor', 'status'], name='donor_donat_donor_i_4dff9d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='donor',
+            index=models.Index(fields=['last_donation_date'], name='donor_donor_last_do_fa4fc8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencyrequest',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['required_by'], name='donor_emerg_active_req_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emergencyresponse',
+            index=models.Index(fields=['donor', '-responded_at'], name='donor_emerg_donor_i_e7b8e0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='healthmetrics',
+            index=models.Index(fields=['donor', '-recorded_at'], name='donor_healt_donor_i_c5ecf7_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:17
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donor', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aggregate_type', models.CharField(help_text='Model name, e.g. emergencyrequest', max_length=50)),
+                ('aggregate_id', models.BigIntegerField()),
+                ('event_type', models.CharField(help_text='e.g. emergencyrequest.created', max_length=60)),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['created_at'], name='donor_outbo_created_999e25_idx')],
+            },
+        ),
+    ]
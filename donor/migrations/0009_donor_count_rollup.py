@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:43
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_donor_counts(apps, schema_editor):
+    DonorCountRollup = apps.get_model('donor', 'DonorCountRollup')
+    Donor = apps.get_model('donor', 'Donor')
+
+    DonorCountRollup.objects.bulk_create([
+        DonorCountRollup(blood_group=group['blood_group'], city=group['city'] or '', donors=group['count'])
+        for group in Donor.objects.order_by().values('blood_group', 'city').annotate(count=Count('id'))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('donor', '0008_outbox_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DonorCountRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('blood_group', models.CharField(choices=[('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'), ('O+', 'O+'), ('O-', 'O-'), ('AB+', 'AB+'), ('AB-', 'AB-')], max_length=3)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('donors', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['blood_group', 'city'], name='donor_donor_blood_g_3eabdd_idx')],
+            },
+        ),
+        migrations.RunPython(populate_donor_counts, migrations.RunPython.noop),
+    ]
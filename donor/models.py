@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from datetime import date, timedelta
@@ -17,6 +18,17 @@ from utils.constants import (
     INVENTORY_MEDIUM_THRESHOLD
 )
 
+class TransactionalSaveMixin:
+    """
+    Runs save() in a transaction, so post_save receivers (the outbox) commit or roll back with the row
+    """
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
 class Donor(models.Model):
     BLOOD_GROUPS = [
         ('A+', 'A+'),
@@ -78,6 +90,8 @@ class Donor(models.Model):
             models.Index(fields=['latitude', 'longitude']),
             models.Index(fields=['-created_at']),
             models.Index(fields=['allow_emergency_contact', 'blood_group']),
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['last_donation_date']),
         ]
 
     def __str__(self):
@@ -191,7 +205,7 @@ class Donor(models.Model):
             'next_eligible_date': self.last_donation_date + timedelta(days=MINIMUM_DONATION_INTERVAL_DAYS) if self.last_donation_date else None
         }
 
-class DonationRequest(models.Model):
+class DonationRequest(TransactionalSaveMixin, models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
@@ -229,6 +243,8 @@ class DonationRequest(models.Model):
             models.Index(fields=['status', '-created_at']),
             models.Index(fields=['requested_date']),
             models.Index(fields=['-created_at']),
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(fields=['donor', 'status']),
         ]
 
 
@@ -254,10 +270,13 @@ class HealthMetrics(models.Model):
 
     class Meta:
         ordering = ['-recorded_at']
+        indexes = [
+            models.Index(fields=['donor', '-recorded_at']),
+        ]
         verbose_name = 'Health Metrics'
         verbose_name_plural = 'Health Metrics'
 
-class DonationHistory(models.Model):
+class DonationHistory(TransactionalSaveMixin, models.Model):
     donor = models.ForeignKey(Donor, on_delete=models.CASCADE)
     donation_date = models.DateField()
     donation_center_name = models.CharField(max_length=200, blank=True)  # Store as string for simplicity
@@ -271,6 +290,7 @@ class DonationHistory(models.Model):
     pulse_rate = models.PositiveIntegerField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.donor.name} - {self.donation_date}"
@@ -281,10 +301,11 @@ class DonationHistory(models.Model):
         indexes = [
             models.Index(fields=['-donation_date']),
             models.Index(fields=['donor', '-donation_date']),
+            models.Index(fields=['updated_at', 'id']),
         ]
 
 
-class BloodInventory(models.Model):
+class BloodInventory(TransactionalSaveMixin, models.Model):
     """Track blood inventory by blood group per hospital"""
     hospital = models.ForeignKey('Hospital', on_delete=models.CASCADE, related_name='blood_inventory')
     blood_group = models.CharField(max_length=5, choices=Donor.BLOOD_GROUPS)
@@ -298,6 +319,9 @@ class BloodInventory(models.Model):
         verbose_name_plural = "Blood Inventories"
         ordering = ['hospital', 'blood_group']
         unique_together = [['hospital', 'blood_group']]
+        indexes = [
+            models.Index(fields=['last_updated', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.get_blood_group_display()}: {self.units_available} units"
@@ -314,7 +338,7 @@ class BloodInventory(models.Model):
         else:
             return 'good'
 
-class EmergencyRequest(models.Model):
+class EmergencyRequest(TransactionalSaveMixin, models.Model):
     URGENCY_LEVELS = [
         ('low', 'Low'),
         ('medium', 'Medium'),
@@ -363,6 +387,9 @@ class EmergencyRequest(models.Model):
             models.Index(fields=['blood_group_needed', 'status']),
             models.Index(fields=['-urgency_level', '-created_at']),
             models.Index(fields=['required_by']),
+            models.Index(fields=['updated_at', 'id']),
+            # Donor dashboards only ever look at active, unexpired emergencies
+            models.Index(fields=['required_by'], condition=models.Q(status='active'), name='donor_emerg_active_req_idx'),
         ]
 
 
@@ -402,6 +429,7 @@ class EmergencyResponse(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['emergency_request', 'status']),
             models.Index(fields=['-responded_at']),
+            models.Index(fields=['donor', '-responded_at']),
         ]
         unique_together = ['emergency_request', 'donor']  # One response per donor per emergency
     
@@ -519,3 +547,104 @@ class Hospital(models.Model):
         hospitals_with_distance.sort(key=lambda x: x[1])
         
         return [hospital for hospital, distance in hospitals_with_distance[:limit]]
+
+
+class ChangeTombstone(models.Model):
+    """Record of a deleted row so incremental exports can propagate deletes"""
+    model_name = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model_name} #{self.object_id} deleted at {self.deleted_at}"
+
+
+class OutboxEvent(models.Model):
+    """Domain event written in the same transaction as the change it describes"""
+    aggregate_type = models.CharField(max_length=50, help_text="Model name, e.g. emergencyrequest")
+    aggregate_id = models.BigIntegerField()
+    event_type = models.CharField(max_length=60, help_text="e.g. emergencyrequest.created")
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.event_type} {self.aggregate_id}"
+
+
+class DailyDonationRollup(models.Model):
+    """
+    Pre-aggregated donation and registration counts per day, blood group, hospital and city.
+    Several rows may share a key; readers always sum them.
+    """
+    day = models.DateField()
+    blood_group = models.CharField(max_length=3, choices=Donor.BLOOD_GROUPS)
+    hospital = models.ForeignKey('Hospital', on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_rollups')
+    city = models.CharField(max_length=100, blank=True)
+    center_name = models.CharField(max_length=200, blank=True, help_text="Donation center label for donations without a hospital")
+    donation_count = models.IntegerField(default=0)
+    units_donated = models.DecimalField(max_digits=10, decimal_places=1, default=0)
+    new_donors = models.IntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        indexes = [
+            models.Index(fields=['day', 'blood_group']),
+            models.Index(fields=['hospital', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.blood_group} {self.city or '-'}: {self.donation_count} donations, {self.new_donors} new donors"
+
+
+class DonorCountRollup(models.Model):
+    """
+    Current donor count per blood group and city, kept in step with Donor writes.
+    Several rows may share a key; readers always sum them.
+    """
+    blood_group = models.CharField(max_length=3, choices=Donor.BLOOD_GROUPS)
+    city = models.CharField(max_length=100, blank=True)
+    donors = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['blood_group', 'city']),
+        ]
+
+    def __str__(self):
+        return f"{self.blood_group} {self.city or '-'}: {self.donors} donors"
+
+
+class CenterNameReview(models.Model):
+    """Free-text donation center name that could not be linked to a hospital automatically"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+    ]
+
+    center_name = models.CharField(max_length=200, unique=True)
+    suggested_hospital = models.ForeignKey('Hospital', on_delete=models.SET_NULL, null=True, blank=True, related_name='center_name_reviews')
+    match_score = models.FloatField(default=0.0)
+    donation_count = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    resolved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['status', '-donation_count']
+
+    def __str__(self):
+        return f"{self.center_name} -> {self.suggested_hospital or 'no match'} ({self.status})"
@@ -1,16 +1,127 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
-from .models import DonationRequest, DonationHistory, EmergencyRequest
+from .models import Donor, DonationRequest, DonationHistory, EmergencyRequest, BloodInventory, ChangeTombstone
+from utils.cache_tags import (
+    TAG_DONATION_REQUESTS, TAG_DONATIONS, TAG_DONORS, TAG_EMERGENCIES, TAG_INVENTORY,
+    TaggedCache, donor_tag, hospital_tag,
+)
+from utils.donation_rollup import DonationRollup
+from utils.outbox import Outbox
 
+# Tags bumped whenever a row of the model changes, on top of its donor/hospital tags
+MODEL_CACHE_TAGS = {
+    Donor: (TAG_DONORS,),
+    DonationRequest: (TAG_DONATION_REQUESTS,),
+    DonationHistory: (TAG_DONATIONS,),
+    EmergencyRequest: (TAG_EMERGENCIES,),
+    BloodInventory: (TAG_INVENTORY,),
+}
+
+
+@receiver([post_save, post_delete], sender=Donor)
 @receiver([post_save, post_delete], sender=DonationRequest)
 @receiver([post_save, post_delete], sender=DonationHistory)
 @receiver([post_save, post_delete], sender=EmergencyRequest)
-def update_dashboard_cache(sender, instance, **kwargs):
-    # Invalidate cache for admin dashboard
-    cache.delete('admin_dashboard_data')
-    
-    # Invalidate cache for donor's dashboard if applicable
-    if hasattr(instance, 'donor'):
-        cache.delete(f'donor_dashboard_{instance.donor.id}')
-        cache.set(f'donor_update_{instance.donor.id}', True, 60)  # Set update flag for 60 seconds
+@receiver([post_save, post_delete], sender=BloodInventory)
+def invalidate_cache_tags(sender, instance, **kwargs):
+    # Invalidate only the cached entries that depend on this row
+    tags = list(MODEL_CACHE_TAGS.get(sender, ()))
+    donor_id = instance.pk if sender is Donor else getattr(instance, 'donor_id', None)
+    if donor_id:
+        tags.append(donor_tag(donor_id))
+    if getattr(instance, 'hospital_id', None):
+        tags.append(hospital_tag(instance.hospital_id))
+    TaggedCache.invalidate_tags(*tags)
+
+
+@receiver(post_delete, sender=Donor)
+@receiver(post_delete, sender=DonationRequest)
+@receiver(post_delete, sender=DonationHistory)
+@receiver(post_delete, sender=EmergencyRequest)
+@receiver(post_delete, sender=BloodInventory)
+def record_change_tombstone(sender, instance, **kwargs):
+    # Keep a tombstone so the incremental change feed can report the delete
+    ChangeTombstone.objects.create(model_name=sender._meta.model_name, object_id=instance.pk)
+
+
+@receiver(post_save, sender=DonationRequest)
+@receiver(post_save, sender=DonationHistory)
+@receiver(post_save, sender=EmergencyRequest)
+@receiver(post_save, sender=BloodInventory)
+def record_outbox_save(sender, instance, created, raw=False, **kwargs):
+    # Runs inside the save's transaction (TransactionalSaveMixin); fixture loads are skipped
+    if not raw:
+        Outbox.record(instance, 'created' if created else 'updated')
+
+
+@receiver(post_delete, sender=DonationRequest)
+@receiver(post_delete, sender=DonationHistory)
+@receiver(post_delete, sender=EmergencyRequest)
+@receiver(post_delete, sender=BloodInventory)
+def record_outbox_delete(sender, instance, **kwargs):
+    # The deletion collector sends post_delete inside its transaction, cascades included
+    Outbox.record(instance, 'deleted')
+
+
+@receiver(pre_save, sender=DonationHistory)
+def remember_donation_rollup_key(sender, instance, **kwargs):
+    # Keep the stored values so post_save can move the donation out of its old rollup cell
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = DonationHistory.objects.filter(pk=instance.pk).values(
+            'donation_date', 'units_donated', 'hospital_id', 'donation_center_name',
+            'donor__blood_group', 'donor__city'
+        ).first()
+
+
+@receiver(post_save, sender=DonationHistory)
+def update_donation_rollup(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        DonationRollup.apply_donation(
+            previous['donation_date'], previous['units_donated'], previous['hospital_id'],
+            previous['donation_center_name'], previous['donor__blood_group'], previous['donor__city'], sign=-1
+        )
+    DonationRollup.apply_donation(
+        instance.donation_date, instance.units_donated, instance.hospital_id,
+        instance.donation_center_name, instance.donor.blood_group, instance.donor.city
+    )
+
+
+@receiver(post_delete, sender=DonationHistory)
+def remove_donation_rollup(sender, instance, **kwargs):
+    try:
+        donor = instance.donor
+    except Donor.DoesNotExist:
+        return
+    DonationRollup.apply_donation(
+        instance.donation_date, instance.units_donated, instance.hospital_id,
+        instance.donation_center_name, donor.blood_group, donor.city, sign=-1
+    )
+
+
+@receiver(pre_save, sender=Donor)
+def remember_donor_rollup_key(sender, instance, **kwargs):
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = Donor.objects.filter(pk=instance.pk).values('blood_group', 'city').first()
+
+
+@receiver(post_save, sender=Donor)
+def update_donor_rollup(sender, instance, created, **kwargs):
+    if created:
+        DonationRollup.apply_new_donor(instance.created_at, instance.blood_group, instance.city)
+        return
+
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous and (previous['blood_group'], previous['city']) != (instance.blood_group, instance.city):
+        DonationRollup.apply_new_donor(instance.created_at, previous['blood_group'], previous['city'], sign=-1)
+        DonationRollup.apply_new_donor(instance.created_at, instance.blood_group, instance.city)
+        DonationRollup.move_donor_donations(
+            instance.pk, previous['blood_group'], previous['city'], instance.blood_group, instance.city
+        )
+
+
+@receiver(post_delete, sender=Donor)
+def remove_donor_rollup(sender, instance, **kwargs):
+    DonationRollup.apply_new_donor(instance.created_at, instance.blood_group, instance.city, sign=-1)
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
+from django.db.models import Count, Sum
 from datetime import date, timedelta
 import json
 
@@ -11,6 +12,7 @@ import json
 from .models import Donor, DonationRequest, DonationHistory, EmergencyRequest, Hospital, HealthMetrics, EmergencyResponse
 from .forms import LocationUpdateForm, SimpleLocationForm, MedicalInfoUpdateForm, HealthMetricsForm
 from utils.notification_service import NotificationService
+from utils.cache_tags import TaggedCache, donor_tag
 
 
 @login_required
@@ -63,13 +65,14 @@ def donor_dashboard(request):
             if len(emergency_requests) >= 5:
                 break
     
-    # Calculate total donations
-    total_donations = DonationHistory.objects.filter(donor=donor).count()
-    
-    # Calculate total units donated
-    total_units = 0
-    for donation in DonationHistory.objects.filter(donor=donor):
-        total_units += donation.units_donated
+    # Calculate total donations and units donated, cached until this donor's data changes
+    def load_donation_totals():
+        totals = DonationHistory.objects.filter(donor=donor).aggregate(count=Count('id'), units=Sum('units_donated'))
+        return totals['count'], totals['units'] or 0
+
+    total_donations, total_units = TaggedCache.get_or_set(
+        f'donor_donation_totals:{donor.id}', load_donation_totals, [donor_tag(donor.id)]
+    )
     
     # Count completed appointments
     total_completed_appointments = completed_requests.count()
@@ -879,12 +882,8 @@ def mark_notification_read(request, notification_id):
     """Mark a specific notification as read (keep it in system)"""
     if request.method == 'POST':
         try:
-            from admin_panel.models import UserNotification
-            notification = UserNotification.objects.get(id=notification_id, user=request.user)
-            notification.is_read = True
-            notification.save()
-            return JsonResponse({'success': True})
-        except UserNotification.DoesNotExist:
+            if NotificationService.mark_notification_read(notification_id, request.user):
+                return JsonResponse({'success': True})
             return JsonResponse({'success': False, 'error': 'Notification not found'})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
@@ -894,8 +893,7 @@ def mark_notification_read(request, notification_id):
 def mark_all_notifications_read(request):
     """Mark all notifications as read for the current user"""
     if request.method == 'POST':
-        from admin_panel.models import UserNotification
-        UserNotification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        NotificationService.mark_all_notifications_read(request.user)
         return JsonResponse({'success': True})
     return JsonResponse({'success': False, 'error': 'Invalid request method'})
 
@@ -0,0 +1,174 @@
+"""
+View benchmark harness for Blood Donation Management System
+Drives the hot views through the Django test client against a fixed synthetic dataset
+"""
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+logger = logging.getLogger(__name__)
+
+# Fixed dataset every benchmark run is measured against; changing it invalidates the baselines
+BENCHMARK_DATASET = {
+    'hospitals': 20,
+    'donors': 3000,
+    'donations': 12000,
+    'emergencies': 300,
+    'notifications': 6000,
+}
+BENCHMARK_SEED = 1234
+BENCHMARK_PREFIX = 'bench'
+
+# Budget margins over a recorded result (see default_budgets)
+BUDGET_QUERY_MARGIN = 2
+BUDGET_MEMORY_FACTOR = 1.2
+BUDGET_TIME_FACTOR = 1.5
+BUDGET_MIN_TIME_MARGIN_MS = 20
+
+# name -> (url name, HTTP method, payload, logged-in role)
+BENCHMARK_SCENARIOS = {
+    'donor_dashboard': ('donor:donor_dashboard', 'get', None, 'donor'),
+    'admin_dashboard': ('admin_panel:dashboard', 'get', None, 'admin'),
+    'donor_tracking': ('admin_panel:donor_tracking', 'get', None, 'admin'),
+    'donor_tracking_search': ('admin_panel:donor_tracking', 'get', {'search': 'Sharma', 'blood_group': 'O+'}, 'admin'),
+    'location_search': ('admin_panel:location_search', 'post_json',
+                        {'latitude': 27.7172, 'longitude': 85.3240, 'max_distance': 25, 'blood_group': 'A+'}, 'admin'),
+    'manage_emergencies': ('admin_panel:manage_emergencies', 'get', None, 'admin'),
+    'reports': ('admin_panel:reports', 'get', None, 'admin'),
+    'export_donors': ('admin_panel:export_donors', 'get', None, 'admin'),
+    'export_donations': ('admin_panel:export_donations', 'get', None, 'admin'),
+    'export_reports': ('admin_panel:export_reports', 'get', None, 'admin'),
+}
+
+
+def seed_benchmark_dataset():
+    """Populate the (empty, throwaway) database with the fixed benchmark dataset"""
+    from utils.synthetic_data import SyntheticDataGenerator
+
+    generator = SyntheticDataGenerator(seed=BENCHMARK_SEED, batch_size=2000, prefix=BENCHMARK_PREFIX, log=logger.debug)
+    generator.run(**BENCHMARK_DATASET)
+
+
+def benchmark_users():
+    """Return the donor and hospital admin accounts the scenarios log in as"""
+    from django.contrib.auth.models import User
+
+    return {
+        'donor': User.objects.get(username=f'{BENCHMARK_PREFIX}_donor_0'),
+        'admin': User.objects.get(username=f'{BENCHMARK_PREFIX}_admin_0'),
+    }
+
+
+def _request(client, url_name, method, payload):
+    url = reverse(url_name)
+    if method == 'post_json':
+        response = client.post(url, data=json.dumps(payload), content_type='application/json')
+    elif method == 'post':
+        response = client.post(url, payload or {})
+    else:
+        response = client.get(url, payload or {})
+
+    # Streaming responses do their work while being consumed
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def run_scenario(name, user, iterations=5, warm_cache=False):
+    """
+    Measure one scenario
+
+    Returns:
+        dict with median/max wall time (ms), query count, peak traced memory (KB) and response size
+    """
+    url_name, method, payload, _ = BENCHMARK_SCENARIOS[name]
+    client = Client()
+    client.force_login(user)
+
+    # Warm-up pass so imports and template compilation are not measured
+    _request(client, url_name, method, payload)
+
+    timings = []
+    query_counts = []
+    status = size = None
+    for _ in range(iterations):
+        if not warm_cache:
+            cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            status, size = _request(client, url_name, method, payload)
+            timings.append((time.perf_counter() - started) * 1000)
+        query_counts.append(len(queries))
+
+    # Memory is traced in a separate pass because tracemalloc slows everything down
+    if not warm_cache:
+        cache.clear()
+    tracemalloc.start()
+    try:
+        _request(client, url_name, method, payload)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': status,
+        'time_ms': round(statistics.median(timings), 1),
+        'max_time_ms': round(max(timings), 1),
+        'queries': max(query_counts),
+        'peak_kb': round(peak / 1024),
+        'response_kb': round(size / 1024, 1),
+    }
+
+
+def compare_with_baseline(name, result, entry, tolerance=0.25, check_timing=True):
+    """
+    Check a result against its committed baseline and budgets
+
+    Returns:
+        list of human readable failure messages (empty when within limits)
+    """
+    failures = []
+    if result['status'] != 200:
+        failures.append(f"{name}: HTTP {result['status']}")
+
+    budgets = entry.get('budgets', {})
+    if result['queries'] > budgets.get('max_queries', float('inf')):
+        failures.append(f"{name}: {result['queries']} queries exceeds budget of {budgets['max_queries']}")
+    if result['peak_kb'] > budgets.get('max_peak_kb', float('inf')):
+        failures.append(f"{name}: peak memory {result['peak_kb']} KB exceeds budget of {budgets['max_peak_kb']} KB")
+    if check_timing and result['time_ms'] > budgets.get('max_time_ms', float('inf')):
+        failures.append(f"{name}: {result['time_ms']} ms exceeds budget of {budgets['max_time_ms']} ms")
+
+    baseline = entry.get('baseline')
+    if baseline:
+        # Query counts are deterministic, so any increase is a regression
+        if result['queries'] > baseline['queries']:
+            failures.append(f"{name}: query count rose from {baseline['queries']} to {result['queries']}")
+        if result['peak_kb'] > baseline['peak_kb'] * (1 + tolerance):
+            failures.append(f"{name}: peak memory rose from {baseline['peak_kb']} KB to {result['peak_kb']} KB")
+        if check_timing and result['time_ms'] > baseline['time_ms'] * (1 + tolerance):
+            failures.append(f"{name}: median time rose from {baseline['time_ms']} ms to {result['time_ms']} ms")
+    return failures
+
+
+def default_budgets(result):
+    """
+    Budgets a small margin over a recorded result: query counts are deterministic and
+    peak memory varies by about 1% between runs, while wall time also depends on the machine
+    """
+    return {
+        'max_queries': result['queries'] + BUDGET_QUERY_MARGIN,
+        'max_time_ms': round(max(
+            result['time_ms'] * BUDGET_TIME_FACTOR, result['time_ms'] + BUDGET_MIN_TIME_MARGIN_MS
+        )),
+        'max_peak_kb': round(result['peak_kb'] * BUDGET_MEMORY_FACTOR),
+    }
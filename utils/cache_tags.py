@@ -0,0 +1,101 @@
+"""
+Tagged cache for Blood Donation Management System
+Entries remember the versions of the tags they depend on; bumping a tag invalidates every dependent entry
+"""
+import logging
+import time
+from django.core.cache import cache
+from utils.constants import TAGGED_CACHE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+TAG_INVENTORY = 'inventory'
+TAG_EMERGENCIES = 'emergencies'
+TAG_DONORS = 'donors'
+TAG_DONATIONS = 'donations'
+TAG_DONATION_REQUESTS = 'donation_requests'
+TAG_SYSTEM_NOTIFICATIONS = 'system_notifications'
+
+_TAG_KEY_PREFIX = 'cache_tag:'
+_ENTRY_KEY_PREFIX = 'tagged:'
+# Tag versions must outlive any entry stamped with them
+TAG_VERSION_TIMEOUT = None
+
+
+def donor_tag(donor_id):
+    return f'donor:{donor_id}'
+
+
+def hospital_tag(hospital_id):
+    return f'hospital:{hospital_id}'
+
+
+def system_notification_reads_tag(user_id):
+    return f'system_notification_reads:{user_id}'
+
+
+class TaggedCache:
+    """
+    Service class for cache entries invalidated by tag instead of by key
+
+    Each tag has a version number in the cache. An entry is stored together
+    with the versions of its tags at write time and is treated as a miss once
+    any of them has moved on, so one invalidate_tags() call drops exactly the
+    entries that depend on the changed data, in every process.
+    """
+
+    @staticmethod
+    def _tag_versions(tags):
+        tag_keys = {_TAG_KEY_PREFIX + tag: tag for tag in tags}
+        stored = cache.get_many(list(tag_keys))
+        versions = {tag_keys[key]: value for key, value in stored.items()}
+        missing = [tag for tag in tags if tag not in versions]
+        if missing:
+            # Start from the clock so a tag evicted and recreated never reuses an old version
+            initial = time.time_ns()
+            for tag in missing:
+                cache.add(_TAG_KEY_PREFIX + tag, initial, TAG_VERSION_TIMEOUT)
+            stored = cache.get_many([_TAG_KEY_PREFIX + tag for tag in missing])
+            versions.update({tag_keys[key]: value for key, value in stored.items()})
+        return versions
+
+    @staticmethod
+    def get(key, default=None):
+        entry = cache.get(_ENTRY_KEY_PREFIX + key)
+        if entry is None:
+            return default
+        stamped, value = entry
+        if not stamped:
+            return value
+        current = cache.get_many([_TAG_KEY_PREFIX + tag for tag in stamped])
+        for tag, version in stamped.items():
+            if current.get(_TAG_KEY_PREFIX + tag) != version:
+                return default
+        return value
+
+    @staticmethod
+    def set(key, value, tags, timeout=TAGGED_CACHE_TIMEOUT):
+        versions = TaggedCache._tag_versions(list(tags))
+        cache.set(_ENTRY_KEY_PREFIX + key, (versions, value), timeout)
+
+    @staticmethod
+    def get_or_set(key, factory, tags, timeout=TAGGED_CACHE_TIMEOUT):
+        """Return the cached value, computing and storing it with factory() on a miss"""
+        missing = object()
+        value = TaggedCache.get(key, missing)
+        if value is missing:
+            # Read versions before computing so a change during the computation is not masked
+            versions = TaggedCache._tag_versions(list(tags))
+            value = factory()
+            cache.set(_ENTRY_KEY_PREFIX + key, (versions, value), timeout)
+        return value
+
+    @staticmethod
+    def invalidate_tags(*tags):
+        """Give each tag a new version so all entries depending on it become misses"""
+        # A fresh clock value instead of incr(): no read-modify-write race between workers
+        version = time.time_ns()
+        try:
+            cache.set_many({_TAG_KEY_PREFIX + tag: version for tag in set(tags)}, TAG_VERSION_TIMEOUT)
+        except Exception as e:
+            logger.error(f'Error invalidating cache tags {tags}: {str(e)}')
@@ -75,6 +75,19 @@ URGENCY_RESPONSE_TIME = {
 # Notification Settings
 NOTIFICATION_CLEANUP_DAYS = 30  # Days after which to clean up old notifications
 NOTIFICATION_BATCH_SIZE = 100  # Batch size for bulk notification creation
+NOTIFICATION_DEDUP_WINDOW_SECONDS = 3600  # Same user, type and related object within one window is stored once
+NOTIFICATION_RETENTION_BATCH_SIZE = 500  # Rows deleted per short transaction by the retention job
+NOTIFICATION_RETENTION_PAUSE = 0.05  # Seconds the retention job sleeps between batches to let live writes in
+
+# Email Delivery
+EMAIL_BATCH_SIZE = 200  # Messages sent over one SMTP connection by one worker task
+EMAIL_DELIVERY_WORKERS = 4  # Threads sending email batches in parallel
+EMAIL_MAX_ATTEMPTS = 3  # Sends tried per recipient before it is left as failed
+EMAIL_RETRY_BACKOFF_SECONDS = 2  # Base delay before retrying failed recipients (doubles per attempt)
+EMAIL_SENDING_STALE_MINUTES = 15  # Deliveries claimed longer ago than this are assumed abandoned and sent again
+
+# SMS and Webhook Delivery
+CHANNEL_MAX_ATTEMPTS = 3  # Sends (each with the adapter's own retries) tried per recipient before it stays failed
 
 # Activity Scoring
 ACTIVITY_SCORE_PER_REQUEST = 2
@@ -115,3 +128,40 @@ DATE_FORMAT = '%Y-%m-%d'
 DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 DISPLAY_DATE_FORMAT = '%B %d, %Y'
 DISPLAY_DATETIME_FORMAT = '%B %d, %Y at %I:%M %p'
+
+# Inventory Rebalancing
+REBALANCE_SAFETY_STOCK_UNITS = 5  # Units a hospital always keeps per blood group before transferring
+REBALANCE_MAX_TRANSFER_DISTANCE_KM = 200  # Ignore sources farther than this
+REBALANCE_SUBSTITUTION_PENALTY_KM = 25  # Extra cost for sending a compatible substitute blood group
+
+# Exports
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round-trip when streaming exports
+EXPORT_JOB_WORKERS = 2  # Background threads generating queued exports
+EXPORT_JOB_DEDUP_MINUTES = 15  # Reuse an identical finished export requested within this window
+EXPORT_JOB_TTL_HOURS = 24  # Finished export files are deleted after this long
+EXPORT_JOB_STALE_MINUTES = 60  # Pending/running jobs older than this are marked failed
+
+# Change Feed
+CHANGE_FEED_PAGE_SIZE = 1000  # Default number of changes returned per page
+CHANGE_FEED_MAX_PAGE_SIZE = 5000  # Upper bound a client may request
+CHANGE_FEED_SETTLE_SECONDS = 2  # Skip rows newer than this so in-flight transactions are not overtaken
+CHANGE_FEED_TOMBSTONE_RETENTION_DAYS = 90  # Delete tombstones older than this
+
+# Outbox
+OUTBOX_PAGE_SIZE = 500  # Default number of events returned per read
+OUTBOX_MAX_PAGE_SIZE = 5000  # Upper bound a client may request
+OUTBOX_SETTLE_SECONDS = 1  # Hold back newer events; on PostgreSQL only transactions shorter than this are safe
+OUTBOX_BULK_BATCH_SIZE = 500  # Rows loaded per query when recording events for queryset updates
+OUTBOX_RETENTION_DAYS = 30  # Events older than this are pruned
+OUTBOX_POLL_INTERVAL = 1.0  # Seconds the tailer waits when caught up
+
+# Report Cache
+REPORT_CACHE_DIR = 'reports'  # Subdirectory of MEDIA_ROOT holding pre-rendered reports
+REPORT_CACHE_RETENTION_DAYS = 7  # Rendered reports older than this are deleted
+REPORT_STATS_CACHE_TIMEOUT = 3600  # Seconds a statistics snapshot stays in the cache
+TAGGED_CACHE_TIMEOUT = 300  # Default lifetime of tagged entries; tag invalidation usually drops them sooner
+UNREAD_COUNTER_TIMEOUT = 3600  # Cached unread counts are recounted from the database at least this often (seconds)
+
+# Hospital Matching
+HOSPITAL_MATCH_AUTO_THRESHOLD = 0.9  # Center names scoring at least this are linked without review
+HOSPITAL_MATCH_REVIEW_THRESHOLD = 0.6  # Below this no hospital is suggested in the review queue
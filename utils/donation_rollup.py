@@ -0,0 +1,178 @@
+"""
+Daily donation rollup for Blood Donation Management System
+Keeps DailyDonationRollup and DonorCountRollup in step with DonationHistory and Donor
+writes so reports can sum a few pre-aggregated rows instead of scanning raw tables
+"""
+import logging
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from donor.models import DailyDonationRollup, DonationHistory, Donor, DonorCountRollup
+
+logger = logging.getLogger(__name__)
+
+REBUILD_BATCH_SIZE = 1000
+
+
+class DonationRollup:
+    """Service class to maintain and query the daily donation rollup"""
+
+    @staticmethod
+    def add(day, blood_group, city='', hospital_id=None, center_name='', donations=0, units=0, new_donors=0):
+        """Add (or with negative values, remove) a contribution to one rollup cell"""
+        key = {
+            'day': day,
+            'blood_group': blood_group,
+            'hospital_id': hospital_id,
+            'city': city or '',
+            'center_name': center_name or '',
+        }
+        units = Decimal(str(units or 0))
+        with transaction.atomic():
+            row_id = DailyDonationRollup.objects.filter(**key).values_list('id', flat=True).first()
+            if row_id:
+                DailyDonationRollup.objects.filter(id=row_id).update(
+                    donation_count=F('donation_count') + donations,
+                    units_donated=F('units_donated') + units,
+                    new_donors=F('new_donors') + new_donors,
+                )
+            else:
+                DailyDonationRollup.objects.create(
+                    donation_count=donations, units_donated=units, new_donors=new_donors, **key
+                )
+
+    @staticmethod
+    def add_donors(blood_group, city, donors):
+        """Add (or with a negative value, remove) donors from one blood group and city total"""
+        key = {'blood_group': blood_group, 'city': city or ''}
+        with transaction.atomic():
+            row_id = DonorCountRollup.objects.filter(**key).values_list('id', flat=True).first()
+            if row_id:
+                DonorCountRollup.objects.filter(id=row_id).update(donors=F('donors') + donors)
+            else:
+                DonorCountRollup.objects.create(donors=donors, **key)
+
+    @staticmethod
+    def apply_donation(donation_date, units, hospital_id, center_name, blood_group, city, sign=1):
+        DonationRollup.add(
+            donation_date, blood_group, city, hospital_id, center_name,
+            donations=sign, units=sign * Decimal(str(units or 0)),
+        )
+
+    @staticmethod
+    def apply_new_donor(created_at, blood_group, city, sign=1):
+        day = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+        DonationRollup.add(day, blood_group, city, new_donors=sign)
+        DonationRollup.add_donors(blood_group, city, sign)
+
+    @staticmethod
+    def move_donor_donations(donor_id, old_blood_group, old_city, new_blood_group, new_city):
+        """Re-key a donor's donations after their blood group or city changed"""
+        groups = DonationHistory.objects.filter(donor_id=donor_id).values(
+            'donation_date', 'hospital_id', 'donation_center_name'
+        ).annotate(count=Count('id'), units=Sum('units_donated'))
+        for group in groups:
+            units = group['units'] or 0
+            DonationRollup.add(
+                group['donation_date'], old_blood_group, old_city, group['hospital_id'],
+                group['donation_center_name'], donations=-group['count'], units=-units,
+            )
+            DonationRollup.add(
+                group['donation_date'], new_blood_group, new_city, group['hospital_id'],
+                group['donation_center_name'], donations=group['count'], units=units,
+            )
+
+    @staticmethod
+    def rebuild():
+        """Recompute both rollups from DonationHistory and Donor"""
+        with transaction.atomic():
+            DailyDonationRollup.objects.all().delete()
+            DonorCountRollup.objects.all().delete()
+
+            batch = []
+            created = 0
+
+            def flush():
+                nonlocal batch, created
+                DailyDonationRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+
+            donations = DonationHistory.objects.order_by().values(
+                'donation_date', 'donor__blood_group', 'donor__city', 'hospital_id', 'donation_center_name'
+            ).annotate(count=Count('id'), units=Sum('units_donated'))
+            for group in donations.iterator(chunk_size=REBUILD_BATCH_SIZE):
+                batch.append(DailyDonationRollup(
+                    day=group['donation_date'],
+                    blood_group=group['donor__blood_group'],
+                    city=group['donor__city'] or '',
+                    hospital_id=group['hospital_id'],
+                    center_name=group['donation_center_name'] or '',
+                    donation_count=group['count'],
+                    units_donated=group['units'] or 0,
+                ))
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    flush()
+
+            registrations = Donor.objects.order_by().annotate(day=TruncDate('created_at')).values(
+                'day', 'blood_group', 'city'
+            ).annotate(count=Count('id'))
+            for group in registrations.iterator(chunk_size=REBUILD_BATCH_SIZE):
+                batch.append(DailyDonationRollup(
+                    day=group['day'],
+                    blood_group=group['blood_group'],
+                    city=group['city'] or '',
+                    new_donors=group['count'],
+                ))
+                if len(batch) >= REBUILD_BATCH_SIZE:
+                    flush()
+            flush()
+
+            totals = Donor.objects.order_by().values('blood_group', 'city').annotate(count=Count('id'))
+            DonorCountRollup.objects.bulk_create([
+                DonorCountRollup(blood_group=group['blood_group'], city=group['city'] or '', donors=group['count'])
+                for group in totals
+            ], batch_size=REBUILD_BATCH_SIZE)
+
+        logger.info(f"Rebuilt donation rollup with {created} rows")
+        return created
+
+    @staticmethod
+    def donation_totals(start_date, end_date, month_start, last_month_start, year_start):
+        """Donation counts for the report periods plus the donor total, reading only the days they cover"""
+        totals = DailyDonationRollup.objects.filter(
+            day__gte=min(start_date, last_month_start, year_start), day__lte=max(end_date, timezone.localdate())
+        ).aggregate(
+            range_donations=Sum('donation_count', filter=Q(day__range=[start_date, end_date])),
+            monthly_donations=Sum('donation_count', filter=Q(day__gte=month_start)),
+            last_month_donations=Sum('donation_count', filter=Q(day__gte=last_month_start, day__lt=month_start)),
+            yearly_donations=Sum('donation_count', filter=Q(day__gte=year_start)),
+        )
+        totals['total_donors'] = DonorCountRollup.objects.aggregate(total=Sum('donors'))['total']
+        return {key: value or 0 for key, value in totals.items()}
+
+    @staticmethod
+    def donors_by_blood_group():
+        rows = DonorCountRollup.objects.values('blood_group').annotate(count=Sum('donors'))
+        return {row['blood_group']: row['count'] or 0 for row in rows}
+
+    @staticmethod
+    def donors_by_city(limit=10):
+        return list(
+            DonorCountRollup.objects.exclude(city='').values('city').annotate(
+                count=Sum('donors')
+            ).filter(count__gt=0).order_by('-count')[:limit]
+        )
+
+    @staticmethod
+    def donations_by_center(start_date, end_date, limit=5):
+        """Donations per hospital (joined by FK), falling back to the free-text name for unlinked rows"""
+        return list(
+            DailyDonationRollup.objects.filter(day__range=[start_date, end_date]).annotate(
+                label=Coalesce('hospital__name', 'center_name')
+            ).exclude(label='').values('label').annotate(
+                count=Sum('donation_count')
+            ).filter(count__gt=0).order_by('-count')[:limit]
+        )
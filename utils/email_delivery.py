@@ -0,0 +1,212 @@
+"""
+Bulk email delivery for Blood Donation Management System
+Renders a broadcast once and sends it over pooled SMTP connections from worker threads
+"""
+import concurrent.futures
+import logging
+import smtplib
+import time
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, connection as db_connection
+from django.db.models import F, Q
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from admin_panel.models import EmailBroadcast, EmailDelivery
+from utils.constants import (
+    EMAIL_BATCH_SIZE,
+    EMAIL_DELIVERY_WORKERS,
+    EMAIL_MAX_ATTEMPTS,
+    EMAIL_RETRY_BACKOFF_SECONDS,
+    EMAIL_SENDING_STALE_MINUTES,
+)
+from utils.metrics import EMAIL_DELIVERIES
+
+logger = logging.getLogger(__name__)
+
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=EMAIL_DELIVERY_WORKERS, thread_name_prefix='email-delivery')
+
+# The SMTP session is gone; reopen it instead of failing the rest of the batch
+_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class EmailDeliveryService:
+    """
+    Service class for broadcasts sent to many recipients
+
+    The content is rendered once and stored on an EmailBroadcast; every
+    recipient gets an EmailDelivery row. Queued deliveries are split into
+    batches of EMAIL_BATCH_SIZE; each batch is claimed (queued -> sending) with
+    one conditional UPDATE before it is handed to a worker thread, so two
+    dispatches never send the same row. A worker sends its batch over a single
+    SMTP connection and retries failed recipients with backoff up to
+    EMAIL_MAX_ATTEMPTS times, recording the status, attempt count and last
+    error of each one. Rows left in sending by a crashed worker are picked up
+    again after EMAIL_SENDING_STALE_MINUTES.
+    """
+
+    @staticmethod
+    def is_enabled():
+        return getattr(settings, 'EMAIL_NOTIFICATIONS', False)
+
+    @staticmethod
+    def send_emergency_alert(emergency_request, users):
+        """Email an emergency request to users (rendered once for all of them)"""
+        context = {
+            'emergency': emergency_request,
+            'dashboard_url': settings.SITE_URL.rstrip('/') + reverse('donor:donor_dashboard'),
+        }
+        broadcast, _ = EmailBroadcast.objects.get_or_create(
+            key=f'emergency:{emergency_request.id}',
+            defaults={
+                'subject': f'{settings.EMAIL_SUBJECT_PREFIX}Emergency: {emergency_request.blood_group_needed} blood needed',
+                'body': render_to_string('emails/emergency_request.txt', context),
+                'html_body': render_to_string('emails/emergency_request.html', context),
+            },
+        )
+        return EmailDeliveryService.queue_broadcast(broadcast, users)
+
+    @staticmethod
+    def queue_broadcast(broadcast, users):
+        """
+        Record a delivery per user with an email address and start sending
+
+        Returns:
+            int: recipients queued (users already queued for this broadcast are skipped)
+        """
+        deliveries = [
+            EmailDelivery(broadcast=broadcast, user=user, email=user.email)
+            for user in users if user.email
+        ]
+        EmailDelivery.objects.bulk_create(deliveries, batch_size=EMAIL_BATCH_SIZE, ignore_conflicts=True)
+        EmailDeliveryService.dispatch(broadcast.id)
+        return len(deliveries)
+
+    @staticmethod
+    def dispatch(broadcast_id=None, include_failed=False, wait=False):
+        """
+        Claim batches of pending deliveries and submit them to the worker threads (and with wait, block until sent)
+
+        Pending means queued, or claimed by a dispatch that went stale; with
+        include_failed, also failed with attempts left.
+
+        Returns:
+            int: number of batches submitted
+        """
+        pending = Q(status='queued') | Q(
+            status='sending', claimed_at__lt=timezone.now() - timedelta(minutes=EMAIL_SENDING_STALE_MINUTES)
+        )
+        if include_failed:
+            pending |= Q(status='failed', attempts__lt=EMAIL_MAX_ATTEMPTS)
+        candidates = EmailDelivery.objects.filter(pending)
+        if broadcast_id:
+            candidates = candidates.filter(broadcast_id=broadcast_id)
+        ids = list(candidates.order_by('id').values_list('id', flat=True))
+
+        futures = []
+        for start in range(0, len(ids), EMAIL_BATCH_SIZE):
+            # The WHERE re-checks the status, so rows another dispatch claimed in the meantime are skipped
+            token = uuid.uuid4().hex
+            claimed = candidates.filter(id__in=ids[start:start + EMAIL_BATCH_SIZE]).update(
+                status='sending', claim_token=token, claimed_at=timezone.now()
+            )
+            if claimed:
+                futures.append(_executor.submit(EmailDeliveryService.send_batch, token))
+        if wait:
+            concurrent.futures.wait(futures)
+        return len(futures)
+
+    @staticmethod
+    def send_batch(claim_token):
+        """Send the deliveries one claim took over a single SMTP connection, retrying failures (runs in a worker thread)"""
+        close_old_connections()
+        try:
+            remaining = list(
+                EmailDelivery.objects.filter(claim_token=claim_token, status='sending').select_related('broadcast')
+            )
+            while remaining:
+                failed = EmailDeliveryService._send(remaining)
+                retry = [delivery for delivery in failed if delivery.attempts < EMAIL_MAX_ATTEMPTS]
+                if retry:
+                    time.sleep(EMAIL_RETRY_BACKOFF_SECONDS * 2 ** (retry[0].attempts - 1))
+                remaining = retry
+        except Exception as e:
+            logger.error(f'Email batch {claim_token} failed: {e}', exc_info=True)
+        finally:
+            db_connection.close()
+
+    @staticmethod
+    def _send(deliveries):
+        """Send each delivery once over one connection and store the outcome; returns the failures"""
+        sent, failed = [], []
+        mail_connection = get_connection(fail_silently=False)
+        try:
+            mail_connection.open()
+            for delivery in deliveries:
+                delivery.attempts += 1
+                try:
+                    # One message per call so every recipient gets its own outcome
+                    mail_connection.send_messages([EmailDeliveryService._message(delivery, mail_connection)])
+                    sent.append(delivery)
+                except smtplib.SMTPRecipientsRefused as e:
+                    # The server rejected the address; retrying will not change that
+                    delivery.attempts = EMAIL_MAX_ATTEMPTS
+                    delivery.last_error = str(e)
+                    failed.append(delivery)
+                except _CONNECTION_ERRORS as e:
+                    delivery.last_error = str(e)
+                    failed.append(delivery)
+                    mail_connection.close()
+                    mail_connection.open()
+                except Exception as e:
+                    delivery.last_error = str(e)
+                    failed.append(delivery)
+        except Exception as e:
+            # Could not (re)connect: everything not sent yet counts as a failed attempt
+            logger.warning(f'SMTP connection failed: {e}')
+            done = {delivery.id for delivery in sent + failed}
+            for delivery in deliveries:
+                if delivery.id not in done:
+                    delivery.attempts += 1
+                    delivery.last_error = str(e)
+                    failed.append(delivery)
+        finally:
+            mail_connection.close()
+
+        now = timezone.now()
+        if sent:
+            EmailDelivery.objects.filter(id__in=[delivery.id for delivery in sent]).update(
+                status='sent', sent_at=now, attempts=F('attempts') + 1, last_error=''
+            )
+            EMAIL_DELIVERIES.inc(len(sent), outcome='sent')
+        for delivery in failed:
+            # Rows this worker will retry stay claimed so no other dispatch picks them up in between
+            EmailDelivery.objects.filter(id=delivery.id).update(
+                status='sending' if delivery.attempts < EMAIL_MAX_ATTEMPTS else 'failed',
+                attempts=delivery.attempts, last_error=delivery.last_error[:1000]
+            )
+        if failed:
+            EMAIL_DELIVERIES.inc(len(failed), outcome='failed')
+        return failed
+
+    @staticmethod
+    def _message(delivery, mail_connection):
+        broadcast = delivery.broadcast
+        message = EmailMultiAlternatives(
+            broadcast.subject, broadcast.body, settings.DEFAULT_FROM_EMAIL, [delivery.email],
+            connection=mail_connection,
+        )
+        if broadcast.html_body:
+            message.attach_alternative(broadcast.html_body, 'text/html')
+        return message
+
+    @staticmethod
+    def status(broadcast_id):
+        """Recipient counts per delivery status for one broadcast"""
+        from django.db.models import Count
+
+        rows = EmailDelivery.objects.filter(broadcast_id=broadcast_id).values('status').annotate(total=Count('id'))
+        return {row['status']: row['total'] for row in rows}
@@ -0,0 +1,183 @@
+"""
+Background export jobs for Blood Donation Management System
+Large CSV exports and reports are generated in a worker thread and stored under MEDIA_ROOT
+"""
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+from admin_panel.models import ExportJob
+from utils.constants import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_JOB_DEDUP_MINUTES,
+    EXPORT_JOB_STALE_MINUTES,
+    EXPORT_JOB_TTL_HOURS,
+    EXPORT_JOB_WORKERS,
+)
+from utils.metrics import EXPORT_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# Filters that affect export contents; anything else in the query string is ignored
+EXPORT_FILTER_KEYS = ('search', 'blood_group', 'city')
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix='export-job')
+
+
+class ExportJobService:
+    """Service class to queue, run and expire export jobs"""
+
+    @staticmethod
+    def normalize_parameters(params):
+        """Keep only the filters that change the export output"""
+        return {key: params.get(key, '') for key in EXPORT_FILTER_KEYS if params.get(key, '')}
+
+    @staticmethod
+    def parameters_hash(export_type, parameters):
+        payload = json.dumps({'type': export_type, 'params': parameters}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def request_export(export_type, params, user=None):
+        """
+        Queue an export, reusing an identical pending/running or recently finished job
+
+        Returns:
+            tuple: (job, created)
+        """
+        parameters = ExportJobService.normalize_parameters(params)
+        parameters_hash = ExportJobService.parameters_hash(export_type, parameters)
+        now = timezone.now()
+
+        in_flight = ExportJob.objects.filter(
+            parameters_hash=parameters_hash,
+            status__in=['pending', 'running'],
+        ).first()
+        if in_flight:
+            return in_flight, False
+
+        recent = ExportJob.objects.filter(
+            parameters_hash=parameters_hash,
+            status='completed',
+            completed_at__gte=now - timedelta(minutes=EXPORT_JOB_DEDUP_MINUTES),
+            expires_at__gt=now,
+        ).first()
+        if recent and recent.file and os.path.exists(recent.file.path):
+            return recent, False
+
+        try:
+            with transaction.atomic():
+                job = ExportJob.objects.create(
+                    export_type=export_type,
+                    parameters=parameters,
+                    parameters_hash=parameters_hash,
+                    requested_by=user,
+                )
+        except IntegrityError:
+            # A simultaneous request queued the same export first (exportjob_one_in_flight)
+            in_flight = ExportJob.objects.filter(
+                parameters_hash=parameters_hash, status__in=['pending', 'running'],
+            ).first()
+            if in_flight:
+                return in_flight, False
+            return ExportJobService.request_export(export_type, params, user)
+        EXPORT_QUEUE_DEPTH.inc()
+        _executor.submit(ExportJobService.run_job, job.id)
+        return job, True
+
+    @staticmethod
+    def run_job(job_id):
+        """Generate the artifact for a job (runs in a worker thread)"""
+        EXPORT_QUEUE_DEPTH.dec()
+        close_old_connections()
+        try:
+            job = ExportJob.objects.get(id=job_id)
+            job.status = 'running'
+            job.started_at = timezone.now()
+            job.save(update_fields=['status', 'started_at'])
+
+            export_dir = os.path.join(settings.MEDIA_ROOT, 'exports')
+            os.makedirs(export_dir, exist_ok=True)
+
+            if job.export_type == 'report':
+                relative_path = ExportJobService._write_report(job, export_dir)
+            else:
+                relative_path = ExportJobService._write_csv(job, export_dir)
+
+            job.file.name = relative_path
+            job.file_size = os.path.getsize(job.file.path)
+            job.status = 'completed'
+            job.completed_at = timezone.now()
+            job.expires_at = job.completed_at + timedelta(hours=EXPORT_JOB_TTL_HOURS)
+            job.save(update_fields=['file', 'file_size', 'status', 'completed_at', 'expires_at',
+                                   'rows_total', 'rows_written'])
+            logger.info(f"Export job {job.id} ({job.export_type}) completed: {job.file_size} bytes")
+        except Exception as e:
+            logger.error(f"Export job {job_id} failed: {e}", exc_info=True)
+            ExportJob.objects.filter(id=job_id).update(
+                status='failed', error_message=str(e), completed_at=timezone.now()
+            )
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _write_csv(job, export_dir):
+        from admin_panel.exports import CSV_EXPORTS
+
+        header, build_queryset, build_rows = CSV_EXPORTS[job.export_type]
+        queryset = build_queryset(job.parameters)
+        job.rows_total = queryset.count()
+        ExportJob.objects.filter(id=job.id).update(rows_total=job.rows_total)
+
+        filename = f"{job.export_type}_{job.id}.csv.gz"
+        with gzip.open(os.path.join(export_dir, filename), 'wt', newline='', encoding='utf-8') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(header)
+            for written, row in enumerate(build_rows(queryset), start=1):
+                writer.writerow(row)
+                if written % EXPORT_CHUNK_SIZE == 0:
+                    ExportJob.objects.filter(id=job.id).update(rows_written=written)
+                job.rows_written = written
+        return f"exports/{filename}"
+
+    @staticmethod
+    def _write_report(job, export_dir):
+        import shutil
+        from utils.report_cache import ReportCache
+
+        # PDFs are already compressed internally, so the report is stored as-is
+        source_path, _, extension = ReportCache.get_report()
+        filename = f"report_{job.id}.{extension}"
+        shutil.copyfile(source_path, os.path.join(export_dir, filename))
+        job.rows_total = job.rows_written = 1
+        return f"exports/{filename}"
+
+    @staticmethod
+    def cleanup_expired_jobs():
+        """Delete artifacts past their expiry and fail jobs whose worker died"""
+        now = timezone.now()
+        expired_count = 0
+
+        for job in ExportJob.objects.filter(status='completed', expires_at__lte=now):
+            if job.file:
+                try:
+                    job.file.delete(save=False)
+                except OSError as e:
+                    logger.warning(f"Could not delete export file for job {job.id}: {e}")
+            job.status = 'expired'
+            job.save(update_fields=['file', 'status'])
+            expired_count += 1
+
+        stale_count = ExportJob.objects.filter(
+            status__in=['pending', 'running'],
+            created_at__lt=now - timedelta(minutes=EXPORT_JOB_STALE_MINUTES),
+        ).update(status='failed', error_message='Export worker did not finish in time', completed_at=now)
+
+        return expired_count, stale_count
@@ -0,0 +1,78 @@
+"""
+Local HTTP gateway stub for Blood Donation Management System
+Accepts SMS and webhook POSTs without forwarding them, for exercising the gateway channels end to end
+"""
+import hashlib
+import hmac
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class GatewayStub:
+    """
+    Minimal threaded HTTP server on 127.0.0.1
+
+    Every POST is answered 200 and counted: SMS messages by the entries in a
+    bulk {"messages": [...]} body (1 for a single {"to", "body"}). With secret
+    set, webhook bodies must carry a valid X-Signature. The first fail_requests
+    requests get fail_status instead, to exercise adapter retries and
+    failed deliveries.
+    """
+
+    def __init__(self, port=0, fail_requests=0, fail_status=503, secret=''):
+        self.requests = 0
+        self.messages = 0
+        self.bad_signatures = 0
+        self.fail_requests = fail_requests
+        self.fail_status = fail_status
+        self.secret = secret
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status = stub._handle(body, self.headers)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', port), Handler)
+        self.port = self.server.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}/'
+
+    def _handle(self, body, headers):
+        """Count one request; returns the HTTP status to answer with"""
+        with self._lock:
+            self.requests += 1
+            if self.requests <= self.fail_requests:
+                return self.fail_status
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                return 400
+            if self.secret and 'event' in payload:
+                expected = hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+                if not hmac.compare_digest(headers.get('X-Signature', ''), f'sha256={expected}'):
+                    self.bad_signatures += 1
+                    return 401
+            self.messages += len(payload['messages']) if 'messages' in payload else 1
+            return 200
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -3,6 +3,7 @@ import time
 from typing import Dict, List, Optional, Tuple
 from django.core.cache import cache
 import logging
+from utils.metrics import GEOCODING_CACHE, GEOCODING_LATENCY, GEOCODING_REQUESTS
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +22,23 @@ class GeocodingService:
             'User-Agent': 'BloodDonationSystem/1.0 (Contact: admin@bloodbank.com)'
         })
     
+    def _upstream_get(self, endpoint: str, params: Dict):
+        """Call the provider, recording call counts and latency per endpoint"""
+        started = time.perf_counter()
+        try:
+            response = self.session.get(f"{self.BASE_URL}/{endpoint}", params=params, timeout=10)
+        except Exception:
+            GEOCODING_REQUESTS.inc(endpoint=endpoint, outcome='error')
+            raise
+        finally:
+            GEOCODING_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+        GEOCODING_REQUESTS.inc(endpoint=endpoint, outcome='ok' if response.status_code == 200 else f'http_{response.status_code}')
+        return response
+
+    @staticmethod
+    def _record_cache(endpoint: str, cached_result) -> None:
+        GEOCODING_CACHE.inc(endpoint=endpoint, result='hit' if cached_result else 'miss')
+
     def geocode(self, address: str, country: str = "Nepal") -> Optional[Dict]:
         """
         Convert address to coordinates
@@ -37,6 +55,7 @@ class GeocodingService:
         
         # Check cache first
         cached_result = cache.get(cache_key)
+        self._record_cache('geocode', cached_result)
         if cached_result:
             return cached_result
         
@@ -49,11 +68,7 @@ class GeocodingService:
                 'countrycodes': self._get_country_code(country)
             }
             
-            response = self.session.get(
-                f"{self.BASE_URL}/search",
-                params=params,
-                timeout=10
-            )
+            response = self._upstream_get('search', params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -93,6 +108,7 @@ class GeocodingService:
         
         # Check cache first
         cached_result = cache.get(cache_key)
+        self._record_cache('reverse', cached_result)
         if cached_result:
             return cached_result
         
@@ -107,11 +123,7 @@ class GeocodingService:
                 'namedetails': 1
             }
             
-            response = self.session.get(
-                f"{self.BASE_URL}/reverse",
-                params=params,
-                timeout=10
-            )
+            response = self._upstream_get('reverse', params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -185,6 +197,7 @@ class GeocodingService:
         
         # Check cache first
         cached_result = cache.get(cache_key)
+        self._record_cache('suggestions', cached_result)
         if cached_result:
             return cached_result
         
@@ -197,11 +210,7 @@ class GeocodingService:
                 'countrycodes': self._get_country_code(country)
             }
             
-            response = self.session.get(
-                f"{self.BASE_URL}/search",
-                params=params,
-                timeout=10
-            )
+            response = self._upstream_get('search', params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -0,0 +1,207 @@
+"""
+Hospital matching for Blood Donation Management System
+Resolves free-text donation center names to Hospital rows
+"""
+import re
+import logging
+from difflib import SequenceMatcher
+from django.db import transaction
+from django.utils import timezone
+from utils.cache_tags import TAG_DONATIONS, TaggedCache, hospital_tag
+from utils.constants import HOSPITAL_MATCH_AUTO_THRESHOLD, HOSPITAL_MATCH_REVIEW_THRESHOLD
+from utils.outbox import Outbox
+
+logger = logging.getLogger(__name__)
+
+# Words that appear in most center names and carry no identifying value
+NAME_STOPWORDS = {
+    'the', 'hospital', 'hospitals', 'hosp', 'center', 'centre', 'ctr', 'blood', 'bank',
+    'clinic', 'and', 'of', 'pvt', 'ltd',
+}
+
+
+def normalize_center_name(name):
+    """Lowercase, strip punctuation and generic words"""
+    tokens = re.findall(r'[a-z0-9]+', (name or '').lower())
+    return ' '.join(token for token in tokens if token not in NAME_STOPWORDS)
+
+
+class HospitalMatcher:
+    """Fuzzy matcher scoring center names against all hospitals loaded once"""
+
+    def __init__(self, hospitals=None):
+        from donor.models import Hospital
+
+        if hospitals is None:
+            hospitals = Hospital.objects.values_list('id', 'name', 'city')
+        self.candidates = []
+        self.exact = {}
+        for hospital_id, name, city in hospitals:
+            normalized = normalize_center_name(name)
+            self.candidates.append((hospital_id, normalized, set(normalized.split()), (city or '').lower()))
+            self.exact.setdefault(name.strip().lower(), hospital_id)
+
+    def best_match(self, center_name):
+        """
+        Find the most similar hospital
+
+        Returns:
+            tuple: (hospital_id or None, score between 0 and 1)
+        """
+        if not center_name:
+            return None, 0.0
+        if center_name.strip().lower() in self.exact:
+            return self.exact[center_name.strip().lower()], 1.0
+
+        normalized = normalize_center_name(center_name)
+        if not normalized:
+            return None, 0.0
+        tokens = set(normalized.split())
+
+        best_id, best_score = None, 0.0
+        for hospital_id, candidate, candidate_tokens, city in self.candidates:
+            if not candidate:
+                continue
+            ratio = SequenceMatcher(None, normalized, candidate).ratio()
+            overlap = len(tokens & candidate_tokens) / len(tokens | candidate_tokens)
+            score = max(ratio, overlap)
+            # A center name mentioning the hospital's city is a weak tie-breaker
+            if city and city in normalized:
+                score = min(1.0, score + 0.05)
+            if score > best_score:
+                best_id, best_score = hospital_id, score
+        return best_id, round(best_score, 3)
+
+    @staticmethod
+    def apply_mapping(center_name, hospital_id):
+        """Link every unlinked donation with this center name to a hospital"""
+        from donor.models import DailyDonationRollup, DonationHistory
+
+        with transaction.atomic():
+            donation_ids = list(DonationHistory.objects.filter(
+                hospital__isnull=True, donation_center_name=center_name
+            ).values_list('id', flat=True))
+            updated = 0
+            for start in range(0, len(donation_ids), 500):
+                updated += DonationHistory.objects.filter(id__in=donation_ids[start:start + 500]).update(
+                    hospital_id=hospital_id, updated_at=timezone.now()
+                )
+            # Queryset updates skip the signals that write outbox events
+            Outbox.record_bulk(DonationHistory, donation_ids)
+            # Rollup cells are keyed by the same center name, so they move with the donations
+            DailyDonationRollup.objects.filter(
+                hospital__isnull=True, center_name=center_name
+            ).update(hospital_id=hospital_id)
+        if updated:
+            # Queryset updates skip the model signals that invalidate cache tags
+            TaggedCache.invalidate_tags(TAG_DONATIONS, hospital_tag(hospital_id))
+        return updated
+
+    @staticmethod
+    def link_from_requests():
+        """Link donations recorded from a donation request to that request's hospital"""
+        from donor.models import DonationHistory, DonationRequest
+
+        request_hospitals = dict(
+            DonationRequest.objects.filter(hospital__isnull=False, status='completed').values_list('id', 'hospital_id')
+        )
+        if not request_hospitals:
+            return 0
+
+        by_hospital = {}
+        rows = DonationHistory.objects.filter(
+            hospital__isnull=True, notes__startswith='Completed from request #'
+        ).values_list('id', 'notes')
+        for donation_id, notes in rows.iterator():
+            found = re.match(r'Completed from request #(\d+)', notes)
+            hospital_id = request_hospitals.get(int(found.group(1))) if found else None
+            if hospital_id:
+                by_hospital.setdefault(hospital_id, []).append(donation_id)
+
+        linked = 0
+        with transaction.atomic():
+            for hospital_id, donation_ids in by_hospital.items():
+                for start in range(0, len(donation_ids), 500):
+                    linked += DonationHistory.objects.filter(id__in=donation_ids[start:start + 500]).update(
+                        hospital_id=hospital_id, updated_at=timezone.now()
+                    )
+                Outbox.record_bulk(DonationHistory, donation_ids)
+        if linked:
+            TaggedCache.invalidate_tags(TAG_DONATIONS, *[hospital_tag(hospital_id) for hospital_id in by_hospital])
+        return linked
+
+    def backfill(self, auto_threshold=HOSPITAL_MATCH_AUTO_THRESHOLD,
+                 review_threshold=HOSPITAL_MATCH_REVIEW_THRESHOLD, dry_run=False):
+        """
+        Resolve every distinct unlinked center name once, link confident matches
+        and queue the rest for review
+
+        Returns:
+            dict with counts of names/donations linked and names queued
+        """
+        from donor.models import CenterNameReview, DonationHistory
+        from django.db.models import Count
+
+        names = DonationHistory.objects.filter(hospital__isnull=True).exclude(donation_center_name='').values(
+            'donation_center_name'
+        ).annotate(count=Count('id')).order_by('-count')
+
+        result = {'names_linked': 0, 'donations_linked': 0, 'names_queued': 0}
+        for row in names:
+            center_name, count = row['donation_center_name'], row['count']
+            hospital_id, score = self.best_match(center_name)
+
+            if hospital_id and score >= auto_threshold:
+                result['names_linked'] += 1
+                result['donations_linked'] += count if dry_run else self.apply_mapping(center_name, hospital_id)
+                continue
+
+            result['names_queued'] += 1
+            if not dry_run:
+                CenterNameReview.objects.update_or_create(
+                    center_name=center_name,
+                    defaults={
+                        'suggested_hospital_id': hospital_id if score >= review_threshold else None,
+                        'match_score': score,
+                        'donation_count': count,
+                    },
+                )
+        logger.info(f"Center backfill: {result}")
+        return result
+
+
+def resolve_donation_hospital(donation_request=None, user=None, center_name=''):
+    """
+    Pick the Hospital a new DonationHistory row belongs to: the request's hospital,
+    then a confident match on the center name the admin typed, then the recording
+    admin's hospital when no center name was given
+
+    A typed center name that matches no hospital leaves the donation unlinked
+    rather than crediting the admin's own hospital; backfill queues it for review.
+    """
+    from donor.models import Hospital
+
+    if donation_request is not None and donation_request.hospital_id:
+        return donation_request.hospital
+
+    admin_hospital = None
+    if user is not None:
+        try:
+            admin_hospital = user.hospital
+        except Hospital.DoesNotExist:
+            pass
+
+    center_name = (center_name or '').strip()
+    if not center_name:
+        return admin_hospital
+
+    # The admin's hospital wins a tie with similarly named hospitals elsewhere
+    if admin_hospital is not None:
+        own = HospitalMatcher([(admin_hospital.id, admin_hospital.name, admin_hospital.city)])
+        _, score = own.best_match(center_name)
+        if score >= HOSPITAL_MATCH_AUTO_THRESHOLD:
+            return admin_hospital
+    hospital_id, score = HospitalMatcher().best_match(center_name)
+    if hospital_id and score >= HOSPITAL_MATCH_AUTO_THRESHOLD:
+        return Hospital.objects.get(id=hospital_id)
+    return None
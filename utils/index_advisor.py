@@ -0,0 +1,282 @@
+"""
+Index advisor for Blood Donation Management System
+Replays a captured query workload through EXPLAIN and reports missing and unused indexes
+"""
+import ast
+import json
+import logging
+import re
+from django.apps import apps
+from utils.query_inspector import fingerprint_sql
+
+logger = logging.getLogger(__name__)
+
+# Views replayed on top of the benchmark scenarios when capturing a workload
+ADVISOR_EXTRA_SCENARIOS = {
+    'donor_notifications': ('donor:all_notifications', 'donor'),
+    'donor_emergencies': ('donor:emergency_requests', 'donor'),
+    'admin_notifications': ('admin_panel:all_notifications', 'admin'),
+    'manage_requests': ('admin_panel:manage_requests', 'admin'),
+}
+
+_ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?([A-Z]\d+)\b')
+# Column compared to a value; joins ("a"."x" = "b"."y") are not filters
+_PREDICATE = re.compile(r'"(\w+)"\."(\w+)"\s*(=|IN\b|IS\b|>=|<=|>|<|LIKE\b|BETWEEN\b)(?!\s*")', re.IGNORECASE)
+_ORDER_BY = re.compile(r'ORDER BY (.+?)(?: LIMIT | OFFSET |\)|$)', re.IGNORECASE | re.DOTALL)
+_ORDER_COLUMN = re.compile(r'"(\w+)"\."(\w+)"(\s+DESC)?', re.IGNORECASE)
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: USING (?:COVERING )?INDEX (\w+))?')
+_SQLITE_SEARCH = re.compile(r'^SEARCH (\w+) USING (?:COVERING |INTEGER PRIMARY KEY|PRIMARY KEY)?\s*(?:INDEX (\w+))?')
+_PG_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+_PG_INDEX_SCAN = re.compile(r'Index(?: Only)? Scan(?: Backward)? using (\w+) on (\w+)')
+_PG_BITMAP = re.compile(r'Bitmap Index Scan on (\w+)')
+
+EQUALITY_OPERATORS = ('=', 'IN', 'IS')
+
+
+def _parse_param(value):
+    # Slow query log parameters are stored as repr() strings
+    if not isinstance(value, str):
+        return value
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value.strip("'")
+
+
+def load_workload(path):
+    """Read {'sql', 'params'} records from an NDJSON file (slow query log or a saved capture)"""
+    workload = []
+    with open(path, encoding='utf-8', errors='replace') as source:
+        for line in source:
+            line = line.strip()
+            if not line.startswith('{'):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('many') or 'sql' not in entry:
+                continue
+            workload.append({
+                'sql': entry['sql'],
+                'params': [_parse_param(value) for value in entry.get('params') or []],
+                'source': entry.get('call_site') or entry.get('source') or path,
+            })
+    return workload
+
+
+def capture_workload(users, scenarios=None):
+    """
+    Run the benchmark scenarios (plus a few list views) and record every SELECT they issue
+
+    Args:
+        users: {'donor': User, 'admin': User} to log in as
+    """
+    from django.db import connection
+    from django.test import Client
+    from utils.benchmarks import BENCHMARK_SCENARIOS, _request
+
+    plan = {name: (url, method, payload, role) for name, (url, method, payload, role) in BENCHMARK_SCENARIOS.items()}
+    plan.update({name: (url, 'get', None, role) for name, (url, role) in ADVISOR_EXTRA_SCENARIOS.items()})
+
+    workload = []
+    current = {'source': None}
+
+    def capture(execute, sql, params, many, context):
+        if not many and sql.lstrip()[:6].upper() == 'SELECT':
+            workload.append({'sql': sql, 'params': list(params or []), 'source': current['source']})
+        return execute(sql, params, many, context)
+
+    clients = {}
+    for name, (url_name, method, payload, role) in plan.items():
+        if scenarios and name not in scenarios:
+            continue
+        client = clients.get(role)
+        if client is None:
+            client = clients[role] = Client()
+            client.force_login(users[role])
+        current['source'] = name
+        with connection.execute_wrapper(capture):
+            try:
+                _request(client, url_name, method, payload)
+            except Exception as e:
+                logger.warning(f'Scenario {name} failed during capture: {e}')
+    return workload
+
+
+def save_workload(workload, path):
+    with open(path, 'w') as target:
+        for entry in workload:
+            target.write(json.dumps(entry, default=str) + '\n')
+
+
+class IndexAdvisor:
+    """
+    Explain every distinct query shape in a workload and derive index suggestions
+
+    A table read by a full scan while the query filters it on known columns
+    gets an index suggestion (equality columns first, then range and ORDER BY
+    columns). Existing indexes never chosen by any plan are reported as unused.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.tables = self._project_tables()
+        self.existing = self._existing_indexes()
+        self.used_indexes = set()
+        self.suggestions = {}
+        self.explained = 0
+        self.failed = 0
+
+    def _project_tables(self):
+        tables = {}
+        for model in apps.get_models():
+            if model._meta.app_label in ('donor', 'admin_panel', 'accounts'):
+                tables[model._meta.db_table] = model
+        return tables
+
+    def _existing_indexes(self):
+        """{table: {index name: (columns, unique)}} for the project's tables"""
+        existing = {}
+        with self.connection.cursor() as cursor:
+            table_names = set(self.connection.introspection.table_names(cursor))
+            for table in self.tables:
+                if table not in table_names:
+                    continue
+                constraints = self.connection.introspection.get_constraints(cursor, table)
+                existing[table] = {
+                    name: (tuple(info['columns']), bool(info['unique']))
+                    for name, info in constraints.items()
+                    if (info['index'] or info['unique']) and not info['primary_key'] and info['columns']
+                }
+        return existing
+
+    def analyze(self, workload):
+        shapes = {}
+        for entry in workload:
+            shape = shapes.setdefault(fingerprint_sql(entry['sql']), {'entry': entry, 'count': 0, 'sources': set()})
+            shape['count'] += 1
+            if entry.get('source'):
+                shape['sources'].add(str(entry['source']))
+
+        for fingerprint, shape in shapes.items():
+            plan = self._explain(shape['entry'])
+            if plan is None:
+                self.failed += 1
+                continue
+            self.explained += 1
+            self._inspect_plan(fingerprint, shape, plan)
+        return self
+
+    def _explain(self, entry):
+        prefix = 'EXPLAIN QUERY PLAN ' if self.connection.vendor == 'sqlite' else 'EXPLAIN '
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(prefix + entry['sql'], entry['params'] or None)
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.debug(f'Could not explain query: {e}')
+            return None
+        if self.connection.vendor == 'sqlite':
+            return [row[-1] for row in rows]
+        return [' '.join(str(column) for column in row) for row in rows]
+
+    def _full_scans(self, plan, aliases):
+        """Tables read without an index, and every index the plan does use"""
+        scanned = set()
+        sorts = False
+        for line in plan:
+            detail = line.strip()
+            if self.connection.vendor == 'sqlite':
+                scan = _SQLITE_SCAN.match(detail)
+                search = _SQLITE_SEARCH.match(detail)
+                if scan:
+                    table = aliases.get(scan.group(1), scan.group(1))
+                    if scan.group(2):
+                        self.used_indexes.add(scan.group(2))
+                    else:
+                        scanned.add(table)
+                elif search and search.group(2):
+                    self.used_indexes.add(search.group(2))
+                if 'USE TEMP B-TREE FOR ORDER BY' in detail:
+                    sorts = True
+            else:
+                for match in _PG_SEQ_SCAN.finditer(detail):
+                    scanned.add(match.group(1))
+                for match in _PG_INDEX_SCAN.finditer(detail):
+                    self.used_indexes.add(match.group(1))
+                for match in _PG_BITMAP.finditer(detail):
+                    self.used_indexes.add(match.group(1))
+                if detail.lstrip('-> ').startswith('Sort'):
+                    sorts = True
+        return scanned, sorts
+
+    def _inspect_plan(self, fingerprint, shape, plan):
+        sql = shape['entry']['sql']
+        aliases = {alias: table for table, alias in _ALIAS.findall(sql)}
+        scanned, sorts = self._full_scans(plan, aliases)
+
+        predicates = {}
+        for table, column, operator in _PREDICATE.findall(sql):
+            table = aliases.get(table, table)
+            kind = 'eq' if operator.upper() in EQUALITY_OPERATORS else 'range'
+            columns = predicates.setdefault(table, {})
+            if columns.get(column) != 'eq':
+                columns[column] = kind
+
+        order_columns = {}
+        if sorts:
+            match = _ORDER_BY.search(sql)
+            if match:
+                for table, column, descending in _ORDER_COLUMN.findall(match.group(1)):
+                    order_columns.setdefault(aliases.get(table, table), []).append(('-' if descending else '') + column)
+
+        # A sort over rows already found through an index is cheap; only full scans get suggestions
+        for table in scanned:
+            if table not in self.tables:
+                continue
+            filters = predicates.get(table, {})
+            columns = [column for column, kind in filters.items() if kind == 'eq']
+            columns += [column for column, kind in filters.items() if kind == 'range' and column not in columns]
+            columns += [column for column in order_columns.get(table, []) if column.lstrip('-') not in columns]
+            if not columns or self._covered(table, columns):
+                continue
+            key = (table, tuple(columns))
+            suggestion = self.suggestions.setdefault(key, {
+                'table': table, 'columns': columns, 'queries': 0, 'shapes': [], 'sources': set(), 'sample': sql,
+            })
+            suggestion['queries'] += shape['count']
+            suggestion['shapes'].append(fingerprint)
+            suggestion['sources'] |= shape['sources']
+
+    def _covered(self, table, columns):
+        wanted = tuple(column.lstrip('-') for column in columns)
+        for index_columns, _ in self.existing.get(table, {}).values():
+            if index_columns[:len(wanted)] == wanted:
+                return True
+        return False
+
+    def missing_indexes(self):
+        """Suggestions ordered by how many captured queries would benefit"""
+        results = []
+        for suggestion in self.suggestions.values():
+            model = self.tables[suggestion['table']]
+            fields = []
+            for column in suggestion['columns']:
+                name = column.lstrip('-')
+                field = next((f.name for f in model._meta.concrete_fields if f.column == name), name)
+                fields.append(('-' if column.startswith('-') else '') + field)
+            results.append({**suggestion, 'model': f'{model._meta.app_label}.{model.__name__}', 'fields': fields})
+        return sorted(results, key=lambda suggestion: suggestion['queries'], reverse=True)
+
+    def unused_indexes(self):
+        """Non-unique indexes on project tables that no plan in the workload chose"""
+        unused = []
+        for table, indexes in self.existing.items():
+            # Single-column foreign key indexes serve joins and cascading deletes, not just reads
+            fk_columns = {(field.column,) for field in self.tables[table]._meta.concrete_fields if field.is_relation}
+            for name, (columns, unique) in indexes.items():
+                if unique or name in self.used_indexes or columns in fk_columns:
+                    continue
+                unused.append({'table': table, 'index': name, 'columns': list(columns)})
+        return sorted(unused, key=lambda item: (item['table'], item['index']))
@@ -0,0 +1,205 @@
+"""
+Cross-hospital inventory rebalancing for Blood Donation Management System
+Suggests blood unit transfers between hospitals to cover active emergencies
+"""
+import math
+import logging
+from collections import defaultdict
+from utils.constants import (
+    CAN_RECEIVE_FROM,
+    EARTH_RADIUS_KM,
+    REBALANCE_MAX_TRANSFER_DISTANCE_KM,
+    REBALANCE_SAFETY_STOCK_UNITS,
+    REBALANCE_SUBSTITUTION_PENALTY_KM,
+    URGENCY_RESPONSE_TIME,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometers between two coordinates"""
+    lat1, lng1, lat2, lng2 = map(math.radians, [lat1, lng1, lat2, lng2])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class InventoryRebalancer:
+    """
+    Greedy min-cost transfer planner.
+
+    Every hospital contributes a supply vector (units above its safety stock that
+    are not needed locally) and a shortfall vector (active emergency units it
+    cannot cover from its own stock). Shortfalls are served most urgent first,
+    each from the cheapest compatible source, where cost is the transfer distance
+    plus a fixed penalty when a substitute blood group is used.
+    """
+
+    def __init__(self, safety_stock=REBALANCE_SAFETY_STOCK_UNITS,
+                 max_distance_km=REBALANCE_MAX_TRANSFER_DISTANCE_KM,
+                 substitution_penalty_km=REBALANCE_SUBSTITUTION_PENALTY_KM):
+        self.safety_stock = safety_stock
+        self.max_distance_km = max_distance_km
+        self.substitution_penalty_km = substitution_penalty_km
+
+    def solve(self, hospitals, inventory, needs):
+        """
+        Compute transfer suggestions from plain data
+
+        Args:
+            hospitals: dict of hospital_id -> {'name', 'city', 'latitude', 'longitude'}
+            inventory: dict of (hospital_id, blood_group) -> usable units
+            needs: list of dicts with 'hospital_id', 'blood_group', 'units',
+                   'urgency_level', 'required_by' and optional 'emergency_id'
+
+        Returns:
+            dict with 'transfers' (list) and 'unmet' (list of remaining shortfalls)
+        """
+        # Aggregate local demand so that a hospital never ships out what it needs itself
+        local_need = defaultdict(float)
+        for need in needs:
+            local_need[(need['hospital_id'], need['blood_group'])] += need['units']
+
+        supply = {}
+        own_stock = {}
+        for key, units in inventory.items():
+            spare = units - local_need.get(key, 0) - self.safety_stock
+            if spare > 0:
+                supply[key] = spare
+            own_stock[key] = min(units, local_need.get(key, 0))
+
+        suppliers_by_group = defaultdict(list)
+        for hospital_id, blood_group in supply:
+            suppliers_by_group[blood_group].append(hospital_id)
+
+        coords = {
+            hospital_id: (float(info['latitude']), float(info['longitude']))
+            for hospital_id, info in hospitals.items()
+            if info.get('latitude') is not None and info.get('longitude') is not None
+        }
+        distance_cache = {}
+
+        def distance(a, b):
+            if a == b:
+                return 0.0
+            key = (a, b) if a < b else (b, a)
+            if key not in distance_cache:
+                if a in coords and b in coords:
+                    distance_cache[key] = haversine_km(*coords[a], *coords[b])
+                else:
+                    distance_cache[key] = None
+            return distance_cache[key]
+
+        urgency_rank = {level: rank for rank, level in enumerate(
+            sorted(URGENCY_RESPONSE_TIME, key=URGENCY_RESPONSE_TIME.get)
+        )}
+        ordered_needs = sorted(
+            needs,
+            key=lambda n: (urgency_rank.get(n['urgency_level'], len(urgency_rank)), n['required_by'])
+        )
+
+        transfers = []
+        unmet = []
+        for need in ordered_needs:
+            hospital_id = need['hospital_id']
+            blood_group = need['blood_group']
+
+            # Serve from the hospital's own exact-match stock first
+            own_key = (hospital_id, blood_group)
+            remaining = need['units']
+            covered = min(remaining, own_stock.get(own_key, 0))
+            own_stock[own_key] = own_stock.get(own_key, 0) - covered
+            remaining -= covered
+            if remaining <= 0:
+                continue
+
+            candidates = []
+            for source_group in CAN_RECEIVE_FROM.get(blood_group, [blood_group]):
+                penalty = 0.0 if source_group == blood_group else self.substitution_penalty_km
+                for source_id in suppliers_by_group.get(source_group, ()):
+                    if supply.get((source_id, source_group), 0) <= 0:
+                        continue
+                    km = distance(source_id, hospital_id)
+                    if km is None or km > self.max_distance_km:
+                        continue
+                    candidates.append((km + penalty, km, source_id, source_group))
+            candidates.sort()
+
+            for cost, km, source_id, source_group in candidates:
+                source_key = (source_id, source_group)
+                units = min(remaining, supply[source_key])
+                supply[source_key] -= units
+                remaining -= units
+                transfers.append({
+                    'from_hospital_id': source_id,
+                    'from_hospital': hospitals.get(source_id, {}).get('name', ''),
+                    'to_hospital_id': hospital_id,
+                    'to_hospital': hospitals.get(hospital_id, {}).get('name', ''),
+                    'emergency_id': need.get('emergency_id'),
+                    'blood_group_needed': blood_group,
+                    'blood_group_sent': source_group,
+                    'is_substitute': source_group != blood_group,
+                    'units': units,
+                    'distance_km': round(km, 2),
+                    'cost': round(cost, 2),
+                    'urgency_level': need['urgency_level'],
+                })
+                if remaining <= 0:
+                    break
+
+            if remaining > 0:
+                unmet.append({
+                    'hospital_id': hospital_id,
+                    'hospital': hospitals.get(hospital_id, {}).get('name', ''),
+                    'emergency_id': need.get('emergency_id'),
+                    'blood_group': blood_group,
+                    'units': remaining,
+                    'urgency_level': need['urgency_level'],
+                })
+
+        return {'transfers': transfers, 'unmet': unmet}
+
+    def suggest_transfers(self):
+        """Load inventory, hospitals and active emergencies from the database and solve"""
+        from donor.models import BloodInventory, EmergencyRequest, Hospital
+
+        hospitals = {
+            row['id']: row
+            for row in Hospital.objects.filter(is_active=True).values(
+                'id', 'name', 'city', 'latitude', 'longitude'
+            )
+        }
+
+        inventory = {}
+        rows = BloodInventory.objects.filter(hospital__is_active=True).values_list(
+            'hospital_id', 'blood_group', 'units_available', 'units_reserved'
+        )
+        for hospital_id, blood_group, available, reserved in rows:
+            inventory[(hospital_id, blood_group)] = max(0.0, (available or 0) - (reserved or 0))
+
+        needs = [
+            {
+                'emergency_id': row['id'],
+                'hospital_id': row['hospital_id'],
+                'blood_group': row['blood_group_needed'],
+                'units': row['units_needed'],
+                'urgency_level': row['urgency_level'],
+                'required_by': row['required_by'],
+            }
+            for row in EmergencyRequest.objects.filter(
+                status='active', hospital__is_active=True
+            ).values('id', 'hospital_id', 'blood_group_needed', 'units_needed', 'urgency_level', 'required_by')
+        ]
+
+        result = self.solve(hospitals, inventory, needs)
+        result['total_units_moved'] = sum(t['units'] for t in result['transfers'])
+        result['total_units_unmet'] = sum(u['units'] for u in result['unmet'])
+        logger.info(
+            f"Rebalancing: {len(needs)} emergencies, {len(result['transfers'])} transfers, "
+            f"{result['total_units_unmet']} units unmet"
+        )
+        return result
+
+
+# Global instance
+inventory_rebalancer = InventoryRebalancer()
@@ -0,0 +1,372 @@
+"""
+In-process metrics registry for Blood Donation Management System
+Counters, gauges and histograms exposed in the Prometheus text format and merged across worker processes
+"""
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+FANOUT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+# Snapshots of processes that exited more than this long ago are dropped from the merge
+DEAD_PROCESS_RETENTION_SECONDS = 86400
+
+
+def _metrics_config():
+    from django.conf import settings
+
+    return getattr(settings, 'METRICS', {})
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (list(extra.items()) if extra else [])
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            values = [[list(key), value] for key, value in self._values.items()]
+        return {'kind': self.kind, 'help': self.documentation, 'labels': list(self.labelnames), 'values': values}
+
+
+class Counter(_Metric):
+    """Monotonically increasing total, summed across processes"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+    Point-in-time value
+
+    mode decides how live processes are combined ('sum' or 'max'); a gauge
+    built with function= is evaluated at scrape time in the scraping process
+    only, which suits values read from the database.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), mode='sum', function=None):
+        super().__init__(name, documentation, labelnames)
+        self.mode = mode
+        self.function = function
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def snapshot(self):
+        data = super().snapshot()
+        data['mode'] = self.mode
+        return data
+
+    def evaluate(self):
+        """Values from the scrape-time function as [[label values], value] pairs"""
+        result = self.function()
+        if isinstance(result, dict):
+            return [[list(key if isinstance(key, tuple) else (key,)), value] for key, value in result.items()]
+        return [[[], result]]
+
+
+class Histogram(_Metric):
+    """Bucketed observations with running sum and count, summed across processes"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][index] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        data = super().snapshot()
+        data['buckets'] = list(self.buckets)
+        return data
+
+
+class MetricsRegistry:
+    """
+    Holds this process's metrics and merges snapshots written by sibling workers
+
+    With METRICS['MULTIPROCESS_DIR'] set every process periodically writes its
+    own snapshot there (one JSON file per pid) and a scrape merges all of them,
+    so any worker behind the load balancer can answer for the whole host.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._derived = []
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=(), mode='sum', function=None):
+        return self.register(Gauge(name, documentation, labelnames, mode=mode, function=function))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def derived(self, function):
+        """Register fn(merged) -> {name: metric snapshot} computed after merging, e.g. ratios"""
+        self._derived.append(function)
+        return function
+
+    def snapshot(self):
+        return {
+            name: metric.snapshot()
+            for name, metric in self._metrics.items()
+            if not (isinstance(metric, Gauge) and metric.function)
+        }
+
+    def _snapshot_dir(self):
+        return _metrics_config().get('MULTIPROCESS_DIR')
+
+    def flush(self, force=False):
+        """Write this process's snapshot for sibling workers (throttled unless forced)"""
+        directory = self._snapshot_dir()
+        if not directory:
+            return
+        now = time.time()
+        if not force and now - self._last_flush < _metrics_config().get('FLUSH_INTERVAL', 5):
+            return
+        self._last_flush = now
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(str(directory), f'metrics_{os.getpid()}.json')
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w') as snapshot_file:
+                json.dump({'pid': os.getpid(), 'written_at': now, 'metrics': self.snapshot()}, snapshot_file)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f'Could not write metrics snapshot: {e}')
+
+    def _load_snapshots(self):
+        directory = self._snapshot_dir()
+        if not directory:
+            return [{'pid': os.getpid(), 'live': True, 'metrics': self.snapshot()}]
+
+        self.flush(force=True)
+        snapshots = []
+        now = time.time()
+        for path in glob.glob(os.path.join(str(directory), 'metrics_*.json')):
+            try:
+                with open(path) as snapshot_file:
+                    data = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+            live = _pid_alive(data['pid'])
+            if not live and now - data.get('written_at', 0) > DEAD_PROCESS_RETENTION_SECONDS:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            data['live'] = live
+            snapshots.append(data)
+        return snapshots
+
+    def collect(self):
+        """Merged {name: snapshot} across every process, plus scrape-time and derived gauges"""
+        merged = {}
+        for data in self._load_snapshots():
+            for name, metric in data['metrics'].items():
+                # Gauges describe current state, so exited processes no longer contribute
+                if metric['kind'] == 'gauge' and not data['live']:
+                    continue
+                target = merged.setdefault(name, {**metric, 'values': {}})
+                for labels, value in metric['values']:
+                    key = tuple(labels)
+                    current = target['values'].get(key)
+                    if current is None:
+                        target['values'][key] = value if metric['kind'] != 'histogram' else {
+                            'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+                    elif metric['kind'] == 'histogram':
+                        current['buckets'] = [a + b for a, b in zip(current['buckets'], value['buckets'])]
+                        current['sum'] += value['sum']
+                        current['count'] += value['count']
+                    elif metric.get('mode') == 'max':
+                        target['values'][key] = max(current, value)
+                    else:
+                        target['values'][key] = current + value
+
+        for name, metric in self._metrics.items():
+            if isinstance(metric, Gauge) and metric.function:
+                try:
+                    values = metric.evaluate()
+                except Exception as e:
+                    logger.error(f'Could not evaluate gauge {name}: {e}')
+                    continue
+                merged[name] = {'kind': 'gauge', 'help': metric.documentation, 'labels': list(metric.labelnames),
+                                'values': {tuple(labels): value for labels, value in values}}
+
+        for function in self._derived:
+            for name, metric in function(merged).items():
+                merged[name] = metric
+        return merged
+
+    def render_text(self):
+        """Prometheus text exposition (version 0.0.4) of the merged metrics"""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['kind']}")
+            labelnames = metric['labels']
+            for labels, value in sorted(metric['values'].items()):
+                if metric['kind'] != 'histogram':
+                    lines.append(f'{name}{_format_labels(labelnames, labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric['buckets'], value['buckets']):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labelnames, labels, {'le': _format_value(bound)})} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, {'le': '+Inf'})} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(labelnames, labels)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+atexit.register(registry.flush, force=True)
+
+
+def _export_jobs_by_status():
+    from admin_panel.models import ExportJob
+    from django.db.models import Count
+
+    counts = dict(ExportJob.objects.filter(status__in=['pending', 'running'])
+                  .values('status').annotate(total=Count('id')).values_list('status', 'total'))
+    return {(status,): counts.get(status, 0) for status in ('pending', 'running')}
+
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by view', ['view', 'method', 'status'])
+REQUEST_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL queries issued per request', ['view'], buckets=QUERY_COUNT_BUCKETS)
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Cache lookups made while handling requests', ['result'])
+TIERED_CACHE_LOOKUPS = registry.counter(
+    'tiered_cache_lookups_total', 'Two-tier cache lookups by the tier that answered', ['tier'])
+GEOCODING_REQUESTS = registry.counter(
+    'geocoding_upstream_requests_total', 'Calls made to the geocoding provider', ['endpoint', 'outcome'])
+GEOCODING_LATENCY = registry.histogram(
+    'geocoding_upstream_duration_seconds', 'Geocoding provider response time', ['endpoint'])
+GEOCODING_CACHE = registry.counter(
+    'geocoding_cache_requests_total', 'Geocoding lookups answered from cache or not', ['endpoint', 'result'])
+NOTIFICATION_FANOUT = registry.histogram(
+    'notification_fanout_recipients', 'Recipients targeted by one notification event', ['kind'], buckets=FANOUT_BUCKETS)
+EMAIL_DELIVERIES = registry.counter(
+    'email_deliveries_total', 'Emails handed to the SMTP server or given up on', ['outcome'])
+CHANNEL_DELIVERIES = registry.counter(
+    'channel_deliveries_total', 'Alert recipients handled by outbound gateway channels', ['channel', 'outcome'])
+CHANNEL_REQUEST_LATENCY = registry.histogram(
+    'channel_request_seconds', 'Time spent in one outbound gateway request', ['channel'])
+EXPORT_QUEUE_DEPTH = registry.gauge(
+    'export_job_queue_depth', 'Export jobs submitted to worker threads and not yet started')
+EXPORT_JOBS = registry.gauge(
+    'export_jobs', 'Export jobs by status according to the database', ['status'], function=_export_jobs_by_status)
+
+
+@registry.derived
+def _cache_hit_ratio(merged):
+    values = merged.get('cache_requests_total', {}).get('values', {})
+    hits = values.get(('hit',), 0)
+    total = hits + values.get(('miss',), 0)
+    if not total:
+        return {}
+    return {'cache_hit_ratio': {
+        'kind': 'gauge', 'help': 'Share of request cache lookups that were hits', 'labels': [],
+        'values': {(): hits / total},
+    }}
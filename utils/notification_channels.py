@@ -0,0 +1,361 @@
+"""
+Outbound notification channels for Blood Donation Management System
+One interface for in-app, email, SMS gateway and webhook delivery of alerts
+"""
+import concurrent.futures
+import hashlib
+import hmac
+import json
+import logging
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connection as db_connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from utils.constants import CHANNEL_MAX_ATTEMPTS
+from utils.metrics import CHANNEL_DELIVERIES, CHANNEL_REQUEST_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Two SMS segments; longer alerts are cut rather than split into many messages
+SMS_MAX_LENGTH = 320
+
+
+class OutboundAlert:
+    """An alert rendered once and handed to every channel"""
+
+    def __init__(self, key, kind, title, message, action_url='', data=None, source=None):
+        self.key = key
+        self.kind = kind
+        self.title = title
+        self.message = message
+        self.action_url = action_url
+        self.data = data or {}
+        self.source = source
+
+    @classmethod
+    def for_emergency(cls, emergency_request):
+        blood_group = emergency_request.blood_group_needed
+        return cls(
+            key=f'emergency:{emergency_request.id}',
+            kind='emergency_request',
+            title='🚨 Emergency Blood Request',
+            message=f'URGENT: {emergency_request.hospital_name} needs {blood_group} blood. Contact: {emergency_request.contact_person}. Required by: {emergency_request.required_by}',
+            action_url='/donor/dashboard/',
+            data={
+                'id': emergency_request.id,
+                'hospital_name': emergency_request.hospital_name,
+                'blood_group_needed': blood_group,
+                'units_needed': emergency_request.units_needed,
+                'urgency_level': emergency_request.urgency_level,
+                'contact_person': emergency_request.contact_person,
+                'contact_phone': emergency_request.contact_phone,
+                'location': emergency_request.location,
+                'required_by': emergency_request.required_by,
+            },
+            source=emergency_request,
+        )
+
+    @classmethod
+    def from_key(cls, key):
+        """Rebuild an alert from its key (e.g. to resend failed deliveries); None when it cannot be"""
+        from donor.models import EmergencyRequest
+
+        kind, _, object_id = key.partition(':')
+        if kind == 'emergency' and object_id.isdigit():
+            emergency_request = EmergencyRequest.objects.filter(id=int(object_id)).first()
+            if emergency_request is not None:
+                return cls.for_emergency(emergency_request)
+        return None
+
+
+class NotificationChannel:
+    """
+    Base class for a delivery channel
+
+    Subclasses implement deliver(alert, donors). Channels are built once per
+    process from settings.NOTIFICATION_CHANNELS, where BACKEND names the class
+    and the rest of the entry is passed in as config.
+    """
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+
+    def is_enabled(self):
+        return self.config.get('ENABLED', True)
+
+    def deliver(self, alert, donors):
+        """Send an alert to donors; returns the number of recipients handed to the channel"""
+        raise NotImplementedError
+
+
+class InAppChannel(NotificationChannel):
+    """UserNotification rows, written synchronously through NotificationService"""
+
+    def deliver(self, alert, donors):
+        from utils.notification_service import NotificationService
+
+        related = {'related_emergency': alert.source} if alert.kind == 'emergency_request' else {}
+        notifications = [
+            NotificationService.build_user_notification(
+                donor.user, alert.title, alert.message, alert.kind, action_url=alert.action_url, **related
+            )
+            for donor in donors
+        ]
+        NotificationService.create_user_notifications(notifications)
+        return len(notifications)
+
+
+class EmailChannel(NotificationChannel):
+    """Email through EmailDeliveryService (its own worker pool, batching and delivery log)"""
+
+    def is_enabled(self):
+        from utils.email_delivery import EmailDeliveryService
+
+        return self.config.get('ENABLED', EmailDeliveryService.is_enabled())
+
+    def deliver(self, alert, donors):
+        from admin_panel.models import EmailBroadcast
+        from utils.email_delivery import EmailDeliveryService
+
+        users = [donor.user for donor in donors]
+        if alert.kind == 'emergency_request':
+            return EmailDeliveryService.send_emergency_alert(alert.source, users)
+        broadcast, _ = EmailBroadcast.objects.get_or_create(
+            key=alert.key,
+            defaults={'subject': f'{settings.EMAIL_SUBJECT_PREFIX}{alert.title}', 'body': alert.message},
+        )
+        return EmailDeliveryService.queue_broadcast(broadcast, users)
+
+
+class HttpGatewayChannel(NotificationChannel):
+    """
+    Base class for channels that POST JSON to an HTTP gateway
+
+    All requests of a channel share one requests.Session whose connection pool
+    is sized to CONCURRENCY, and run on a worker pool of the same size, so a
+    slow gateway holds at most CONCURRENCY connections and threads. Recipients
+    are grouped into requests of BATCH_SIZE; transient failures (connection
+    errors, 429 and 5xx) are retried by the adapter with backoff. Every
+    recipient has a ChannelDelivery row recording the outcome, and
+    retry_failed() sends failed rows again up to CHANNEL_MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, name, config):
+        super().__init__(name, config)
+        self.timeout = config.get('TIMEOUT', 10)
+        self.batch_size = max(1, config.get('BATCH_SIZE', 1))
+        concurrency = max(1, config.get('CONCURRENCY', 2))
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'BloodDonationSystem/1.0', 'Content-Type': 'application/json'})
+        retries = Retry(
+            total=config.get('RETRIES', 2), backoff_factor=0.5, status_forcelist=(429, 502, 503, 504),
+            allowed_methods=None, raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix=f'channel-{name}'
+        )
+
+    def recipients(self, alert, donors):
+        """(recipient, user_id) pairs for this channel"""
+        raise NotImplementedError
+
+    def build_request(self, alert, recipients):
+        """(url, payload) for one batch of recipients"""
+        raise NotImplementedError
+
+    def sign(self, body):
+        """Extra headers for a serialized request body"""
+        return {}
+
+    def deliver(self, alert, donors):
+        from admin_panel.models import ChannelDelivery
+
+        targets = self.recipients(alert, donors)
+        ChannelDelivery.objects.bulk_create([
+            ChannelDelivery(channel=self.name, alert_key=alert.key, recipient=recipient, user_id=user_id)
+            for recipient, user_id in targets
+        ], batch_size=500, ignore_conflicts=True)
+        # Recipients already handled for this alert are not sent again
+        pending = list(ChannelDelivery.objects.filter(
+            channel=self.name, alert_key=alert.key, status='queued'
+        ).order_by('id').values_list('recipient', flat=True))
+
+        batches = [pending[start:start + self.batch_size] for start in range(0, len(pending), self.batch_size)]
+        transaction.on_commit(lambda: [self.executor.submit(self.send_batch, alert, batch) for batch in batches])
+        return len(pending)
+
+    def retry_failed(self, alert):
+        """Queue this alert's failed recipients that have attempts left and send them again"""
+        from admin_panel.models import ChannelDelivery
+
+        ChannelDelivery.objects.filter(
+            channel=self.name, alert_key=alert.key, status='failed', attempts__lt=CHANNEL_MAX_ATTEMPTS
+        ).update(status='queued', response_status=None, error='', completed_at=None)
+        return self.deliver(alert, [])
+
+    def send_batch(self, alert, recipients):
+        """POST one batch and record the outcome (runs in a worker thread)"""
+        close_old_connections()
+        try:
+            url, payload = self.build_request(alert, recipients)
+            body = json.dumps(payload, cls=DjangoJSONEncoder).encode('utf-8')
+            headers = {'Idempotency-Key': hashlib.sha1(f'{alert.key}:{",".join(recipients)}'.encode()).hexdigest()}
+            headers.update(self.sign(body))
+
+            start = time.perf_counter()
+            try:
+                response = self.session.post(url, data=body, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                self._record(alert, recipients, 'failed', error=str(e))
+                return
+            finally:
+                CHANNEL_REQUEST_LATENCY.observe(time.perf_counter() - start, channel=self.name)
+
+            if response.ok:
+                self._record(alert, recipients, 'sent', response.status_code)
+            else:
+                self._record(alert, recipients, 'failed', response.status_code, response.text[:500])
+        except Exception as e:
+            logger.error(f'{self.name} batch of {len(recipients)} failed: {e}', exc_info=True)
+        finally:
+            db_connection.close()
+
+    def _record(self, alert, recipients, status, response_status=None, error=''):
+        from admin_panel.models import ChannelDelivery
+
+        if status == 'failed':
+            logger.warning(f'{self.name} delivery to {len(recipients)} recipient(s) failed: {response_status or error}')
+        ChannelDelivery.objects.filter(channel=self.name, alert_key=alert.key, recipient__in=recipients).update(
+            status=status, response_status=response_status, error=error[:1000], completed_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+        CHANNEL_DELIVERIES.inc(len(recipients), channel=self.name, outcome=status)
+
+
+class SmsGatewayChannel(HttpGatewayChannel):
+    """
+    SMS through an HTTP gateway
+
+    With BATCH_SIZE above 1 every request carries {"messages": [{"to", "body"}, ...]}
+    for gateways with a bulk endpoint; with 1 it is a single {"to", "body"}.
+    """
+
+    def __init__(self, name, config):
+        super().__init__(name, config)
+        self.url = config.get('URL', '')
+        if config.get('TOKEN'):
+            self.session.headers['Authorization'] = f'Bearer {config["TOKEN"]}'
+
+    def is_enabled(self):
+        return super().is_enabled() and bool(self.url)
+
+    def recipients(self, alert, donors):
+        return [(donor.phone_number, donor.user_id) for donor in donors if donor.phone_number]
+
+    def build_request(self, alert, recipients):
+        text = alert.message[:SMS_MAX_LENGTH]
+        messages = [{'to': recipient, 'body': text} for recipient in recipients]
+        if self.batch_size == 1:
+            return self.url, messages[0]
+        return self.url, {'messages': messages}
+
+
+class WebhookChannel(HttpGatewayChannel):
+    """
+    Alert events POSTed to subscribed URLs (e.g. hospital systems), one request per URL
+
+    With SECRET set, the body is signed with HMAC-SHA256 in the X-Signature header.
+    """
+
+    def __init__(self, name, config):
+        config = dict(config, BATCH_SIZE=1)
+        super().__init__(name, config)
+        self.urls = list(config.get('URLS', []))
+        self.secret = config.get('SECRET', '')
+
+    def is_enabled(self):
+        return super().is_enabled() and bool(self.urls)
+
+    def recipients(self, alert, donors):
+        return [(url, None) for url in self.urls]
+
+    def build_request(self, alert, recipients):
+        return recipients[0], {
+            'event': alert.kind,
+            'key': alert.key,
+            'title': alert.title,
+            'message': alert.message,
+            'data': alert.data,
+            'sent_at': timezone.now(),
+        }
+
+    def sign(self, body):
+        if not self.secret:
+            return {}
+        digest = hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return {'X-Signature': f'sha256={digest}'}
+
+
+_channels = None
+_channels_lock = threading.Lock()
+
+
+def get_channels():
+    """Channel instances from settings.NOTIFICATION_CHANNELS, built once per process"""
+    global _channels
+    if _channels is None:
+        with _channels_lock:
+            if _channels is None:
+                channels = []
+                for name, config in getattr(settings, 'NOTIFICATION_CHANNELS', {}).items():
+                    try:
+                        channels.append(import_string(config['BACKEND'])(name, config))
+                    except Exception as e:
+                        logger.error(f'Could not load notification channel {name}: {e}')
+                _channels = channels
+    return _channels
+
+
+def retry_failed_deliveries(channel_name=None, alert_key=None):
+    """
+    Resend failed ChannelDelivery rows that have attempts left, through the configured channels
+
+    Returns:
+        dict: recipients queued again per channel
+    """
+    from admin_panel.models import ChannelDelivery
+
+    failed = ChannelDelivery.objects.filter(status='failed', attempts__lt=CHANNEL_MAX_ATTEMPTS)
+    if channel_name:
+        failed = failed.filter(channel=channel_name)
+    if alert_key:
+        failed = failed.filter(alert_key=alert_key)
+    pairs = set(failed.values_list('channel', 'alert_key').distinct())
+
+    channels = {channel.name: channel for channel in get_channels() if isinstance(channel, HttpGatewayChannel)}
+    alerts = {}
+    results = {}
+    for name, key in sorted(pairs):
+        channel = channels.get(name)
+        if channel is None or not channel.is_enabled():
+            logger.warning(f'Not retrying {key} via {name}: channel is not configured')
+            continue
+        if key not in alerts:
+            alerts[key] = OutboundAlert.from_key(key)
+        if alerts[key] is None:
+            logger.warning(f'Not retrying {key} via {name}: the alert no longer exists')
+            continue
+        results[name] = results.get(name, 0) + channel.retry_failed(alerts[key])
+    return results
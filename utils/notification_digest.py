@@ -0,0 +1,132 @@
+"""
+Notification digests for Blood Donation Management System
+Buffers user notifications per user and type, then merges each buffer into one notification
+"""
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+from utils.constants import NOTIFICATION_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Individual messages quoted in one digest before the rest are summarized
+DIGEST_MAX_LINES = 10
+
+
+def _digest_settings():
+    return getattr(settings, 'NOTIFICATION_DIGEST', {})
+
+
+class NotificationDigest:
+    """
+    Service class for the coalescing stage in front of UserNotification
+
+    Notifications of the configured types are stored as PendingNotification
+    rows. flush_due() turns every (user, type) buffer whose oldest entry has
+    waited WINDOW_SECONDS into a single UserNotification: the original one when
+    the buffer holds one entry, otherwise a digest listing them.
+    """
+
+    @staticmethod
+    def should_buffer(notification_type):
+        config = _digest_settings()
+        return bool(config.get('ENABLED')) and notification_type in config.get('TYPES', ())
+
+    @staticmethod
+    def buffer(notifications):
+        """Store unsaved UserNotifications as pending digest entries"""
+        from admin_panel.models import PendingNotification
+
+        PendingNotification.objects.bulk_create([
+            PendingNotification(
+                user_id=notification.user_id,
+                title=notification.title,
+                message=notification.message,
+                notification_type=notification.notification_type,
+                action_url=notification.action_url,
+                related_donation_request_id=notification.related_donation_request_id,
+                related_emergency_id=notification.related_emergency_id,
+                dedup_key=notification.dedup_key,
+            )
+            for notification in notifications
+        ], batch_size=NOTIFICATION_BATCH_SIZE, ignore_conflicts=True)
+
+    @staticmethod
+    def flush_due(force=False):
+        """
+        Deliver every buffer whose window has elapsed (or all of them with force)
+
+        Returns:
+            (buffered entries flushed, notifications created)
+        """
+        from admin_panel.models import PendingNotification
+
+        pending = PendingNotification.objects.all()
+        groups = pending.values('user_id', 'notification_type').annotate(first=Min('created_at'), total=Count('id'))
+        if not force:
+            window = _digest_settings().get('WINDOW_SECONDS', 300)
+            groups = groups.filter(first__lte=timezone.now() - timedelta(seconds=window))
+
+        flushed = created = 0
+        for group in groups.order_by('first').iterator():
+            with transaction.atomic():
+                entries = list(pending.filter(
+                    user_id=group['user_id'], notification_type=group['notification_type']
+                ).select_for_update().order_by('created_at', 'id'))
+                if not entries:
+                    continue
+                NotificationDigest._deliver(entries)
+                PendingNotification.objects.filter(id__in=[entry.id for entry in entries]).delete()
+            flushed += len(entries)
+            created += 1
+        if flushed:
+            logger.info(f'Flushed {flushed} buffered notification(s) into {created} notification(s)')
+        return flushed, created
+
+    @staticmethod
+    def _deliver(entries):
+        from admin_panel.models import UserNotification
+        from utils.notification_service import NotificationService
+
+        first = entries[0]
+        if len(entries) == 1:
+            notification = UserNotification(
+                user_id=first.user_id, title=first.title, message=first.message,
+                notification_type=first.notification_type, action_url=first.action_url,
+                related_donation_request_id=first.related_donation_request_id,
+                related_emergency_id=first.related_emergency_id, dedup_key=first.dedup_key,
+            )
+        else:
+            notification = NotificationDigest.build_digest(entries)
+        NotificationService.insert_user_notifications([notification])
+
+    @staticmethod
+    def build_digest(entries):
+        """One UserNotification summarizing several buffered entries of the same type"""
+        from admin_panel.models import UserNotification
+        from utils.notification_service import NotificationService
+
+        first = entries[0]
+        label = dict(UserNotification.NOTIFICATION_TYPES).get(first.notification_type, first.notification_type)
+        lines = [f'- {entry.title}: {entry.message}' for entry in entries[:DIGEST_MAX_LINES]]
+        if len(entries) > DIGEST_MAX_LINES:
+            lines.append(f'...and {len(entries) - DIGEST_MAX_LINES} more')
+
+        # Keep a related object only when every entry points at the same one
+        related_requests = {entry.related_donation_request_id for entry in entries}
+        related_emergencies = {entry.related_emergency_id for entry in entries}
+        return UserNotification(
+            user_id=first.user_id,
+            title=f'{len(entries)} {label} notifications',
+            message='\n'.join(lines),
+            notification_type=first.notification_type,
+            action_url=first.action_url,
+            related_donation_request_id=related_requests.pop() if len(related_requests) == 1 else None,
+            related_emergency_id=related_emergencies.pop() if len(related_emergencies) == 1 else None,
+            dedup_key=NotificationService.build_dedup_key(
+                first.user_id, first.notification_type, f'digest:{first.id}', when=first.created_at
+            ),
+        )
@@ -0,0 +1,124 @@
+"""
+Notification retention for Blood Donation Management System
+Deletes (and optionally archives) old notifications in small primary-key batches
+"""
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from utils.constants import NOTIFICATION_CLEANUP_DAYS, NOTIFICATION_RETENTION_BATCH_SIZE, NOTIFICATION_RETENTION_PAUSE
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationRetention:
+    """
+    Bounded-batch retention job for UserNotification, SystemNotification and SystemNotificationRead
+
+    Each batch selects at most batch_size primary keys, optionally appends those
+    rows to a gzip-compressed NDJSON archive, and removes them with a raw DELETE
+    in its own short transaction. Nothing is loaded into Django's deletion
+    collector and the database lock is released between batches.
+    """
+
+    def __init__(self, days=NOTIFICATION_CLEANUP_DAYS, batch_size=NOTIFICATION_RETENTION_BATCH_SIZE,
+                 archive_dir=None, pause=NOTIFICATION_RETENTION_PAUSE, dry_run=False, log=None):
+        self.cutoff = timezone.now() - timedelta(days=days)
+        self.batch_size = batch_size
+        self.archive_dir = archive_dir
+        self.pause = pause
+        self.dry_run = dry_run
+        self.log = log or logger.info
+        self.archive_files = []
+        self._stamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+
+    def run(self):
+        """
+        Apply retention to all three tables
+
+        Returns:
+            dict of rows removed (or, with dry_run, that would be removed) per table
+        """
+        from admin_panel.models import SystemNotification, SystemNotificationRead, UserNotification
+
+        # Reads first: they reference system notifications and a raw delete does not cascade
+        results = {
+            'system_notification_reads': self._purge(
+                SystemNotificationRead.objects.filter(read_at__lt=self.cutoff)
+            ),
+            'user_notifications': self._purge(
+                UserNotification.objects.filter(created_at__lt=self.cutoff), on_batch=self._invalidate_unread_counters
+            ),
+            'system_notifications': self._purge(
+                SystemNotification.objects.filter(created_at__lt=self.cutoff), on_batch=self._delete_dependent_reads
+            ),
+        }
+        if results['system_notifications'] and not self.dry_run:
+            # Raw deletes skip the signal that refreshes cached audience lists
+            from utils.cache_tags import TAG_SYSTEM_NOTIFICATIONS, TaggedCache
+            TaggedCache.invalidate_tags(TAG_SYSTEM_NOTIFICATIONS)
+        return results
+
+    def _purge(self, queryset, on_batch=None):
+        model = queryset.model
+        table = model._meta.db_table
+        if self.dry_run:
+            count = queryset.count()
+            self.log(f'{table}: {count} row(s) older than {self.cutoff:%Y-%m-%d} would be removed')
+            return count
+
+        archive = self._open_archive(table) if self.archive_dir else None
+        removed = 0
+        last_pk = 0
+        try:
+            while True:
+                ids = list(queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:self.batch_size])
+                if not ids:
+                    break
+                last_pk = ids[-1]
+                with transaction.atomic():
+                    batch = model.objects.filter(pk__in=ids)
+                    if archive:
+                        for row in batch.order_by('pk').values():
+                            archive.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                        archive.flush()
+                    if on_batch:
+                        on_batch(ids)
+                    removed += batch._raw_delete(batch.db)
+                if self.pause:
+                    time.sleep(self.pause)
+        finally:
+            if archive:
+                archive.close()
+
+        self.log(f'{table}: removed {removed} row(s) older than {self.cutoff:%Y-%m-%d}')
+        return removed
+
+    def _open_archive(self, table):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f'{table}_{self._stamp}.ndjson.gz')
+        self.archive_files.append(path)
+        return gzip.open(path, 'at', encoding='utf-8')
+
+    @staticmethod
+    def _invalidate_unread_counters(ids):
+        from admin_panel.models import UserNotification
+        from utils.unread_counters import UnreadCounter
+
+        user_ids = set(UserNotification.objects.filter(pk__in=ids, is_read=False).values_list('user_id', flat=True))
+        if user_ids:
+            # After commit, so a concurrent read cannot recount the rows about to go
+            transaction.on_commit(lambda: UnreadCounter.invalidate(*user_ids))
+
+    @staticmethod
+    def _delete_dependent_reads(ids):
+        # Dismissals newer than the cutoff can still point at an expiring notification
+        from admin_panel.models import SystemNotificationRead
+
+        reads = SystemNotificationRead.objects.filter(system_notification_id__in=ids)
+        reads._raw_delete(reads.db)
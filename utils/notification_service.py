@@ -2,11 +2,16 @@
 Notification Service for Blood Donation Management System
 Handles all notification creation and management
 """
+import hashlib
+from collections import Counter
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from admin_panel.models import SystemNotification, UserNotification
 from donor.models import DonationRequest, EmergencyRequest
-from utils.constants import CAN_RECEIVE_FROM
+from utils.constants import CAN_RECEIVE_FROM, NOTIFICATION_BATCH_SIZE, NOTIFICATION_DEDUP_WINDOW_SECONDS
+from utils.metrics import NOTIFICATION_FANOUT
+from utils.unread_counters import UnreadCounter
 
 
 class NotificationService:
@@ -33,37 +38,122 @@ class NotificationService:
             print(f"Error creating system notification: {e}")
             return None
     
+    @staticmethod
+    def build_dedup_key(user_id, notification_type, title, related_donation_request=None,
+                        related_emergency=None, when=None):
+        """Hash of user, type, related object (or title when there is none) and time bucket"""
+        if related_donation_request is not None:
+            related = f'donation_request:{related_donation_request.pk}'
+        elif related_emergency is not None:
+            related = f'emergency:{related_emergency.pk}'
+        else:
+            related = f'title:{title}'
+        bucket = int((when or timezone.now()).timestamp() // NOTIFICATION_DEDUP_WINDOW_SECONDS)
+        raw = f'{user_id}|{notification_type}|{related}|{bucket}'
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def build_user_notification(user, title, message, notification_type, action_url='',
+                                related_donation_request=None, related_emergency=None):
+        """Unsaved UserNotification with its dedup key set"""
+        return UserNotification(
+            user=user,
+            title=title,
+            message=message,
+            notification_type=notification_type,
+            action_url=action_url,
+            related_donation_request=related_donation_request,
+            related_emergency=related_emergency,
+            dedup_key=NotificationService.build_dedup_key(
+                user.id, notification_type, title, related_donation_request, related_emergency
+            ),
+        )
+
+    @staticmethod
+    def create_user_notifications(notifications):
+        """
+        Deliver UserNotifications built by build_user_notification
+
+        Types configured in NOTIFICATION_DIGEST are buffered for a digest instead
+        of being stored right away; the rest are inserted immediately.
+
+        Returns:
+            list: the notifications that were inserted now
+        """
+        from utils.notification_digest import NotificationDigest
+
+        buffered = [n for n in notifications if NotificationDigest.should_buffer(n.notification_type)]
+        if buffered:
+            NotificationDigest.buffer(buffered)
+        return NotificationService.insert_user_notifications(
+            [n for n in notifications if not NotificationDigest.should_buffer(n.notification_type)]
+        )
+
+    @staticmethod
+    def insert_user_notifications(notifications):
+        """
+        Insert UserNotifications, skipping duplicates
+
+        Dedup keys that already exist are looked up first (one SELECT per
+        NOTIFICATION_BATCH_SIZE keys) so the unread counters can be adjusted by
+        exactly the rows that go in. The insert itself is INSERT ... ON CONFLICT
+        DO NOTHING, which keeps concurrent fan-outs safe; a key inserted by one
+        of them in between is counted twice until the counter expires or is
+        reconciled. A single notification is saved directly, so it gets its id.
+
+        Returns:
+            list: the notifications that were inserted
+        """
+        unique = {}
+        for notification in notifications:
+            unique.setdefault(notification.dedup_key, notification)
+        keys = list(unique)
+        existing = set()
+        for start in range(0, len(keys), NOTIFICATION_BATCH_SIZE):
+            existing.update(UserNotification.objects.filter(
+                dedup_key__in=keys[start:start + NOTIFICATION_BATCH_SIZE]
+            ).values_list('dedup_key', flat=True))
+        new = [notification for key, notification in unique.items() if key not in existing]
+        if not new:
+            return []
+
+        if len(new) == 1:
+            try:
+                with transaction.atomic():
+                    new[0].save()
+            except IntegrityError:
+                # Another request inserted the same notification since the lookup
+                return []
+        else:
+            UserNotification.objects.bulk_create(new, batch_size=NOTIFICATION_BATCH_SIZE, ignore_conflicts=True)
+
+        unread = Counter(notification.user_id for notification in new if not notification.is_read)
+
+        def adjust_counters():
+            for user_id, count in unread.items():
+                UnreadCounter.adjust(user_id, count)
+
+        # After commit, so a counter never includes rows that could still roll back
+        transaction.on_commit(adjust_counters)
+        return new
+
     @staticmethod
     def create_user_notification(user, title, message, notification_type,
                                action_url='', related_donation_request=None,
                                related_emergency=None):
-        """Create a notification for a specific user (avoid duplicates)"""
-        try:
-            # Check if similar notification already exists (within last hour)
-            from django.utils import timezone
-            from datetime import timedelta
-
-            one_hour_ago = timezone.now() - timedelta(hours=1)
-            existing = UserNotification.objects.filter(
-                user=user,
-                title=title,
-                notification_type=notification_type,
-                created_at__gte=one_hour_ago
-            ).first()
-
-            if existing:
-                return existing  # Don't create duplicate
+        """
+        Create a notification for a specific user
 
-            notification = UserNotification.objects.create(
-                user=user,
-                title=title,
-                message=message,
-                notification_type=notification_type,
-                action_url=action_url,
-                related_donation_request=related_donation_request,
-                related_emergency=related_emergency
+        Returns the saved notification, or None when it was a duplicate within
+        the dedup window, was buffered for a digest, or could not be created.
+        """
+        try:
+            notification = NotificationService.build_user_notification(
+                user, title, message, notification_type, action_url,
+                related_donation_request, related_emergency
             )
-            return notification
+            inserted = NotificationService.create_user_notifications([notification])
+            return inserted[0] if inserted else None
         except Exception as e:
             print(f"Error creating user notification: {e}")
             return None
@@ -137,15 +227,10 @@ class NotificationService:
             allow_emergency_contact=True
         )
         
-        for donor in compatible_donors:
-            NotificationService.create_user_notification(
-                user=donor.user,
-                title='🚨 Emergency Blood Request',
-                message=f'URGENT: {emergency_request.hospital_name} needs {blood_group} blood. Contact: {emergency_request.contact_person}. Required by: {emergency_request.required_by}',
-                notification_type='emergency_request',
-                action_url='/donor/dashboard/',
-                related_emergency=emergency_request
-            )
+        compatible_donors = list(compatible_donors.select_related('user'))
+        NOTIFICATION_FANOUT.observe(len(compatible_donors), kind='emergency_request')
+        from utils.notification_channels import OutboundAlert
+        NotificationService.dispatch_alert(OutboundAlert.for_emergency(emergency_request), compatible_donors)
         
         # Create system notification
         admin_users = User.objects.filter(is_staff=True)
@@ -159,6 +244,26 @@ class NotificationService:
                 created_by=admin_users.first()
             )
     
+    @staticmethod
+    def dispatch_alert(alert, donors):
+        """
+        Hand an alert to every enabled channel in settings.NOTIFICATION_CHANNELS
+
+        Returns:
+            dict: recipients handed to each channel
+        """
+        from utils.notification_channels import get_channels
+
+        results = {}
+        for channel in get_channels():
+            if not channel.is_enabled():
+                continue
+            try:
+                results[channel.name] = channel.deliver(alert, donors)
+            except Exception as e:
+                print(f"Error delivering {alert.key} via {channel.name}: {e}")
+        return results
+    
     @staticmethod
     def notify_eligibility_restored(donor):
         """Notify donor when they become eligible to donate again"""
@@ -247,45 +352,77 @@ class NotificationService:
         return notifications.order_by('-created_at')
     
     @staticmethod
-    def get_system_notifications(target_audience='all', user=None):
-        """Get active system notifications for a specific audience, excluding user-dismissed ones"""
+    def active_system_notifications(target_audience='all', user=None):
+        """
+        Active, unexpired system notifications for an audience as one query
+
+        With a user, notifications they dismissed are removed by an anti-join
+        (NOT EXISTS) in the same statement instead of a query per notification.
+        """
+        from django.db.models import Exists, OuterRef, Q
+        from admin_panel.models import SystemNotificationRead
+
         notifications = SystemNotification.objects.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()),
             is_active=True,
-            target_audience__in=[target_audience, 'all']
+            target_audience__in=[target_audience, 'all'],
         )
+        if user and user.is_authenticated:
+            notifications = notifications.exclude(Exists(
+                SystemNotificationRead.objects.filter(user=user, system_notification=OuterRef('pk'))
+            ))
+        return notifications.order_by('-created_at')
+
+    @staticmethod
+    def get_system_notifications(target_audience='all', user=None):
+        """
+        Get active system notifications for a specific audience, excluding user-dismissed ones
+
+        The audience's notifications and each user's dismissed IDs are cached
+        separately, so a dashboard load costs no queries once both are warm,
+        however many broadcasts exist.
+        """
+        from utils.cache_tags import TAG_SYSTEM_NOTIFICATIONS, TaggedCache, system_notification_reads_tag
+
+        try:
+            notifications = TaggedCache.get_or_set(
+                f'system_notifications:{target_audience}',
+                lambda: list(NotificationService.active_system_notifications(target_audience)),
+                [TAG_SYSTEM_NOTIFICATIONS],
+            )
+            dismissed_ids = set()
+            if notifications and user and user.is_authenticated:
+                from admin_panel.models import SystemNotificationRead
+                dismissed_ids = TaggedCache.get_or_set(
+                    f'system_notification_reads:{user.id}',
+                    lambda: set(SystemNotificationRead.objects.filter(user=user).values_list('system_notification_id', flat=True)),
+                    [system_notification_reads_tag(user.id)],
+                )
+        except Exception as e:
+            print(f"Error reading cached system notifications: {e}")
+            return list(NotificationService.active_system_notifications(target_audience, user=user))
+
+        # The cached list may outlive a notification's expiry; dropping those needs no query
+        return [
+            notification for notification in notifications
+            if not notification.is_expired and notification.id not in dismissed_ids
+        ]
 
-        # Filter out expired notifications and user-dismissed ones
-        active_notifications = []
-        for notification in notifications:
-            if not notification.is_expired:
-                # If user is provided, check if they've dismissed this notification
-                if user and user.is_authenticated:
-                    from admin_panel.models import SystemNotificationRead
-                    if not SystemNotificationRead.objects.filter(
-                        user=user,
-                        system_notification=notification
-                    ).exists():
-                        active_notifications.append(notification)
-                else:
-                    active_notifications.append(notification)
-
-        return active_notifications
-    
     @staticmethod
     def mark_notification_read(notification_id, user):
         """Mark a user notification as read"""
-        try:
-            notification = UserNotification.objects.get(id=notification_id, user=user)
-            notification.is_read = True
-            notification.save()
+        # Conditional update so a repeated click does not decrement the counter twice
+        updated = UserNotification.objects.filter(id=notification_id, user=user, is_read=False).update(is_read=True)
+        if updated:
+            UnreadCounter.adjust(user.id, -updated)
             return True
-        except UserNotification.DoesNotExist:
-            return False
+        return UserNotification.objects.filter(id=notification_id, user=user).exists()
     
     @staticmethod
     def mark_all_notifications_read(user):
         """Mark all notifications as read for a user"""
         UserNotification.objects.filter(user=user, is_read=False).update(is_read=True)
+        UnreadCounter.set(user.id, 0)
 
     @staticmethod
     def delete_read_notifications(user):
@@ -304,6 +441,8 @@ class NotificationService:
                 user=user,
                 system_notification=notification
             )
+            from utils.cache_tags import TaggedCache, system_notification_reads_tag
+            TaggedCache.invalidate_tags(system_notification_reads_tag(user.id))
             return True
         except SystemNotification.DoesNotExist:
             return False
@@ -312,34 +451,20 @@ class NotificationService:
             return False
 
     @staticmethod
-    def cleanup_old_notifications(days=30):
-        """Delete notifications older than specified days"""
-        from django.utils import timezone
-        from datetime import timedelta
-
-        cutoff_date = timezone.now() - timedelta(days=days)
-
-        # Delete old user notifications
-        user_deleted = UserNotification.objects.filter(created_at__lt=cutoff_date).delete()[0]
-
-        # Delete old system notifications
-        system_deleted = SystemNotification.objects.filter(created_at__lt=cutoff_date).delete()[0]
-
-        # Delete old system notification read records
-        from admin_panel.models import SystemNotificationRead
-        read_deleted = SystemNotificationRead.objects.filter(read_at__lt=cutoff_date).delete()[0]
+    def cleanup_old_notifications(days=30, archive_dir=None):
+        """Delete notifications older than specified days in bounded batches (see NotificationRetention)"""
+        from utils.notification_retention import NotificationRetention
 
-        return user_deleted + system_deleted + read_deleted
+        results = NotificationRetention(days=days, archive_dir=archive_dir).run()
+        return sum(results.values())
     
     @staticmethod
     def get_notification_count(user, unread_only=True):
-        """Get notification count for a user"""
-        notifications = UserNotification.objects.filter(user=user)
-        
+        """Get notification count for a user (unread counts come from the cached counter)"""
         if unread_only:
-            notifications = notifications.filter(is_read=False)
-        
-        return notifications.count()
+            return UnreadCounter.get(user.id)
+
+        return UserNotification.objects.filter(user=user).count()
     
     @staticmethod
     def notify_emergency_response(emergency_request, donor, response_text='', selected_hospital=None):
@@ -352,15 +477,16 @@ class NotificationService:
         if selected_hospital:
             message += f" Selected hospital: {selected_hospital.name}"
         
-        for admin in admin_users:
-            NotificationService.create_user_notification(
-                user=admin,
-                title='Emergency Response Received',
-                message=message,
-                notification_type='emergency_response',
-                action_url='/admin-panel/emergencies/',
-                related_emergency=emergency_request
-            )
+        try:
+            NotificationService.create_user_notifications([
+                NotificationService.build_user_notification(
+                    admin, 'Emergency Response Received', message, 'emergency_response',
+                    action_url='/admin-panel/emergencies/', related_emergency=emergency_request
+                )
+                for admin in admin_users
+            ])
+        except Exception as e:
+            print(f"Error creating emergency response notifications: {e}")
         
         # Also create system notification
         NotificationService.create_system_notification(
@@ -0,0 +1,133 @@
+"""
+Transactional outbox for Blood Donation Management System
+Domain events stored with the change that caused them and read back in order with an integer cursor
+"""
+import json
+import logging
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from donor.models import OutboxEvent
+from utils.constants import OUTBOX_BULK_BATCH_SIZE, OUTBOX_PAGE_SIZE, OUTBOX_RETENTION_DAYS, OUTBOX_SETTLE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """
+    Service class for the outbox table
+
+    Signal receivers call record() for every save and delete of
+    EmergencyRequest, DonationHistory, BloodInventory and DonationRequest. The
+    save runs in a transaction (TransactionalSaveMixin) and deletes already do,
+    so an event exists exactly when its change was committed. Queryset
+    update() sends no signals, so code changing these models that way calls
+    record_bulk() in the same transaction (synthetic seeding is exempt).
+
+    Readers keep the id of the last event they processed and ask for the
+    events after it; the cursor is that id. Ids are assigned at insert but
+    become visible at commit. SQLite commits one writer at a time, so ids show
+    up in order. On PostgreSQL a transaction open longer than
+    OUTBOX_SETTLE_SECONDS can commit a lower id after a reader's cursor passed
+    it, and that event is then missed. Keep transactions that touch these
+    models short there, or raise OUTBOX_SETTLE_SECONDS.
+    """
+
+    @staticmethod
+    def _event(instance, action):
+        model_name = instance._meta.model_name
+        return OutboxEvent(
+            aggregate_type=model_name,
+            aggregate_id=instance.pk,
+            event_type=f'{model_name}.{action}',
+            payload={field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields},
+        )
+
+    @staticmethod
+    def record(instance, action):
+        event = Outbox._event(instance, action)
+        event.save()
+        return event
+
+    @staticmethod
+    def record_bulk(model, ids, action='updated'):
+        """
+        Events for rows changed by a queryset update(); call inside the same transaction.atomic() block
+
+        Returns:
+            int: number of events written
+        """
+        written = 0
+        for start in range(0, len(ids), OUTBOX_BULK_BATCH_SIZE):
+            rows = model.objects.filter(id__in=ids[start:start + OUTBOX_BULK_BATCH_SIZE]).order_by('id')
+            events = OutboxEvent.objects.bulk_create([Outbox._event(instance, action) for instance in rows])
+            written += len(events)
+        return written
+
+    @staticmethod
+    def parse_cursor(cursor):
+        """Cursor string to an event id; raises ValueError when it is malformed"""
+        if cursor in (None, ''):
+            return 0
+        try:
+            after = int(cursor)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid outbox cursor')
+        if after < 0:
+            raise ValueError('Invalid outbox cursor')
+        return after
+
+    @staticmethod
+    def read(after=0, limit=OUTBOX_PAGE_SIZE, aggregate_types=None):
+        """
+        Fetch events with an id above the cursor, oldest first
+
+        Returns:
+            tuple: (records, next_cursor, has_more)
+        """
+        events = OutboxEvent.objects.filter(id__gt=after)
+        if aggregate_types:
+            events = events.filter(aggregate_type__in=aggregate_types)
+        rows = list(events.order_by('id').values(
+            'id', 'aggregate_type', 'aggregate_id', 'event_type', 'payload', 'created_at'
+        )[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Stop at the first event that is too fresh; a cursor past it could skip a later-committing lower id
+        upper_bound = timezone.now() - timedelta(seconds=OUTBOX_SETTLE_SECONDS)
+        settled = []
+        for row in rows:
+            if row['created_at'] > upper_bound:
+                has_more = False
+                break
+            settled.append(row)
+
+        records = [Outbox._serialize(row) for row in settled]
+        next_cursor = settled[-1]['id'] if settled else after
+        return records, next_cursor, has_more
+
+    @staticmethod
+    def _serialize(row):
+        return {
+            'id': row['id'],
+            'type': row['event_type'],
+            'model': row['aggregate_type'],
+            'object_id': row['aggregate_id'],
+            'occurred_at': row['created_at'].isoformat(),
+            'data': row['payload'],
+        }
+
+    @staticmethod
+    def iter_ndjson(records):
+        """Yield one JSON document per line"""
+        for record in records:
+            yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+    @staticmethod
+    def prune(days=OUTBOX_RETENTION_DAYS):
+        """Delete events old enough that every consumer has read past them"""
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted_count, _ = OutboxEvent.objects.filter(created_at__lt=cutoff).delete()
+        logger.info(f"Pruned {deleted_count} outbox events older than {days} days")
+        return deleted_count
@@ -0,0 +1,171 @@
+"""
+N+1 query detection for Blood Donation Management System
+Fingerprints SQL per request and reports query shapes repeated from the same call site
+"""
+import hashlib
+import logging
+import os
+import re
+import sys
+from contextlib import ExitStack, contextmanager
+
+logger = logging.getLogger('donor.queries')
+
+DEFAULT_THRESHOLD = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+# Frames from these files are never reported as the originating call site
+_INTERNAL_FILES = (
+    os.path.abspath(__file__),
+    os.path.join('utils', 'request_profiling.py'),
+    os.path.join('utils', 'slow_queries.py'),
+)
+
+
+class NPlusOneError(Exception):
+    """Raised in strict mode when a repeated query shape crosses the threshold"""
+
+
+def normalize_sql(sql):
+    """Strip literals and placeholders so queries differing only by parameters compare equal"""
+    normalized = _STRING_LITERAL.sub('?', sql)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _IN_LIST.sub('IN (...)', normalized)
+    return _WHITESPACE.sub(' ', normalized).strip()
+
+
+def fingerprint_sql(sql):
+    """Short stable hash of the normalized query shape"""
+    return hashlib.sha1(normalize_sql(sql).encode('utf-8')).hexdigest()[:12]
+
+
+def _project_root():
+    from django.conf import settings
+
+    return os.path.abspath(str(settings.BASE_DIR))
+
+
+def _is_project_file(filename, root):
+    path = os.path.abspath(filename)
+    if not path.startswith(root) or 'site-packages' in path or path.endswith(_INTERNAL_FILES):
+        return False
+    return True
+
+
+def _template_location(frame):
+    """Template name and line of the node being rendered in this frame, if any"""
+    code = frame.f_code
+    if code.co_name != 'render_annotated' or not code.co_filename.endswith(os.path.join('template', 'base.py')):
+        return None
+    node = frame.f_locals.get('self')
+    token = getattr(node, 'token', None)
+    origin = getattr(node, 'origin', None)
+    if token is None or origin is None:
+        return None
+    return f'{origin.template_name or origin.name}:{token.lineno}'
+
+
+def find_call_site(root=None):
+    """
+    Walk the current stack for where a query originated
+
+    Returns:
+        (call_site, template_location) - innermost project frame as "path:line in func"
+        and the innermost template node being rendered, either may be None
+    """
+    root = root or _project_root()
+    call_site = template = None
+    frame = sys._getframe(1)
+    while frame is not None and (call_site is None or template is None):
+        if template is None:
+            template = _template_location(frame)
+        if call_site is None and _is_project_file(frame.f_code.co_filename, root):
+            call_site = f'{os.path.relpath(frame.f_code.co_filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return call_site, template
+
+
+class QueryInspector:
+    """
+    Database execute wrapper counting query shapes per call site
+
+    A shape executed THRESHOLD or more times from the same call site (and
+    template line) within one inspection is reported as a likely N+1. Only
+    SELECTs are considered; repeated writes are a different problem.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, strict=False, view_name=None):
+        self.threshold = threshold
+        self.strict = strict
+        self.view_name = view_name
+        self.root = _project_root()
+        self.total_queries = 0
+        self._counts = {}
+        self._samples = {}
+        self._reported = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total_queries += 1
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            self._record(sql)
+        return execute(sql, params, many, context)
+
+    def _record(self, sql):
+        call_site, template = find_call_site(self.root)
+        key = (fingerprint_sql(sql), call_site, template)
+        count = self._counts.get(key, 0) + 1
+        self._counts[key] = count
+        self._samples.setdefault(key, sql)
+        if count == self.threshold:
+            finding = self._finding(key, count)
+            self._reported.append(key)
+            if self.strict:
+                raise NPlusOneError(self.describe(finding))
+
+    def _finding(self, key, count):
+        fingerprint, call_site, template = key
+        return {
+            'fingerprint': fingerprint,
+            'count': count,
+            'view': self.view_name,
+            'call_site': call_site,
+            'template': template,
+            'sql': normalize_sql(self._samples[key]),
+        }
+
+    @property
+    def findings(self):
+        """Repeated query shapes with their final counts, worst first"""
+        results = [self._finding(key, self._counts[key]) for key in self._reported]
+        return sorted(results, key=lambda finding: finding['count'], reverse=True)
+
+    @staticmethod
+    def describe(finding):
+        where = finding['call_site'] or 'unknown call site'
+        if finding['template']:
+            where += f" (template {finding['template']})"
+        view = f" in view {finding['view']}" if finding['view'] else ''
+        return f"Possible N+1{view}: query {finding['fingerprint']} ran {finding['count']} times from {where}: {finding['sql'][:300]}"
+
+
+@contextmanager
+def detect_n_plus_one(threshold=DEFAULT_THRESHOLD, strict=True, view_name=None):
+    """
+    Inspect every query run inside the block, e.g. in a test:
+
+        with detect_n_plus_one():
+            client.get(reverse('admin_panel:manage_requests'))
+    """
+    from django.db import connections
+
+    inspector = QueryInspector(threshold=threshold, strict=strict, view_name=view_name)
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(inspector))
+        yield inspector
@@ -0,0 +1,115 @@
+"""
+Pre-rendered report cache for Blood Donation Management System
+Rendered reports are stored under MEDIA_ROOT and reused until the underlying data changes
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+from donor.models import Donor, DonationHistory
+from utils.constants import REPORT_CACHE_DIR, REPORT_CACHE_RETENTION_DAYS, REPORT_STATS_CACHE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+REPORT_CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'txt': 'text/plain',
+}
+
+
+class ReportCache:
+    """Service class to serve reports from disk and render them only when stale"""
+
+    @staticmethod
+    def report_dir():
+        return os.path.join(settings.MEDIA_ROOT, REPORT_CACHE_DIR)
+
+    @staticmethod
+    def data_fingerprint():
+        """Cheap version stamp of the data a report depends on (two aggregate queries)"""
+        donors = Donor.objects.aggregate(count=Count('id'), changed=Max('updated_at'))
+        donations = DonationHistory.objects.aggregate(count=Count('id'), changed=Max('updated_at'))
+        return f"{donors['count']}:{donors['changed']}:{donations['count']}:{donations['changed']}"
+
+    @staticmethod
+    def report_key(period, fingerprint):
+        return hashlib.sha256(f"{period}|{fingerprint}".encode('utf-8')).hexdigest()[:24]
+
+    @staticmethod
+    def get_statistics(period, fingerprint):
+        """Statistics snapshot for a period, shared between processes via the cache"""
+        from admin_panel.exports import report_statistics
+
+        cache_key = f"report_stats_{ReportCache.report_key(period, fingerprint)}"
+        stats = cache.get(cache_key)
+        if stats is None:
+            stats = report_statistics(period)
+            cache.set(cache_key, stats, REPORT_STATS_CACHE_TIMEOUT)
+        return stats
+
+    @staticmethod
+    def find_rendered(key):
+        """Return (path, extension) of an already rendered report, if any"""
+        for extension in REPORT_CONTENT_TYPES:
+            path = os.path.join(ReportCache.report_dir(), f"report_{key}.{extension}")
+            if os.path.exists(path):
+                return path, extension
+        return None, None
+
+    @staticmethod
+    def get_report(period=None):
+        """
+        Get an up-to-date report file, rendering it only when none exists for the current data
+
+        Args:
+            period: Report date (defaults to today); active-donor figures are relative to it
+
+        Returns:
+            tuple: (file_path, content_type, extension)
+        """
+        from admin_panel.exports import build_report
+
+        period = period or timezone.now().date()
+        fingerprint = ReportCache.data_fingerprint()
+        key = ReportCache.report_key(period, fingerprint)
+
+        path, extension = ReportCache.find_rendered(key)
+        if path:
+            return path, REPORT_CONTENT_TYPES[extension], extension
+
+        content, content_type, extension = build_report(ReportCache.get_statistics(period, fingerprint))
+        os.makedirs(ReportCache.report_dir(), exist_ok=True)
+        path = os.path.join(ReportCache.report_dir(), f"report_{key}.{extension}")
+
+        # Write to a temporary name first so concurrent readers never see a partial file; the name is
+        # unique per process and thread so two renderers of the same report never share one
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as handle:
+            handle.write(content)
+        os.replace(temp_path, path)
+        logger.info(f"Rendered report for {period} ({len(content)} bytes)")
+        return path, content_type, extension
+
+    @staticmethod
+    def prune(days=REPORT_CACHE_RETENTION_DAYS):
+        """Delete rendered reports older than the retention window"""
+        report_dir = ReportCache.report_dir()
+        if not os.path.isdir(report_dir):
+            return 0
+
+        cutoff = time.time() - days * 86400
+        removed = 0
+        for name in os.listdir(report_dir):
+            path = os.path.join(report_dir, name)
+            if name.startswith('report_') and os.path.getmtime(path) < cutoff:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as e:
+                    logger.warning(f"Could not delete cached report {name}: {e}")
+        return removed
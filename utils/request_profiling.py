@@ -0,0 +1,135 @@
+"""
+Per-request profiling hooks for Blood Donation Management System
+Collects SQL, cache and template timings for RequestProfilingMiddleware without DEBUG
+"""
+import time
+from contextvars import ContextVar
+
+_current_stats = ContextVar('request_profile_stats', default=None)
+_MISSING = object()
+_installed = False
+
+
+class RequestStats:
+    """Counters gathered while a single request is being handled"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.template_time = 0.0
+        self.template_depth = 0
+
+    def as_dict(self):
+        return {
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'template_ms': round(self.template_time * 1000, 2),
+        }
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current_stats.set(stats)
+
+
+def finish_request(token):
+    _current_stats.reset(token)
+
+
+def current_stats():
+    return _current_stats.get()
+
+
+def sql_execute_wrapper(execute, sql, params, many, context):
+    """Database execute wrapper timing every query issued during a profiled request"""
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def _record_cache(hits, misses):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.cache_hits += hits
+        stats.cache_misses += misses
+
+
+def _instrument_cache_class(backend_class):
+    if getattr(backend_class, '_profiling_instrumented', False):
+        return
+    original_get = backend_class.get
+    original_get_many = backend_class.get_many
+
+    def get(self, key, default=None, version=None):
+        value = original_get(self, key, _MISSING, version=version)
+        if value is _MISSING:
+            _record_cache(0, 1)
+            return default
+        _record_cache(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        # Backends may implement get_many via get(); count each key once
+        stats = _current_stats.get()
+        token = _current_stats.set(None)
+        try:
+            found = original_get_many(self, keys, version=version)
+        finally:
+            _current_stats.reset(token)
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+
+    backend_class.get = get
+    backend_class.get_many = get_many
+    backend_class._profiling_instrumented = True
+
+
+def _instrument_templates():
+    from django.template.base import Template
+
+    if getattr(Template, '_profiling_instrumented', False):
+        return
+    original_render = Template.render
+
+    def render(self, context):
+        stats = _current_stats.get()
+        if stats is None:
+            return original_render(self, context)
+        # Only the outermost render is timed; includes and extends nest inside it
+        stats.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original_render(self, context)
+        finally:
+            stats.template_depth -= 1
+            if stats.template_depth == 0:
+                stats.template_time += time.perf_counter() - started
+
+    Template.render = render
+    Template._profiling_instrumented = True
+
+
+def install_instrumentation():
+    """Patch cache backends and template rendering once per process"""
+    global _installed
+    if _installed:
+        return
+    from django.core.cache import caches
+
+    for alias in caches:
+        _instrument_cache_class(type(caches[alias]))
+    _instrument_templates()
+    _installed = True
@@ -0,0 +1,86 @@
+"""
+Write-coalescing session store for Blood Donation Management System
+Cache-first sessions whose database row is only rewritten when the data changes or its expiry runs low
+"""
+import logging
+import time
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+logger = logging.getLogger(__name__)
+
+# Private session keys maintained here; changes to them alone do not count as new data
+REFRESHED_AT_KEY = '_session_refreshed_at'
+DB_SYNCED_AT_KEY = '_session_db_synced_at'
+_BOOKKEEPING_KEYS = (REFRESHED_AT_KEY, DB_SYNCED_AT_KEY)
+
+
+def _session_age():
+    return settings.SESSION_COOKIE_AGE
+
+
+def _without_bookkeeping(data):
+    return {key: value for key, value in data.items() if key not in _BOOKKEEPING_KEYS}
+
+
+def refresh_session_expiry(session):
+    """
+    Slide the session expiry only after SESSION_REFRESH_FRACTION of its age has passed
+
+    Marks the session modified (so the cookie and store are refreshed) at most
+    once per window instead of on every request. Works with any session engine.
+
+    Returns:
+        bool: True if a refresh was scheduled for this response
+    """
+    now = time.time()
+    window = _session_age() * getattr(settings, 'SESSION_REFRESH_FRACTION', 0.1)
+    if now - session.get(REFRESHED_AT_KEY, 0) < window:
+        return False
+    session[REFRESHED_AT_KEY] = now
+    return True
+
+
+class SessionStore(CachedDBStore):
+    """
+    Cached DB sessions with lazy write-through
+
+    Reads come from the cache and fall back to the database. A save that only
+    slides the expiry updates the cache; the database row is rewritten when
+    session data really changed or once SESSION_DB_SYNC_FRACTION of the age
+    has passed since the last database write, so the stored expiry never
+    lapses for an active user.
+    """
+
+    def load(self):
+        data = super().load()
+        self._loaded_data = _without_bookkeeping(data)
+        return data
+
+    def _needs_db_write(self, must_create):
+        if must_create or not self.session_key:
+            return True
+        if _without_bookkeeping(self._get_session(no_load=must_create)) != getattr(self, '_loaded_data', None):
+            return True
+        window = _session_age() * getattr(settings, 'SESSION_DB_SYNC_FRACTION', 0.5)
+        return time.time() - self._get_session().get(DB_SYNCED_AT_KEY, 0) >= window
+
+    def save(self, must_create=False):
+        if self._needs_db_write(must_create):
+            self._get_session(no_load=must_create)[DB_SYNCED_AT_KEY] = time.time()
+            super().save(must_create)
+            self._loaded_data = _without_bookkeeping(self._session)
+            return
+
+        try:
+            self._cache.set(self.cache_key, self._session, self.get_expiry_age())
+        except Exception:
+            # Without the cache the database copy is the only one that counts
+            logger.exception('Error saving session to cache, writing through to the database')
+            self._get_session()[DB_SYNCED_AT_KEY] = time.time()
+            super().save(must_create)
+
+    def cycle_key(self):
+        # The data moves to a new key, so the next save must create the row
+        self._loaded_data = None
+        super().cycle_key()
@@ -0,0 +1,203 @@
+"""
+Slow query log for Blood Donation Management System
+Captures queries above SLOW_QUERY_LOG['THRESHOLD_MS'] with parameters, call site and query plan
+"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from django.db import transaction
+from django.utils import timezone
+from utils.query_inspector import find_call_site, fingerprint_sql, normalize_sql
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('donor.slow_queries')
+
+EXPLAINABLE_PREFIXES = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+MAX_PARAM_LENGTH = 200
+# Quoted literals in query plans (PostgreSQL prints bound values inline)
+PLAN_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def _slow_query_config():
+    from django.conf import settings
+
+    return getattr(settings, 'SLOW_QUERY_LOG', {})
+
+
+def _format_params(params, redact=True):
+    if params is None:
+        return []
+    values = params.values() if isinstance(params, dict) else params
+    formatted = []
+    for value in values:
+        if redact:
+            formatted.append(f'<{type(value).__name__}>')
+            continue
+        text = repr(value)
+        formatted.append(text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + '...')
+    return formatted
+
+
+class SlowQueryRecorder:
+    """
+    Database execute wrapper that records queries slower than the threshold
+
+    Records go to a bounded in-process ring buffer (recent()) and, one JSON
+    object per line, to the 'donor.slow_queries' logger whose file the
+    slow_query_report command summarizes. Unless log_params is set, parameter
+    values are replaced by their type and quoted literals in query plans by '?'.
+    """
+
+    def __init__(self, threshold_ms=100, explain=True, buffer_size=200, log_params=False):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.log_params = log_params
+        self.buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        # Queries issued while explaining must not be recorded themselves
+        if getattr(self._local, 'busy', False):
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed = time.perf_counter() - started
+        if elapsed >= self.threshold:
+            self._local.busy = True
+            try:
+                self.record(sql, params, many, elapsed, context['connection'])
+            except Exception as e:
+                logger.error(f'Could not record slow query: {e}')
+            finally:
+                self._local.busy = False
+        return result
+
+    def record(self, sql, params, many, elapsed, connection):
+        call_site, template = find_call_site()
+        plan = self.explain_query(connection, sql, params) if self.explain and not many else None
+        if plan and not self.log_params:
+            plan = [PLAN_LITERAL_RE.sub("'?'", line) for line in plan]
+        entry = {
+            'timestamp': timezone.now().isoformat(),
+            'duration_ms': round(elapsed * 1000, 2),
+            'fingerprint': fingerprint_sql(sql),
+            'normalized': normalize_sql(sql),
+            'sql': sql,
+            'params': [] if many else _format_params(params, redact=not self.log_params),
+            'many': many,
+            'database': connection.alias,
+            'call_site': call_site,
+            'template': template,
+            'plan': plan,
+        }
+        with self._lock:
+            self.buffer.append(entry)
+        slow_query_logger.warning(json.dumps(entry, default=str))
+        return entry
+
+    @staticmethod
+    def explain_query(connection, sql, params):
+        """Query plan lines for sql, or None when it cannot be explained"""
+        if not sql.lstrip().upper().startswith(EXPLAINABLE_PREFIXES):
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+        # Inside the caller's transaction a failed EXPLAIN would abort it on PostgreSQL, so isolate it in a savepoint
+        guard = transaction.atomic(using=connection.alias) if connection.in_atomic_block else nullcontext()
+        try:
+            with guard, connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                rows = cursor.fetchall()
+        except Exception as e:
+            return [f'EXPLAIN failed: {e}']
+        if connection.vendor == 'sqlite':
+            # (id, parent, notused, detail)
+            return [row[-1] for row in rows]
+        return [' '.join(str(column) for column in row) for row in rows]
+
+    def recent(self, limit=None):
+        """Newest-first copy of the ring buffer"""
+        with self._lock:
+            entries = list(self.buffer)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+
+_recorder = None
+
+
+def get_recorder():
+    return _recorder
+
+
+def install_slow_query_log():
+    """Attach the recorder to every database connection when SLOW_QUERY_LOG['ENABLED']"""
+    global _recorder
+    config = _slow_query_config()
+    if not config.get('ENABLED') or _recorder is not None:
+        return _recorder
+
+    from django.db.backends.signals import connection_created
+
+    _recorder = SlowQueryRecorder(
+        threshold_ms=config.get('THRESHOLD_MS', 100),
+        explain=config.get('EXPLAIN', True),
+        buffer_size=config.get('BUFFER_SIZE', 200),
+        log_params=config.get('LOG_PARAMS', False),
+    )
+    connection_created.connect(_attach_recorder, dispatch_uid='slow_query_log')
+    return _recorder
+
+
+def _attach_recorder(sender, connection, **kwargs):
+    if _recorder is not None and _recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_recorder)
+
+
+def summarize_log(lines, since=None):
+    """
+    Group slow query log lines by fingerprint
+
+    Returns:
+        list of dicts (fingerprint, count, total_ms, avg_ms, max_ms, call_sites, slowest entry),
+        sorted by total time spent, highest first
+    """
+    groups = {}
+    for line in lines:
+        line = line.strip()
+        if not line.startswith('{'):
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        if since and entry.get('timestamp', '') < since:
+            continue
+
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'],
+            'normalized': entry.get('normalized', entry['sql']),
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'call_sites': {},
+            'slowest': entry,
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        site = entry.get('call_site') or 'unknown'
+        group['call_sites'][site] = group['call_sites'].get(site, 0) + 1
+        if entry['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = entry['duration_ms']
+            group['slowest'] = entry
+
+    summary = list(groups.values())
+    for group in summary:
+        group['avg_ms'] = group['total_ms'] / group['count']
+    summary.sort(key=lambda group: group['total_ms'], reverse=True)
+    return summary
@@ -0,0 +1,84 @@
+"""
+Local SMTP sink for Blood Donation Management System
+Accepts and counts messages without delivering them, for exercising the email pipeline end to end
+"""
+import socketserver
+import threading
+
+
+class SmtpSink:
+    """
+    Minimal threaded SMTP server on 127.0.0.1
+
+    Every message is accepted and counted; addresses in reject get a 550 at
+    RCPT TO (like an unknown mailbox). With drop_after=N the connection that
+    carries the N-th message is closed without a reply, to exercise reconnects.
+    """
+
+    def __init__(self, port=0, reject=(), drop_after=None):
+        self.messages = 0
+        self.connections = 0
+        self.reject = set(reject)
+        self.drop_after = drop_after
+        self._lock = threading.Lock()
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                sink._count_connection()
+                self.reply('220 smtp-sink ready')
+                in_data = False
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    if in_data:
+                        if line in (b'.\r\n', b'.\n'):
+                            in_data = False
+                            if not sink._count_message():
+                                return
+                            self.reply('250 OK')
+                        continue
+                    command = line.decode('utf-8', 'replace').strip()
+                    verb = command.upper()
+                    if verb.startswith(('EHLO', 'HELO')):
+                        self.reply('250 smtp-sink')
+                    elif verb.startswith('RCPT'):
+                        address = command.split(':', 1)[-1].strip('<> ')
+                        self.reply('550 No such user' if address in sink.reject else '250 OK')
+                    elif verb == 'DATA':
+                        in_data = True
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                    elif verb == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        self.reply('250 OK')
+
+            def reply(self, text):
+                self.wfile.write((text + '\r\n').encode('utf-8'))
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self.server = Server(('127.0.0.1', port), Handler)
+        self.port = self.server.server_address[1]
+
+    def _count_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def _count_message(self):
+        """Count one message; False when the connection should be dropped instead of acknowledged"""
+        with self._lock:
+            self.messages += 1
+            return self.messages != self.drop_after
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
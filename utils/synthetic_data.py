@@ -0,0 +1,359 @@
+"""
+Synthetic data generator for Blood Donation Management System
+Produces production-sized, reproducible datasets for load testing and benchmarks
+"""
+import logging
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from multiprocessing import Pool
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from utils.constants import MINIMUM_DONATION_INTERVAL_DAYS
+
+logger = logging.getLogger(__name__)
+
+# (city, province, latitude, longitude, population weight)
+NEPAL_CITIES = [
+    ('Kathmandu', 'Bagmati', 27.7172, 85.3240, 30),
+    ('Lalitpur', 'Bagmati', 27.6588, 85.3247, 10),
+    ('Bhaktapur', 'Bagmati', 27.6710, 85.4298, 6),
+    ('Pokhara', 'Gandaki', 28.2096, 83.9856, 10),
+    ('Bharatpur', 'Bagmati', 27.6833, 84.4333, 6),
+    ('Biratnagar', 'Koshi', 26.4525, 87.2718, 7),
+    ('Dharan', 'Koshi', 26.8065, 87.2846, 4),
+    ('Itahari', 'Koshi', 26.6667, 87.2833, 3),
+    ('Birgunj', 'Madhesh', 27.0104, 84.8777, 6),
+    ('Janakpur', 'Madhesh', 26.7288, 85.9263, 4),
+    ('Hetauda', 'Bagmati', 27.4287, 85.0322, 3),
+    ('Butwal', 'Lumbini', 27.7006, 83.4484, 4),
+    ('Bhairahawa', 'Lumbini', 27.5050, 83.4500, 2),
+    ('Nepalgunj', 'Lumbini', 28.0500, 81.6167, 3),
+    ('Dhangadhi', 'Sudurpashchim', 28.6833, 80.6000, 2),
+]
+
+# Approximate ABO/Rh distribution of the Nepali population
+BLOOD_GROUP_WEIGHTS = [
+    ('O+', 34.8), ('A+', 28.9), ('B+', 26.9), ('AB+', 7.6),
+    ('O-', 0.6), ('A-', 0.5), ('B-', 0.5), ('AB-', 0.2),
+]
+
+FIRST_NAMES = ['Ram', 'Sita', 'Hari', 'Gita', 'Bikash', 'Anita', 'Suman', 'Puja', 'Rajesh', 'Sunita',
+               'Prakash', 'Asmita', 'Nabin', 'Kabita', 'Dipesh', 'Rina', 'Sagar', 'Manisha', 'Binod', 'Sarita']
+LAST_NAMES = ['Sharma', 'Shrestha', 'Gurung', 'Thapa', 'Tamang', 'Rai', 'Magar', 'Karki', 'Adhikari', 'Poudel',
+              'Maharjan', 'Limbu', 'Yadav', 'Bhattarai', 'KC', 'Joshi', 'Basnet', 'Chaudhary', 'Khadka', 'Pandey']
+
+# Scale presets for --scale; explicit counts override them
+SCALE_PRESETS = {
+    'small': {'hospitals': 20, 'donors': 2000, 'donations': 8000, 'emergencies': 100, 'notifications': 5000},
+    'medium': {'hospitals': 100, 'donors': 50000, 'donations': 200000, 'emergencies': 2000, 'notifications': 100000},
+    'large': {'hospitals': 500, 'donors': 1000000, 'donations': 5000000, 'emergencies': 20000, 'notifications': 2000000},
+}
+
+HISTORY_YEARS = 3
+
+
+def _weighted(rng, items, weights):
+    return rng.choices(items, weights=weights, k=1)[0]
+
+
+def _generate_donor_chunk(args):
+    """
+    Build plain-data rows for one chunk of donors and their donation histories.
+
+    Runs in worker processes, so it only returns tuples; the parent turns them
+    into model instances. Each chunk has its own seed, which keeps the output
+    identical regardless of the number of workers.
+    """
+    seed, chunk_index, start, count, donations_per_donor, today_ordinal = args
+    rng = random.Random(seed * 1000003 + chunk_index)
+    city_weights = [city[4] for city in NEPAL_CITIES]
+    groups = [group for group, _ in BLOOD_GROUP_WEIGHTS]
+    group_weights = [weight for _, weight in BLOOD_GROUP_WEIGHTS]
+    history_days = HISTORY_YEARS * 365
+
+    donors = []
+    for number in range(start, start + count):
+        city, province, lat, lng, _ = _weighted(rng, NEPAL_CITIES, city_weights)
+        registered = today_ordinal - rng.randint(0, history_days)
+
+        # Donations walk backwards from a recent date in realistic intervals; regular
+        # donors may have given blood for years before registering online
+        donations = []
+        wanted = min(int(rng.expovariate(1 / donations_per_donor) + 0.5), 40) if donations_per_donor else 0
+        day = today_ordinal - rng.randint(0, 120)
+        for _ in range(wanted):
+            donations.append((day, rng.random(), rng.choice((1.0, 1.0, 1.0, 0.5))))
+            day -= MINIMUM_DONATION_INTERVAL_DAYS + rng.randint(0, 90)
+
+        donors.append({
+            'number': number,
+            'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES),
+            'blood_group': _weighted(rng, groups, group_weights),
+            'gender': rng.choice('MF'),
+            'birth_ordinal': today_ordinal - rng.randint(18 * 365, 60 * 365),
+            'weight': round(rng.uniform(50, 95), 1),
+            'city': city,
+            'state': province,
+            'latitude': round(lat + rng.gauss(0, 0.04), 6),
+            'longitude': round(lng + rng.gauss(0, 0.04), 6),
+            'phone': f"98{rng.randint(0, 99999999):08d}",
+            'allow_emergency_contact': rng.random() < 0.8,
+            'registered_ordinal': registered,
+            'seconds': rng.randint(0, 86399),
+            'donations': donations,
+        })
+    return donors
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create keep preset values on auto_now/auto_now_add fields"""
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field, _, _ in saved:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataGenerator:
+    """Bulk loader for hospitals, donors, donation histories, emergencies and notifications"""
+
+    def __init__(self, seed=42, batch_size=5000, workers=1, prefix='load', password='LoadTest@123', log=None):
+        self.seed = seed
+        self.batch_size = batch_size
+        self.workers = workers
+        self.prefix = prefix
+        self.rng = random.Random(seed)
+        self.log = log or logger.info
+        # Hashing once instead of per user is what makes millions of accounts feasible
+        self.password_hash = make_password(password)
+        self.today = date.today()
+        self.hospitals_by_city = {}
+        self.hospital_ids = []
+        self.donor_user_ids = []
+
+    def _aware(self, day, seconds=0):
+        moment = datetime.combine(day, time()) + timedelta(seconds=seconds)
+        return timezone.make_aware(moment) if settings.USE_TZ else moment
+
+    def existing_data(self):
+        return User.objects.filter(username__startswith=f'{self.prefix}_').exists()
+
+    def generate_hospitals(self, count):
+        from donor.models import BloodInventory, Hospital
+
+        hospital_types = ['government', 'private', 'blood_bank', 'clinic', 'medical_college']
+        city_weights = [city[4] for city in NEPAL_CITIES]
+        users = [
+            User(username=f'{self.prefix}_admin_{i}', email=f'{self.prefix}_admin_{i}@example.com',
+                 first_name='Admin', last_name=str(i), password=self.password_hash, is_staff=True)
+            for i in range(count)
+        ]
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+            hospitals = []
+            for i, user in enumerate(users):
+                city, province, lat, lng, _ = _weighted(self.rng, NEPAL_CITIES, city_weights)
+                hospitals.append(Hospital(
+                    admin_user_id=user.id,
+                    name=f'{city} {self.rng.choice(["General", "Teaching", "Community", "City", "Memorial"])} Hospital {i}',
+                    address=f'Ward {self.rng.randint(1, 32)}, {city}',
+                    city=city,
+                    state=province,
+                    phone_number=f'0{self.rng.randint(10, 99)}-{self.rng.randint(400000, 599999)}',
+                    latitude=round(lat + self.rng.gauss(0, 0.03), 6),
+                    longitude=round(lng + self.rng.gauss(0, 0.03), 6),
+                    hospital_type=self.rng.choice(hospital_types),
+                ))
+            Hospital.objects.bulk_create(hospitals, batch_size=self.batch_size)
+
+            inventory = [
+                BloodInventory(hospital_id=hospital.id, blood_group=group,
+                               units_available=round(self.rng.uniform(0, 60), 1),
+                               units_reserved=round(self.rng.uniform(0, 5), 1))
+                for hospital in hospitals for group, _ in BLOOD_GROUP_WEIGHTS
+            ]
+            BloodInventory.objects.bulk_create(inventory, batch_size=self.batch_size)
+
+        for hospital in hospitals:
+            self.hospitals_by_city.setdefault(hospital.city, []).append((hospital.id, hospital.name))
+            self.hospital_ids.append(hospital.id)
+        self.log(f'Created {count} hospitals with blood inventory')
+
+    def _chunks(self, donors, donations):
+        per_donor = donations / donors if donors else 0
+        today_ordinal = self.today.toordinal()
+        for chunk_index, start in enumerate(range(0, donors, self.batch_size)):
+            yield (self.seed, chunk_index, start, min(self.batch_size, donors - start), per_donor, today_ordinal)
+
+    def generate_donors(self, donors, donations):
+        """Create donors (and their users) with donation histories, one bulk insert per chunk and table"""
+        from donor.models import Donor, DonationHistory
+
+        all_hospitals = [hospital for hospitals in self.hospitals_by_city.values() for hospital in hospitals]
+        chunks = self._chunks(donors, donations)
+        pool = Pool(self.workers) if self.workers > 1 else None
+        results = pool.imap(_generate_donor_chunk, chunks) if pool else map(_generate_donor_chunk, chunks)
+
+        created_donors = created_donations = 0
+        try:
+            with explicit_timestamps(Donor._meta.get_field('created_at'), DonationHistory._meta.get_field('created_at')):
+                for rows in results:
+                    created_donations += self._insert_donor_chunk(rows, all_hospitals)
+                    created_donors += len(rows)
+                    self.log(f'Donors: {created_donors}/{donors}, donations: {created_donations}')
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+        return created_donors, created_donations
+
+    def _insert_donor_chunk(self, rows, all_hospitals):
+        from donor.models import Donor, DonationHistory
+
+        with transaction.atomic():
+            users = [
+                User(username=f"{self.prefix}_donor_{row['number']}",
+                     email=f"{self.prefix}_donor_{row['number']}@example.com",
+                     first_name=row['first_name'], last_name=row['last_name'],
+                     password=self.password_hash,
+                     date_joined=self._aware(date.fromordinal(row['registered_ordinal']), row['seconds']))
+                for row in rows
+            ]
+            User.objects.bulk_create(users, batch_size=self.batch_size)
+
+            donors = []
+            for row, user in zip(rows, users):
+                last_donation = date.fromordinal(row['donations'][0][0]) if row['donations'] else None
+                donors.append(Donor(
+                    user_id=user.id,
+                    blood_group=row['blood_group'],
+                    date_of_birth=date.fromordinal(row['birth_ordinal']),
+                    gender=row['gender'],
+                    phone_number=row['phone'],
+                    address=f"{row['city']}, Nepal",
+                    city=row['city'],
+                    state=row['state'],
+                    latitude=row['latitude'],
+                    longitude=row['longitude'],
+                    weight=row['weight'],
+                    last_donation_date=last_donation,
+                    allow_emergency_contact=row['allow_emergency_contact'],
+                    created_at=user.date_joined,
+                ))
+                self.donor_user_ids.append(user.id)
+            Donor.objects.bulk_create(donors, batch_size=self.batch_size)
+
+            histories = []
+            for row, donor in zip(rows, donors):
+                local_hospitals = self.hospitals_by_city.get(row['city']) or all_hospitals
+                for day_ordinal, pick, units in row['donations']:
+                    hospital_id, hospital_name = local_hospitals[int(pick * len(local_hospitals))] if local_hospitals else (None, '')
+                    day = date.fromordinal(day_ordinal)
+                    histories.append(DonationHistory(
+                        donor_id=donor.id,
+                        donation_date=day,
+                        hospital_id=hospital_id,
+                        donation_center_name=hospital_name,
+                        units_donated=units,
+                        created_at=self._aware(day, 36000),
+                    ))
+            DonationHistory.objects.bulk_create(histories, batch_size=self.batch_size)
+        return len(histories)
+
+    def generate_emergencies(self, count):
+        from donor.models import EmergencyRequest, Hospital
+
+        if not self.hospital_ids:
+            return 0
+        hospitals = list(Hospital.objects.filter(id__in=self.hospital_ids[:1000]).values('id', 'name', 'city', 'address'))
+        levels = ['low', 'medium', 'high', 'critical']
+        groups = [group for group, _ in BLOOD_GROUP_WEIGHTS]
+        weights = [weight for _, weight in BLOOD_GROUP_WEIGHTS]
+        now = timezone.now()
+
+        emergencies = []
+        for _ in range(count):
+            hospital = self.rng.choice(hospitals)
+            created = now - timedelta(hours=self.rng.randint(0, HISTORY_YEARS * 365 * 24))
+            # Roughly the most recent 5% are still open
+            status = 'active' if (now - created).days < 30 and self.rng.random() < 0.5 else self.rng.choice(['fulfilled', 'expired'])
+            emergencies.append(EmergencyRequest(
+                hospital_id=hospital['id'],
+                hospital_name=hospital['name'],
+                blood_group_needed=_weighted(self.rng, groups, weights),
+                units_needed=self.rng.randint(1, 10),
+                contact_person='Blood Bank Desk',
+                contact_phone='01-4000000',
+                location=f"{hospital['address']}, {hospital['city']}",
+                urgency_level=self.rng.choice(levels),
+                required_by=created + timedelta(hours=self.rng.randint(2, 72)),
+                status=status,
+                created_at=created,
+            ))
+        with explicit_timestamps(EmergencyRequest._meta.get_field('created_at')):
+            EmergencyRequest.objects.bulk_create(emergencies, batch_size=self.batch_size)
+        self.log(f'Created {count} emergency requests')
+        return count
+
+    def generate_notifications(self, count):
+        from admin_panel.models import UserNotification
+
+        if not self.donor_user_ids:
+            return 0
+        types = [choice for choice, _ in UserNotification.NOTIFICATION_TYPES]
+        now = timezone.now()
+        created = 0
+        with explicit_timestamps(UserNotification._meta.get_field('created_at')):
+            while created < count:
+                size = min(self.batch_size, count - created)
+                batch = []
+                for _ in range(size):
+                    notification_type = self.rng.choice(types)
+                    age = timedelta(minutes=self.rng.randint(0, 180 * 24 * 60))
+                    batch.append(UserNotification(
+                        user_id=self.rng.choice(self.donor_user_ids),
+                        title=notification_type.replace('_', ' ').title(),
+                        message='Synthetic notification for load testing.',
+                        notification_type=notification_type,
+                        is_read=age > timedelta(days=7) or self.rng.random() < 0.3,
+                        created_at=now - age,
+                    ))
+                UserNotification.objects.bulk_create(batch, batch_size=self.batch_size)
+                created += size
+        self.log(f'Created {count} user notifications')
+        return count
+
+    def run(self, hospitals, donors, donations, emergencies, notifications, rebuild_rollup=True):
+        """Generate a full dataset and return the row counts"""
+        self.generate_hospitals(hospitals)
+        created_donors, created_donations = self.generate_donors(donors, donations)
+        self.generate_emergencies(emergencies)
+        self.generate_notifications(notifications)
+
+        if rebuild_rollup:
+            # bulk_create skips the signals that maintain the rollup
+            from utils.donation_rollup import DonationRollup
+            DonationRollup.rebuild()
+
+        # Nor do they invalidate cached entries tagged with the generated data
+        from utils.cache_tags import (
+            TAG_DONATION_REQUESTS, TAG_DONATIONS, TAG_DONORS, TAG_EMERGENCIES, TAG_INVENTORY, TaggedCache,
+        )
+        TaggedCache.invalidate_tags(TAG_DONORS, TAG_DONATIONS, TAG_DONATION_REQUESTS, TAG_EMERGENCIES, TAG_INVENTORY)
+
+        return {
+            'hospitals': hospitals,
+            'donors': created_donors,
+            'donations': created_donations,
+            'emergencies': emergencies,
+            'notifications': notifications,
+        }
@@ -0,0 +1,60 @@
+"""
+Test runners for Blood Donation Management System
+Keep test, benchmark and index-advisor runs away from the live cache and media files
+"""
+import os
+import shutil
+import tempfile
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def isolated_settings(directory):
+    """Settings that point the cache and media storage into a scratch directory"""
+    cache_config = dict(settings.CACHES['default'], LOCATION=os.path.join(directory, 'cache.sqlite3'))
+    return {
+        'CACHES': {'default': cache_config},
+        'MEDIA_ROOT': os.path.join(directory, 'media'),
+    }
+
+
+class IsolatedTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that gives every run its own cache file and media directory
+
+    The default cache is a SQLite file shared by every worker on the host, so
+    without this a run against the throwaway test database would write into
+    (and cache.clear() would wipe) the cache the live server reads.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._scratch_dir = tempfile.mkdtemp(prefix='test-run-')
+        self._isolation = override_settings(**isolated_settings(self._scratch_dir))
+        self._isolation.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._isolation.disable()
+        shutil.rmtree(self._scratch_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+
+class StrictTestRunner(IsolatedTestRunner):
+    """
+    Runner for `manage.py test`: isolated like IsolatedTestRunner, with N+1 detection on and strict
+
+    A view that repeats one query shape from the same call site then fails its
+    test with NPlusOneError. Benchmarks keep the plain runner so the detector
+    does not skew their timings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        detection = dict(getattr(settings, 'N_PLUS_ONE_DETECTION', {}), ENABLED=True, STRICT=True)
+        self._n_plus_one = override_settings(N_PLUS_ONE_DETECTION=detection)
+        self._n_plus_one.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._n_plus_one.disable()
+        super().teardown_test_environment(**kwargs)
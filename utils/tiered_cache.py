@@ -0,0 +1,299 @@
+"""
+Two-tier cache backend for Blood Donation Management System
+Per-process LRU (L1) in front of a SQLite file shared by every worker on the host (L2)
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# Version-log rows older than this are pruned; a process idle for longer simply drops its L1
+VERSION_LOG_RETENTION_SECONDS = 3600
+CLEAR_MARKER = '*'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires);
+CREATE TABLE IF NOT EXISTS cache_versions (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL,
+    changed_at REAL NOT NULL
+);
+"""
+
+
+def _record_tier(tier):
+    from utils.metrics import TIERED_CACHE_LOOKUPS
+
+    TIERED_CACHE_LOOKUPS.inc(tier=tier)
+
+
+class TieredCache(BaseCache):
+    """
+    Django cache backend with a local L1 and a shared SQLite L2
+
+    Every write to L2 appends the key to a version log. Each process polls the
+    log at most every SYNC_INTERVAL seconds and evicts the keys other workers
+    changed, so an invalidation in one worker reaches all of them within that
+    interval. L1 entries also expire after L1_TTL seconds as a safety net.
+
+    OPTIONS: PATH (L2 file), L1_MAX_ENTRIES, L1_TTL, SYNC_INTERVAL, plus the
+    standard MAX_ENTRIES / CULL_FREQUENCY applied to L2.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = str(options.get('PATH') or location)
+        self.l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self.l1_ttl = float(options.get('L1_TTL', 60))
+        self.sync_interval = float(options.get('SYNC_INTERVAL', 0.5))
+
+        self._l1 = OrderedDict()
+        self._l1_lock = threading.Lock()
+        self._local = threading.local()
+        self._seen_version = None
+        self._last_sync = 0.0
+        self._writes = 0
+
+    # -- L2 (shared SQLite file) -------------------------------------------------
+
+    def _db(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _log_change(self, conn, key):
+        cursor = conn.execute(
+            'INSERT INTO cache_versions (key, changed_at) VALUES (?, ?)', (key, time.time())
+        )
+        return cursor.lastrowid
+
+    def _maintain(self, conn):
+        # Cheap housekeeping every few hundred writes instead of on every one
+        self._writes += 1
+        if self._writes % 200:
+            return
+        now = time.time()
+        conn.execute('DELETE FROM cache_versions WHERE changed_at < ?', (now - VERSION_LOG_RETENTION_SECONDS,))
+        conn.execute('DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        count = conn.execute('SELECT COUNT(*) FROM cache_entries').fetchone()[0]
+        if count > self._max_entries and self._cull_frequency:
+            # Soonest-expiring first; entries without an expiry (NULL sorts first in SQLite) go last
+            conn.execute(
+                'DELETE FROM cache_entries WHERE key IN '
+                '(SELECT key FROM cache_entries ORDER BY expires IS NULL, expires LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    # -- L1 (per process) --------------------------------------------------------
+
+    def _sync(self):
+        """Evict L1 entries that other processes changed since the last poll"""
+        now = time.monotonic()
+        if now - self._last_sync < self.sync_interval:
+            return
+        self._last_sync = now
+        conn = self._db()
+        if self._seen_version is None:
+            self._seen_version = conn.execute('SELECT COALESCE(MAX(version), 0) FROM cache_versions').fetchone()[0]
+            return
+
+        oldest = conn.execute('SELECT MIN(version) FROM cache_versions').fetchone()[0]
+        rows = conn.execute(
+            'SELECT version, key FROM cache_versions WHERE version > ? ORDER BY version', (self._seen_version,)
+        ).fetchall()
+        with self._l1_lock:
+            if oldest is not None and oldest > self._seen_version + 1:
+                # Log was pruned past what we saw; some changes are unknown
+                self._l1.clear()
+            for version, key in rows:
+                if key == CLEAR_MARKER:
+                    self._l1.clear()
+                else:
+                    self._l1.pop(key, None)
+        if rows:
+            self._seen_version = rows[-1][0]
+
+    def _l1_get(self, key):
+        with self._l1_lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+            return entry
+
+    def _l1_set(self, key, value, expires):
+        ttl = self.l1_ttl if expires is None else min(self.l1_ttl, expires - time.time())
+        if ttl <= 0:
+            return
+        with self._l1_lock:
+            self._l1[key] = (value, time.monotonic() + ttl)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_max_entries:
+                self._l1.popitem(last=False)
+
+    # -- Django cache API --------------------------------------------------------
+
+    def _expiry(self, timeout):
+        # Absolute expiry timestamp, None for never
+        return self.get_backend_timeout(timeout)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._sync()
+        entry = self._l1_get(key)
+        if entry is not None:
+            _record_tier('l1')
+            return pickle.loads(entry[0])
+
+        row = self._db().execute(
+            'SELECT value, expires FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            _record_tier('miss')
+            return default
+        _record_tier('l2')
+        self._l1_set(key, row[0], row[1])
+        return pickle.loads(row[0])
+
+    def _write(self, key, value, timeout, only_if_missing=False):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        expires = self._expiry(timeout)
+        conn = self._db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if only_if_missing:
+                existing = conn.execute(
+                    'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                    (key, time.time()),
+                ).fetchone()
+                if existing:
+                    conn.execute('COMMIT')
+                    return False
+            if expires is not None and expires <= time.time():
+                conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+                self._log_change(conn, key)
+            else:
+                version = self._log_change(conn, key)
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache_entries (key, value, expires, version) VALUES (?, ?, ?, ?)',
+                    (key, pickled, expires, version),
+                )
+            self._maintain(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        with self._l1_lock:
+            self._l1.pop(key, None)
+        if expires is None or expires > time.time():
+            self._l1_set(key, pickled, expires)
+        return True
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._write(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._write(key, value, timeout, only_if_missing=True)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._db()
+        cursor = conn.execute(
+            'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), key, time.time()),
+        )
+        if cursor.rowcount:
+            self._log_change(conn, key)
+            with self._l1_lock:
+                self._l1.pop(key, None)
+        return bool(cursor.rowcount)
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            deleted = conn.execute('DELETE FROM cache_entries WHERE key = ?', (key,)).rowcount
+            self._log_change(conn, key)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        with self._l1_lock:
+            self._l1.pop(key, None)
+        return bool(deleted)
+
+    def incr(self, key, delta=1, version=None):
+        # Read and write under one write lock so concurrent workers never lose an update
+        key = self.make_and_validate_key(key, version=version)
+        conn = self._db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value, expires FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            version_stamp = self._log_change(conn, key)
+            conn.execute(
+                'UPDATE cache_entries SET value = ?, version = ? WHERE key = ?', (pickled, version_stamp, key)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        with self._l1_lock:
+            self._l1.pop(key, None)
+        self._l1_set(key, pickled, row[1])
+        return value
+
+    def has_key(self, key, version=None):
+        return self.get(key, self._missing, version=version) is not self._missing
+
+    _missing = object()
+
+    def clear(self):
+        conn = self._db()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM cache_entries')
+            self._log_change(conn, CLEAR_MARKER)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        with self._l1_lock:
+            self._l1.clear()
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
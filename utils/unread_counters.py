@@ -0,0 +1,111 @@
+"""
+Unread notification counters for Blood Donation Management System
+Per-user unread counts kept in the cache so the notification badge does not COUNT on every page
+"""
+import logging
+from django.core.cache import cache
+from django.db.models import Count
+from utils.constants import UNREAD_COUNTER_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+def _counter_key(user_id):
+    return f'unread_notifications:{user_id}'
+
+
+class UnreadCounter:
+    """
+    Service class for cached per-user unread notification counts
+
+    Writers adjust the counter instead of deleting it; a missing counter is
+    recounted from the database on the next read. Counters expire after
+    UNREAD_COUNTER_TIMEOUT so any drift (e.g. from a crashed write) heals on its
+    own, and reconcile() rewrites them from the database in bulk.
+    """
+
+    @staticmethod
+    def _count_from_db(user_id):
+        from admin_panel.models import UserNotification
+
+        return UserNotification.objects.filter(user_id=user_id, is_read=False).count()
+
+    @staticmethod
+    def get(user_id):
+        key = _counter_key(user_id)
+        try:
+            count = cache.get(key)
+        except Exception as e:
+            logger.error(f'Error reading unread counter for user {user_id}: {str(e)}')
+            return UnreadCounter._count_from_db(user_id)
+        if count is None:
+            count = UnreadCounter._count_from_db(user_id)
+            try:
+                cache.add(key, count, UNREAD_COUNTER_TIMEOUT)
+            except Exception as e:
+                logger.error(f'Error caching unread counter for user {user_id}: {str(e)}')
+        return max(count, 0)
+
+    @staticmethod
+    def adjust(user_id, delta):
+        """Add delta to a cached counter; an uncached counter is left for the next read to recount"""
+        if not delta:
+            return
+        try:
+            if cache.incr(_counter_key(user_id), delta) < 0:
+                cache.delete(_counter_key(user_id))
+        except ValueError:
+            pass
+        except Exception as e:
+            logger.error(f'Error adjusting unread counter for user {user_id}: {str(e)}')
+            UnreadCounter.invalidate(user_id)
+
+    @staticmethod
+    def set(user_id, count):
+        try:
+            cache.set(_counter_key(user_id), count, UNREAD_COUNTER_TIMEOUT)
+        except Exception as e:
+            logger.error(f'Error setting unread counter for user {user_id}: {str(e)}')
+            UnreadCounter.invalidate(user_id)
+
+    @staticmethod
+    def invalidate(*user_ids):
+        try:
+            cache.delete_many([_counter_key(user_id) for user_id in user_ids])
+        except Exception as e:
+            logger.error(f'Error invalidating unread counters: {str(e)}')
+
+    @staticmethod
+    def reconcile(user_ids=None):
+        """
+        Rewrite counters from one grouped COUNT per batch of users
+
+        Returns:
+            int: number of counters written
+        """
+        from django.contrib.auth.models import User
+        from admin_panel.models import UserNotification
+
+        if user_ids is None:
+            user_ids = User.objects.filter(is_active=True).values_list('id', flat=True).iterator()
+        written = 0
+        batch = []
+        for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) >= RECONCILE_BATCH_SIZE:
+                written += UnreadCounter._reconcile_batch(batch, UserNotification)
+                batch = []
+        if batch:
+            written += UnreadCounter._reconcile_batch(batch, UserNotification)
+        return written
+
+    @staticmethod
+    def _reconcile_batch(user_ids, model):
+        counts = dict(
+            model.objects.filter(user_id__in=user_ids, is_read=False)
+            .values('user_id').annotate(total=Count('id')).values_list('user_id', 'total')
+        )
+        cache.set_many({_counter_key(user_id): counts.get(user_id, 0) for user_id in user_ids}, UNREAD_COUNTER_TIMEOUT)
+        return len(user_ids)